@@ -0,0 +1,36 @@
+"""
+Benchmark the installed JSON codecs encoding a *PutItem* request and
+decoding a *Query* response page of 500 typical items with 50
+attributes::
+
+    python benchmarks/codec.py
+
+The speedup is that of the fastest installed codec over the standard
+library.
+
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import common  # noqa: E402
+from sprockets.clients.dynamodb import codec, utils  # noqa: E402
+
+
+if __name__ == '__main__':
+    codecs = list(reversed(codec.available_codecs()))
+    request = {'TableName': 'table',
+               'Item': utils.marshall(common.typical_item())}
+    common.compare('encode a PutItem request',
+                   [(json_codec.name, json_codec.dumps)
+                    for json_codec in codecs], request)
+
+    page = [utils.marshall(common.typical_item()) for _ in range(500)]
+    response = codecs[0].dumps({'Items': page, 'Count': len(page),
+                                'ScannedCount': len(page)})
+    common.compare('decode a Query response of {} bytes'.format(
+                       len(response)),
+                   [(json_codec.name, json_codec.loads)
+                    for json_codec in codecs], response, number=20)
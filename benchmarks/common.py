@@ -0,0 +1,49 @@
+"""
+Shared helpers for the benchmark scripts.
+
+"""
+import datetime
+import timeit
+import uuid
+
+
+def typical_item(attributes=50):
+    """Return an item with a mix of the attribute types that our tables
+    typically store.
+
+    """
+    item = {'id': str(uuid.uuid4()),
+            'created_at': datetime.datetime(2016, 5, 1, 12, 30, 15),
+            'owner': uuid.uuid4()}
+    kinds = [lambda n: 'value-{}'.format(n),
+             lambda n: n * 1000,
+             lambda n: n / 7.0,
+             lambda n: n % 2 == 0,
+             lambda n: None,
+             lambda n: ['a', n, {'nested': n}],
+             lambda n: {'name': 'nested-{}'.format(n), 'count': n},
+             lambda n: set(['tag-{}'.format(n), 'tag-{}'.format(n + 1)]),
+             lambda n: set([n, n + 1, n + 2])]
+    for number in range(attributes - len(item)):
+        item['attribute{}'.format(number)] = kinds[number % len(kinds)](
+            number)
+    return item
+
+
+def compare(label, functions, argument, number=10000, repeat=10):
+    """Print the best time per call of each function and the speedup of
+    the last one over the first one.  The functions are timed in turn so
+    that changes in the load of the machine affect them equally.
+
+    """
+    print(label)
+    timings = [None] * len(functions)
+    for _ in range(repeat):
+        for index, (name, function) in enumerate(functions):
+            elapsed = timeit.timeit(lambda: function(argument),
+                                    number=number) / number
+            if timings[index] is None or elapsed < timings[index]:
+                timings[index] = elapsed
+    for (name, _function), timing in zip(functions, timings):
+        print('  {:<12} {:8.2f} us/call'.format(name, timing * 1e6))
+    print('  speedup      {:8.2f}x'.format(timings[0] / timings[-1]))
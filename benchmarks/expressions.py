@@ -0,0 +1,35 @@
+"""
+Benchmark building the keyword arguments of an *UpdateItem* request that
+sets three attributes, adds to one, and has a condition, compiling the
+expressions on every call and with the cached templates of
+:func:`~sprockets.clients.dynamodb.expressions.update`::
+
+    python benchmarks/expressions.py
+
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import common  # noqa: E402
+from sprockets.clients.dynamodb import expressions  # noqa: E402
+
+
+def compiled(spec):
+    expressions._templates.clear()
+    return expressions.update(**spec)
+
+
+def cached(spec):
+    return expressions.update(**spec)
+
+
+if __name__ == '__main__':
+    spec = {'set': {'status': 'done', 'owner': 'someone', 'score': 9.5},
+            'add': {'attempts': 1},
+            'condition': {'status': ('<>', 'done'), 'version': 4}}
+    assert compiled(spec) == cached(spec)
+    common.compare('build an update with 4 actions and 2 conditions',
+                   [('compiled', compiled), ('cached', cached)], spec)
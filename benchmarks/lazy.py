@@ -0,0 +1,36 @@
+"""
+Benchmark reading three attributes of each item in a page of 500
+typical items with 50 attributes, unmarshalling the items eagerly with
+:func:`~sprockets.clients.dynamodb.utils.unmarshall_many` and lazily
+with :class:`~sprockets.clients.dynamodb.utils.LazyItem`::
+
+    python benchmarks/lazy.py
+
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import common  # noqa: E402
+from sprockets.clients.dynamodb import utils  # noqa: E402
+
+ATTRIBUTES = ('id', 'owner', 'attribute5')
+
+
+def eager(page):
+    return [[item[name] for name in ATTRIBUTES]
+            for item in utils.unmarshall_many(page)]
+
+
+def lazy(page):
+    return [[item[name] for name in ATTRIBUTES]
+            for item in [utils.LazyItem(values) for values in page]]
+
+
+if __name__ == '__main__':
+    page = [utils.marshall(common.typical_item()) for _ in range(500)]
+    assert eager(page) == lazy(page)
+    common.compare('read 3 attributes of 500 items with 50 attributes',
+                   [('eager', eager), ('lazy', lazy)], page, number=20)
@@ -0,0 +1,78 @@
+"""
+Benchmark :func:`sprockets.clients.dynamodb.utils.marshall` against the
+:func:`isinstance` chain that it replaced, using a typical item with 50
+attributes::
+
+    python benchmarks/marshall.py
+
+"""
+import base64
+import datetime
+import os
+import sys
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import common  # noqa: E402
+from sprockets.clients.dynamodb import utils  # noqa: E402
+
+
+def legacy_marshall(values):
+    return dict((key, _legacy_marshall_value(values[key])) for key in values)
+
+
+def _legacy_marshall_value(value):
+    if utils.PYTHON3 and isinstance(value, bytes):
+        return {'B': base64.b64encode(value).decode('ascii')}
+    elif utils.PYTHON3 and isinstance(value, str):
+        return {'S': value}
+    elif not utils.PYTHON3 and isinstance(value, str):
+        if utils._is_binary(value):
+            return {'B': base64.b64encode(value).decode('ascii')}
+        return {'S': value}
+    elif not utils.PYTHON3 and isinstance(value, utils.TEXT_TYPE):
+        return {'S': value}
+    elif isinstance(value, dict):
+        return {'M': legacy_marshall(value)}
+    elif isinstance(value, bool):
+        return {'BOOL': value}
+    elif isinstance(value, (int, float)):
+        return {'N': str(value)}
+    elif isinstance(value, datetime.datetime):
+        return {'S': value.isoformat()}
+    elif utils.arrow is not None and isinstance(value, utils.arrow.Arrow):
+        return {'S': value.isoformat()}
+    elif isinstance(value, uuid.UUID):
+        return {'S': str(value)}
+    elif isinstance(value, list):
+        return {'L': [_legacy_marshall_value(v) for v in value]}
+    elif isinstance(value, set):
+        if utils.PYTHON3 and all([isinstance(v, bytes) for v in value]):
+            return {'BS': utils._encode_binary_set(value)}
+        elif utils.PYTHON3 and all([isinstance(v, str) for v in value]):
+            return {'SS': sorted(list(value))}
+        elif all([isinstance(v, (int, float)) for v in value]):
+            return {'NS': sorted([str(v) for v in value])}
+        elif not utils.PYTHON3 and all([isinstance(v, str)
+                                        for v in value]) and \
+                all([utils._is_binary(v) for v in value]):
+            return {'BS': utils._encode_binary_set(value)}
+        elif not utils.PYTHON3 and all([isinstance(v, str)
+                                        for v in value]) and \
+                all([utils._is_binary(v) is False for v in value]):
+            return {'SS': sorted(list(value))}
+        else:
+            raise ValueError('Can not mix types in a set')
+    elif value is None:
+        return {'NULL': True}
+    raise ValueError('Unsupported type: %s' % type(value))
+
+
+if __name__ == '__main__':
+    item = common.typical_item()
+    assert legacy_marshall(item) == utils.marshall(item)
+    common.compare('marshall() of a 50 attribute item',
+                   [('isinstance', legacy_marshall),
+                    ('table', utils.marshall)], item)
@@ -0,0 +1,55 @@
+"""
+Benchmark building and encoding a *GetItem* request with a projection
+with :meth:`~sprockets.clients.dynamodb.DynamoDB.get_item` and with a
+prepared operation from
+:meth:`~sprockets.clients.dynamodb.DynamoDB.prepare_get_item`.  The
+request is not sent::
+
+    python benchmarks/prepared.py
+
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import common  # noqa: E402
+from sprockets.clients import dynamodb  # noqa: E402
+
+from sprockets.clients.dynamodb import codec  # noqa: E402
+
+NAMES = dict(('#a{}'.format(number), 'attribute{}'.format(number))
+             for number in range(10))
+PROJECTION = ', '.join(sorted(NAMES))
+
+
+def execute(function, body, encoded, requested_capacity=None,
+            priority=None):
+    return encoded
+
+
+def functions(json_codec):
+    client = dynamodb.DynamoDB(json_codec=json_codec)
+    client._execute = execute
+    prepared_get_item = client.prepare_get_item(
+        'table', expression_attribute_names=NAMES,
+        projection_expression=PROJECTION)
+
+    def unprepared(key):
+        return client.get_item('table', key,
+                               expression_attribute_names=NAMES,
+                               projection_expression=PROJECTION)
+
+    return [('execute', unprepared), ('prepared', prepared_get_item)]
+
+
+if __name__ == '__main__':
+    key = {'id': 'c0a80164-8e4a-4b8a-9d0e-4f1b6a3c2d10'}
+    for json_codec in codec.available_codecs():
+        (_, unprepared), (_, prepared) = pairs = functions(json_codec)
+        assert (json_codec.loads(unprepared(key)) ==
+                json_codec.loads(prepared(key)))
+        common.compare('build and encode a GetItem request with 10 '
+                       'projected attributes with {}'.format(json_codec.name),
+                       pairs, key)
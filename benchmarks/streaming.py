@@ -0,0 +1,64 @@
+"""
+Benchmark the peak memory use and time of processing a page of 500
+typical items with 50 attributes one at a time, decoding the whole page
+with the JSON codec and streaming it with
+:func:`~sprockets.clients.dynamodb.streaming.parse_page`::
+
+    python3 benchmarks/streaming.py
+
+The peak memory use is measured with :mod:`tracemalloc`, which requires
+Python 3.
+
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import common  # noqa: E402
+from sprockets.clients.dynamodb import codec, streaming, utils  # noqa: E402
+
+CODEC = codec.default_codec()
+
+
+def decoded(body):
+    count = 0
+    result = CODEC.loads(body)
+    for item in utils.unmarshall_many(result['Items']):
+        count += len(item)
+    return count
+
+
+def streamed(body):
+    count = 0
+    for item in streaming.parse_page(body, CODEC)['Items']:
+        count += len(item)
+    return count
+
+
+def peak(function, body):
+    tracemalloc.start()
+    try:
+        function(body)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+if __name__ == '__main__':
+    body = CODEC.dumps(
+        {'Count': 500,
+         'Items': [utils.marshall(common.typical_item())
+                   for _ in range(500)]})
+    assert decoded(body) == streamed(body)
+    print('peak memory processing a {:,} byte page with {}'.format(
+        len(body), CODEC.name))
+    before, after = peak(decoded, body), peak(streamed, body)
+    print('  decoded      {:8.0f} KiB'.format(before / 1024.0))
+    print('  streamed     {:8.0f} KiB'.format(after / 1024.0))
+    print('  reduction    {:8.2f}x'.format(before / float(after)))
+    common.compare('process a page of 500 items with 50 attributes',
+                   [('decoded', decoded), ('streamed', streamed)], body,
+                   number=5, repeat=5)
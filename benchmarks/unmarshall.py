@@ -0,0 +1,67 @@
+"""
+Benchmark :func:`sprockets.clients.dynamodb.utils.unmarshall_many`
+against unmarshalling the items of a page with the ``if``/``elif``
+chain that it replaced, using a page of 500 typical items with 50
+attributes each::
+
+    python benchmarks/unmarshall.py
+
+"""
+import base64
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import common  # noqa: E402
+from sprockets.clients.dynamodb import utils  # noqa: E402
+
+
+def legacy_unmarshall_page(items):
+    return [legacy_unmarshall(item) for item in items]
+
+
+def legacy_unmarshall(values):
+    unmarshalled = {}
+    for key in values:
+        unmarshalled[key] = _legacy_unmarshall_dict(values[key])
+    return unmarshalled
+
+
+def _legacy_unmarshall_dict(value):
+    key = list(value.keys()).pop()
+    if key == 'B':
+        return base64.b64decode(value[key].encode('ascii'))
+    elif key == 'BS':
+        return set([base64.b64decode(v.encode('ascii'))
+                    for v in value[key]])
+    elif key == 'BOOL':
+        return value[key]
+    elif key == 'L':
+        return [_legacy_unmarshall_dict(v) for v in value[key]]
+    elif key == 'M':
+        return legacy_unmarshall(value[key])
+    elif key == 'NULL':
+        return None
+    elif key == 'N':
+        return _legacy_to_number(value[key])
+    elif key == 'NS':
+        return set([_legacy_to_number(v) for v in value[key]])
+    elif key == 'S':
+        return value[key]
+    elif key == 'SS':
+        return set([v for v in value[key]])
+    raise ValueError('Unsupported value type: %s' % key)
+
+
+def _legacy_to_number(value):
+    return float(value) if '.' in value else int(value)
+
+
+if __name__ == '__main__':
+    page = [utils.marshall(common.typical_item()) for _ in range(500)]
+    assert legacy_unmarshall_page(page) == utils.unmarshall_many(page)
+    common.compare('unmarshall a page of 500 items with 50 attributes',
+                   [('if/elif', legacy_unmarshall_page),
+                    ('dispatch', utils.unmarshall_many)], page, number=20)
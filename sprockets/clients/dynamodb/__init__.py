@@ -1,4 +1,8 @@
 try:
+    from .cache import ItemCache  # noqa: F401
+    from .concurrency import AdaptiveLimiter, ConcurrencyLimiter  # noqa: F401
+    from .ratelimit import CapacityLimiter  # noqa: F401
+    from .retry import RetryBudget, RetryPolicy  # noqa: F401
     from .connector import DynamoDB
 except ImportError as error:
     def DynamoDB(*args, **kwargs):
@@ -0,0 +1,264 @@
+"""
+Item Cache
+==========
+
+An in-process, read-through cache of items retrieved by
+:meth:`~sprockets.clients.dynamodb.DynamoDB.get_item`.
+
+Items are stored unmarshalled so that a cache hit does not pay for
+decoding the item again.  The cache is bounded by both the number of
+entries and the estimated size of the items, evicting the least
+recently used entries first.  Entries expire after a per-table TTL.
+
+Keys that do not exist can optionally be cached for a short time as
+well so that repeated lookups of missing items are answered locally.
+
+"""
+import collections
+import time
+
+from . import utils
+
+#: Default maximum number of cached items
+MAX_ENTRIES = 10000
+
+#: Default maximum estimated size of the cached items in bytes
+MAX_BYTES = 64 * 1024 * 1024
+
+#: Default number of seconds that an item is cached for
+TTL = 60.0
+
+#: Default maximum number of cached missing keys
+MAX_ABSENT_ENTRIES = 10000
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class ItemCache(object):
+    """
+    Least recently used item cache with per-table expiration.
+
+    :param int max_entries: the maximum number of items to cache
+    :param int max_bytes: the maximum estimated size of the cached items
+    :param float ttl: the number of seconds to cache an item for
+    :param dict table_ttls: optional per-table overrides of ``ttl``.
+        A TTL of ``0`` disables caching for the table.
+    :param float absent_ttl: the number of seconds to remember that a
+        key does not exist for.  The default of ``0`` disables caching
+        of missing keys.
+    :param int max_absent_entries: the maximum number of missing keys
+        to remember
+
+    :ivar int hits: the number of lookups that were served from the cache
+    :ivar int absent_hits: the number of ``hits`` for missing keys
+    :ivar int misses: the number of lookups that were not in the cache
+    :ivar int evictions: the number of entries removed to stay within the
+        size bounds
+
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttl=TTL,
+                 table_ttls=None, absent_ttl=0,
+                 max_absent_entries=MAX_ABSENT_ENTRIES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.table_ttls = dict(table_ttls or {})
+        self.absent_ttl = absent_ttl
+        self.max_absent_entries = max_absent_entries
+        self.hits = 0
+        self.absent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.size = 0
+        self._entries = collections.OrderedDict()
+        self._absent = collections.OrderedDict()
+        self._generations = {}
+        self._key_attributes = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        """Return the cache counters.
+
+        :rtype: dict
+
+        """
+        return {'entries': len(self._entries), 'size': self.size,
+                'absent': len(self._absent), 'hits': self.hits,
+                'absent_hits': self.absent_hits, 'misses': self.misses,
+                'evictions': self.evictions}
+
+    def get(self, table_name, key):
+        """Return the cached item for `key` or :data:`None` if it is not
+        cached or has expired.  An empty :class:`dict` is returned for a
+        key that is known not to exist.
+
+        :param str table_name: the table the item belongs to
+        :param tuple key: the primary key of the item as returned by
+            :func:`~sprockets.clients.dynamodb.utils.primary_key`
+        :rtype: dict
+
+        """
+        now = _clock()
+        entry = self._entries.pop((table_name, key), None)
+        if entry is not None and entry[0] >= now:
+            self._entries[(table_name, key)] = entry
+            self.hits += 1
+            return entry[2]
+        elif entry is not None:
+            self.size -= entry[1]
+
+        expires = self._absent.pop((table_name, key), None)
+        if expires is not None and expires >= now:
+            self._absent[(table_name, key)] = expires
+            self.hits += 1
+            self.absent_hits += 1
+            return {}
+        self.misses += 1
+        return None
+
+    def begin_read(self, table_name, key):
+        """Record that an item is about to be read from DynamoDB, returning
+        the write generation of the table.  Pass the value to :meth:`fill`
+        so that an item that was read before a write to the table
+        completed is not cached.
+
+        :param str table_name: the table the item belongs to
+        :param tuple key: the primary key of the item
+        :rtype: int
+
+        """
+        self._key_attributes[table_name] = [name for name, _value in key]
+        return self._generations.get(table_name, 0)
+
+    def fill(self, table_name, key, item, generation):
+        """Cache an item that was read from DynamoDB.
+
+        :param str table_name: the table the item belongs to
+        :param tuple key: the primary key of the item
+        :param dict item: the unmarshalled item or an empty :class:`dict`
+            if the item does not exist
+        :param int generation: the value returned by :meth:`begin_read`
+
+        """
+        if generation != self._generations.get(table_name, 0):
+            return
+        elif item:
+            self._set(table_name, key, item)
+        elif self.absent_ttl:
+            self._absent.pop((table_name, key), None)
+            self._absent[(table_name, key)] = _clock() + self.absent_ttl
+            while len(self._absent) > self.max_absent_entries:
+                self._absent.popitem(last=False)
+                self.evictions += 1
+
+    def store(self, table_name, key, item):
+        """Cache an item that was written to DynamoDB, replacing any
+        cached version of it.
+
+        :param str table_name: the table the item belongs to
+        :param tuple key: the primary key of the item
+        :param dict item: the unmarshalled item
+
+        """
+        self._generations[table_name] = \
+            self._generations.get(table_name, 0) + 1
+        self._set(table_name, key, item)
+
+    def invalidate(self, table_name, key):
+        """Remove an item from the cache.
+
+        :param str table_name: the table the item belongs to
+        :param tuple key: the primary key of the item
+
+        """
+        self._generations[table_name] = \
+            self._generations.get(table_name, 0) + 1
+        self._absent.pop((table_name, key), None)
+        entry = self._entries.pop((table_name, key), None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def clear(self):
+        """Remove every item from the cache."""
+        for table_name in self._key_attributes:
+            self._generations[table_name] = \
+                self._generations.get(table_name, 0) + 1
+        self._entries.clear()
+        self._absent.clear()
+        self.size = 0
+
+    def key_attributes(self, table_name):
+        """Return the names of the key attributes of a table if items from
+        the table have been cached, otherwise :data:`None`.
+
+        :param str table_name: the table to return the key attributes of
+        :rtype: list
+
+        """
+        return self._key_attributes.get(table_name)
+
+    def key(self, table_name, item):
+        """Return the primary key of `item` if items from the table have
+        been cached, otherwise :data:`None`.
+
+        :param str table_name: the table the item belongs to
+        :param dict item: a native item or key
+        :rtype: tuple
+
+        """
+        attributes = self._key_attributes.get(table_name)
+        if attributes is None:
+            return None
+        try:
+            return utils.primary_key(item, attributes)
+        except (KeyError, ValueError):
+            return None
+
+    def _set(self, table_name, key, item):
+        self._absent.pop((table_name, key), None)
+        ttl = self.table_ttls.get(table_name, self.ttl)
+        if not ttl:
+            return
+        size = _estimate_size(item)
+        if size > self.max_bytes:
+            self.invalidate(table_name, key)
+            return
+        entry = self._entries.pop((table_name, key), None)
+        if entry is not None:
+            self.size -= entry[1]
+        self._entries[(table_name, key)] = (_clock() + ttl, size, item)
+        self.size += size
+        while (len(self._entries) > self.max_entries or
+               self.size > self.max_bytes):
+            _key, entry = self._entries.popitem(last=False)
+            self.size -= entry[1]
+            self.evictions += 1
+
+
+def _estimate_size(value):
+    """Estimate the stored size of an unmarshalled value in bytes using
+    the DynamoDB item size rules as a guide.
+
+    :param mixed value: the value to estimate the size of
+    :rtype: int
+
+    """
+    if isinstance(value, dict):
+        return 3 + sum(len(name) + _estimate_size(item)
+                       for name, item in value.items())
+    elif isinstance(value, (list, set, frozenset, tuple)):
+        return 3 + sum(_estimate_size(item) for item in value)
+    elif isinstance(value, (bytes, bytearray)):
+        return len(value)
+    elif isinstance(value, (bool, type(None))):
+        return 1
+    elif isinstance(value, (int, float)):
+        return 21
+    try:
+        return len(value)
+    except TypeError:
+        return len(str(value))
@@ -0,0 +1,122 @@
+"""
+JSON Codecs
+===========
+
+Every request body is encoded to JSON and every response body is
+decoded from it, so the JSON library is on the path of every call.  A
+codec converts between Python values and the UTF-8 encoded JSON
+:class:`bytes` that are sent and received, without an intermediate
+text copy when the library supports it.
+
+:func:`default_codec` selects the fastest library that is installed:
+`orjson`_, then `ujson`_, and finally the standard library
+:mod:`json` module.  Pass a codec as the ``json_codec`` keyword of
+:class:`~sprockets.clients.dynamodb.DynamoDB` to choose one explicitly.
+Any object with ``dumps`` and ``loads`` methods that produce and accept
+:class:`bytes` can be used.
+
+.. _orjson: https://github.com/ijl/orjson
+.. _ujson: https://github.com/ultrajson/ultrajson
+
+"""
+import json
+import sys
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+#: The standard library accepts bytes without decoding them first
+_LOADS_BYTES = sys.version_info < (3, 0, 0) or sys.version_info >= (3, 6, 0)
+
+
+class JSONCodec(object):
+    """Encodes and decodes JSON with the standard library."""
+
+    name = 'json'
+
+    def dumps(self, value):
+        """Return the value encoded as JSON.
+
+        :param mixed value: the value to encode
+        :rtype: bytes
+
+        """
+        encoded = json.dumps(value, separators=(',', ':'))
+        if isinstance(encoded, bytes):
+            return encoded
+        return encoded.encode('utf-8')
+
+    def loads(self, data):
+        """Return the value of a JSON document.
+
+        :param bytes data: the UTF-8 encoded JSON document
+        :rtype: mixed
+
+        """
+        if _LOADS_BYTES:
+            return json.loads(data)
+        return json.loads(data.decode('utf-8'))
+
+    def __repr__(self):
+        return '<{}>'.format(self.__class__.__name__)
+
+
+class OrjsonCodec(JSONCodec):
+    """Encodes and decodes JSON with `orjson`_, which reads and writes
+    :class:`bytes` directly.
+
+    """
+
+    name = 'orjson'
+
+    def dumps(self, value):
+        return orjson.dumps(value)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    """Encodes and decodes JSON with `ujson`_."""
+
+    name = 'ujson'
+
+    def dumps(self, value):
+        encoded = ujson.dumps(value, ensure_ascii=False)
+        if isinstance(encoded, bytes):
+            return encoded
+        return encoded.encode('utf-8')
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+def available_codecs():
+    """Return an instance of each codec whose library is installed,
+    fastest first.
+
+    :rtype: list
+
+    """
+    codecs = []
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    if ujson is not None:
+        codecs.append(UjsonCodec())
+    codecs.append(JSONCodec())
+    return codecs
+
+
+def default_codec():
+    """Return the fastest codec whose library is installed.
+
+    :rtype: JSONCodec
+
+    """
+    return available_codecs()[0]
@@ -0,0 +1,234 @@
+"""
+Concurrency Limits
+==================
+
+:class:`ConcurrencyLimiter` bounds the number of requests that are in
+flight to DynamoDB.  Requests above the limit wait in a queue that is
+owned by the limiter instead of queueing invisibly inside the HTTP
+client, so the queue length and the time spent waiting can be measured.
+
+Each request belongs to a priority class and every class has its own
+queue.  When a slot becomes free it is given to a waiting request using
+weighted fair queueing, so a class with a weight of ``8`` receives eight
+slots for every slot given to a class with a weight of ``1`` while both
+are waiting.  Background jobs can then share a client with interactive
+traffic without starving it.
+
+:class:`AdaptiveLimiter` adjusts the limit as it observes the service.
+The limit follows an additive increase, multiplicative decrease rule
+with a latency signal in the style of TCP Vegas.  The lowest observed
+latency is used as the baseline: while responses arrive within
+``tolerance`` times the baseline and the limit is being used, it grows
+by roughly one request per round trip.  Responses that are slower than
+that, throttled, or timed out shrink the limit by ``backoff``, at most
+once per baseline round trip.
+
+"""
+import collections
+import time
+
+from tornado import concurrent
+
+#: Default initial, minimum, and maximum number of requests in flight
+INITIAL_LIMIT = 20
+MIN_LIMIT = 1
+MAX_LIMIT = 200
+
+#: Default priority class weights
+WEIGHTS = {'interactive': 8, 'background': 1}
+
+#: Default priority class of requests that do not specify one
+DEFAULT_PRIORITY = 'interactive'
+
+#: Number of samples after which the baseline latency is measured again
+BASELINE_SAMPLES = 1000
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class ConcurrencyLimiter(object):
+    """
+    Limits the number of requests in flight, sharing the slots between
+    priority classes by weight.
+
+    :param int limit: the number of requests allowed in flight
+    :param dict weights: the relative share of the slots by priority
+        class name
+    :param str default_priority: the priority class of requests that
+        do not specify one
+
+    :ivar float limit: the current number of requests allowed in flight
+    :ivar int in_flight: the number of requests in flight
+    :ivar int queued: the number of requests that had to wait
+    :ivar float wait_time: the total number of seconds spent waiting
+
+    """
+
+    def __init__(self, limit=INITIAL_LIMIT, weights=None,
+                 default_priority=DEFAULT_PRIORITY):
+        self.limit = float(limit)
+        self.max_limit = limit
+        self.weights = dict(WEIGHTS if weights is None else weights)
+        if default_priority not in self.weights:
+            raise ValueError(
+                'Unknown priority class: {!r}'.format(default_priority))
+        self.default_priority = default_priority
+        self.in_flight = 0
+        self.queued = 0
+        self.wait_time = 0.0
+        self._waiters = dict((priority, collections.deque())
+                             for priority in self.weights)
+        self._wait_times = dict((priority, 0.0) for priority in self.weights)
+        self._finish = dict((priority, 0.0) for priority in self.weights)
+        self._virtual_time = 0.0
+
+    def __len__(self):
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    @property
+    def stats(self):
+        """Return the limiter counters.
+
+        :rtype: dict
+
+        """
+        return {'limit': int(self.limit), 'in_flight': self.in_flight,
+                'waiting': len(self), 'queued': self.queued,
+                'wait_time': self.wait_time,
+                'priorities': dict(
+                    (priority, {'waiting': len(self._waiters[priority]),
+                                'wait_time': self._wait_times[priority]})
+                    for priority in self.weights)}
+
+    def acquire(self, priority=None):
+        """Return a future that resolves when the request may be sent.
+        Each acquired slot must be returned with :meth:`release`.
+
+        :param str priority: the priority class of the request
+        :rtype: tornado.concurrent.Future
+        :raises: :exc:`ValueError`
+
+        """
+        if priority is None:
+            priority = self.default_priority
+        elif priority not in self.weights:
+            raise ValueError('Unknown priority class: {!r}'.format(priority))
+        future = concurrent.TracebackFuture()
+        if self.in_flight < int(self.limit) and not len(self):
+            self.in_flight += 1
+            future.set_result(None)
+            return future
+
+        self.queued += 1
+        if not self._waiters[priority]:
+            self._finish[priority] = max(self._finish[priority],
+                                         self._virtual_time)
+        self._waiters[priority].append((future, _clock()))
+        return future
+
+    def release(self, latency=None, dropped=False):
+        """Return a slot.
+
+        :param float latency: the number of seconds the request took or
+            :data:`None` if it should not be used as a sample
+        :param bool dropped: the request was throttled or timed out
+
+        """
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        now = _clock()
+        while self.in_flight < int(self.limit):
+            waiting = [priority for priority in self.weights
+                       if self._waiters[priority]]
+            if not waiting:
+                break
+            priority = min(waiting, key=lambda name: (self._finish[name],
+                                                      -self.weights[name]))
+            self._virtual_time = self._finish[priority]
+            self._finish[priority] += 1.0 / self.weights[priority]
+            future, queued = self._waiters[priority].popleft()
+            self.in_flight += 1
+            self.wait_time += now - queued
+            self._wait_times[priority] += now - queued
+            future.set_result(None)
+
+
+class AdaptiveLimiter(ConcurrencyLimiter):
+    """
+    Limits the number of requests in flight, adapting the limit to the
+    observed latency and throttling.
+
+    :param int initial_limit: the number of requests allowed in flight
+        before any responses have been observed
+    :param int min_limit: the lowest that the limit may shrink to
+    :param int max_limit: the highest that the limit may grow to
+    :param float tolerance: the multiple of the baseline latency above
+        which a response is treated as a sign of congestion
+    :param float backoff: the factor the limit is multiplied by when
+        congestion is detected
+    :param dict weights: the relative share of the slots by priority
+        class name
+    :param str default_priority: the priority class of requests that
+        do not specify one
+
+    """
+
+    def __init__(self, initial_limit=INITIAL_LIMIT, min_limit=MIN_LIMIT,
+                 max_limit=MAX_LIMIT, tolerance=2.0, backoff=0.9,
+                 weights=None, default_priority=DEFAULT_PRIORITY):
+        super(AdaptiveLimiter, self).__init__(initial_limit, weights,
+                                              default_priority)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self._baseline = None
+        self._samples = 0
+        self._decreased = 0
+
+    @property
+    def stats(self):
+        """Return the limiter counters, including the baseline latency.
+
+        :rtype: dict
+
+        """
+        stats = super(AdaptiveLimiter, self).stats
+        stats['baseline'] = self._baseline
+        return stats
+
+    def release(self, latency=None, dropped=False):
+        """Return a slot, adjusting the limit with the outcome of the
+        request.
+
+        :param float latency: the number of seconds the request took or
+            :data:`None` if it should not be used as a sample
+        :param bool dropped: the request was throttled or timed out
+
+        """
+        utilized = self.in_flight >= int(self.limit) / 2.0
+        self.in_flight -= 1
+        if dropped:
+            self._decrease()
+        elif latency is not None:
+            self._sample(latency, utilized)
+        self._wake()
+
+    def _sample(self, latency, utilized):
+        self._samples += 1
+        if self._baseline is None or self._samples >= BASELINE_SAMPLES:
+            self._baseline, self._samples = latency, 0
+        self._baseline = min(self._baseline, latency)
+        if latency > self._baseline * self.tolerance:
+            self._decrease()
+        elif utilized:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _decrease(self):
+        now = _clock()
+        if now - self._decreased < (self._baseline or 0):
+            return
+        self._decreased = now
+        self.limit = max(self.min_limit, self.limit * self.backoff)
@@ -1,16 +1,24 @@
-import json
+import collections
+import functools
 import logging
 import os
+import random
 import select
 import socket
 import ssl
 
-from tornado import concurrent, httpclient, ioloop
+from tornado import concurrent, gen, httpclient, ioloop
 import tornado_aws
 from tornado_aws import exceptions as aws_exceptions
 
 from . import utils
+from . import codec
 from . import exceptions
+from . import pagination
+from . import prepared
+from . import ratelimit
+from . import retry
+from . import streaming
 
 # Stub Python3 exceptions for Python 2.7
 try:
@@ -28,6 +36,54 @@ except NameError:
 
 LOGGER = logging.getLogger(__name__)
 
+#: Errors that are raised when a connection fails or is reset
+NETWORK_ERRORS = (ConnectionError, ConnectionResetError, OSError,
+                  select.error, ssl.socket_error, socket.gaierror)
+
+#: Maximum number of keys that may be sent in a single *BatchGetItem*
+BATCH_GET_LIMIT = 100
+
+#: Maximum number of requests that may be sent in a single *BatchWriteItem*
+BATCH_WRITE_LIMIT = 25
+
+#: Default number of batch requests that are sent in parallel
+BATCH_CONCURRENCY = 10
+
+#: Default number of times that unprocessed batch requests are re-sent
+BATCH_MAX_ATTEMPTS = 10
+
+#: Default number of seconds to spend re-driving unprocessed batch writes
+BATCH_WRITE_TIMEOUT = 60.0
+
+#: Base and maximum delay in seconds between unprocessed batch re-drives
+BATCH_BACKOFF_BASE = 0.05
+BATCH_BACKOFF_CAP = 5.0
+
+#: Default number of *Scan* pages requested in parallel
+SCAN_CONCURRENCY = 10
+
+#: Table or index bytes per segment when the segment count is automatic
+SCAN_SEGMENT_BYTES = 2 * 1024 ** 3
+
+#: Maximum number of segments that DynamoDB supports
+MAX_SCAN_SEGMENTS = 1000000
+
+#: Errors that signal congestion to the concurrency limiter
+CONGESTION_ERRORS = (exceptions.ThroughputExceeded,
+                     exceptions.ThrottlingException,
+                     exceptions.TimeoutException)
+
+#: Default response size in bytes above which a ``decode_executor`` is used
+DECODE_THRESHOLD = 64 * 1024
+
+#: Read-only functions that may share an identical in-flight request
+DEDUPLICATED_FUNCTIONS = {'DescribeTable', 'GetItem', 'Query'}
+
+#: Write functions that are not idempotent when they are conditional
+CONDITIONAL_FUNCTIONS = {'DeleteItem', 'PutItem'}
+
+_HEADERS = {}
+
 
 class DynamoDB(object):
     """
@@ -50,6 +106,91 @@ class DynamoDB(object):
         the default is determined by the region.
     :keyword int max_clients: optional maximum number of HTTP requests
         that may be performed in parallel.
+    :keyword bool coalesce_reads: optionally buffer :meth:`get_item`
+        calls and send them as *BatchGetItem* requests.  Calls are
+        combined when they share the same table, consistency, and
+        projection.  Calls that request the consumed capacity are
+        never combined.
+    :keyword float coalesce_window: number of seconds to buffer
+        :meth:`get_item` calls for when ``coalesce_reads`` is enabled.
+        The default of ``0`` combines the calls that are made in the
+        same :class:`~tornado.ioloop.IOLoop` iteration.
+    :keyword bool deduplicate_reads: optionally share a single in-flight
+        request between identical ``GetItem``, ``Query``, and
+        ``DescribeTable`` calls.  Strongly consistent reads are never
+        shared.  The callers receive the same result object so it
+        should be treated as read-only.
+    :keyword item_cache: optional
+        :class:`~sprockets.clients.dynamodb.cache.ItemCache` that
+        eventually consistent :meth:`get_item` calls are served from.
+        Items written with :meth:`put_item` and
+        :meth:`batch_write_item` update or invalidate the cached items,
+        including any keys that are cached as missing.
+    :keyword retry_policy: the
+        :class:`~sprockets.clients.dynamodb.retry.RetryPolicy` that
+        decides when :meth:`execute` retries a failed request.  By
+        default throttling, internal failures, timeouts, and connection
+        errors are retried within a
+        :class:`~sprockets.clients.dynamodb.retry.RetryBudget`.  Pass
+        :data:`None` to disable retries.
+    :keyword bool retry_writes: optionally retry the writes that are not
+        idempotent after every error of the ``retry_policy``.  A request
+        that timed out, lost its connection, or failed with a server
+        error may still have been applied, so by default ``UpdateItem``
+        requests and conditional ``PutItem`` and ``DeleteItem`` requests
+        are only retried after the
+        :data:`~sprockets.clients.dynamodb.retry.REJECTED_ERRORS` that
+        DynamoDB raises before it applies a request.  Sending an ``ADD``
+        update again would apply it twice and a conditional write that
+        was applied fails its condition when it is sent again.  The
+        unconditional puts and deletes of ``BatchWriteItem`` are
+        idempotent and are always retried.
+    :keyword rate_limiter: optional
+        :class:`~sprockets.clients.dynamodb.ratelimit.CapacityLimiter`
+        that paces requests to stay within per-table and per-index
+        capacity unit rates.  The consumed capacity is requested by
+        index from DynamoDB for the limited tables and reduced to the
+        detail that the caller asked for in the results.  See
+        :meth:`configure_rate_limits`.
+    :keyword concurrency_limiter: optional
+        :class:`~sprockets.clients.dynamodb.concurrency.AdaptiveLimiter`
+        that bounds the number of requests in flight, adapting the bound
+        to the observed latency and throttling.  Requests above the
+        limit wait in the limiter's queue.  Unless ``max_clients`` is
+        specified, it is set to the limiter's ``max_limit`` so that
+        requests do not also queue inside the HTTP client.  Use a
+        :class:`~sprockets.clients.dynamodb.concurrency.ConcurrencyLimiter`
+        for a fixed limit.  The slots are shared between the limiter's
+        priority classes by weight, see :meth:`with_priority`.
+    :keyword decode_executor: optional :class:`concurrent.futures.Executor`
+        that decodes and unmarshalls the responses that are larger than
+        ``decode_threshold`` so that large pages do not block the
+        :class:`~tornado.ioloop.IOLoop`.  A
+        :class:`~concurrent.futures.ProcessPoolExecutor` also spreads the
+        work over several CPU cores.  Python 2 requires the ``futures``
+        package.
+    :keyword int decode_threshold: the response size in bytes above
+        which the ``decode_executor`` is used.  Smaller responses are
+        decoded inline.  Defaults to :data:`DECODE_THRESHOLD`.
+    :keyword bool lazy_items: optionally return the items of
+        :meth:`get_item`, :meth:`batch_get_item`, :meth:`query`, and
+        :meth:`scan` as read-only
+        :class:`~sprockets.clients.dynamodb.utils.LazyItem` mappings
+        that unmarshall each attribute the first time it is accessed.
+        This saves the decoding of the attributes that are not used
+        when reading a few attributes of wide items.
+    :keyword bool stream_items: optionally return the ``Items`` of
+        :meth:`query` and :meth:`scan` as a
+        :class:`~sprockets.clients.dynamodb.streaming.ItemStream` that
+        decodes and unmarshalls one item at a time as it is iterated
+        over, lowering the peak memory use of large pages.  The stream
+        can only be read once, so streamed ``Query`` calls are never
+        shared by ``deduplicate_reads``.
+    :keyword json_codec: the
+        :class:`~sprockets.clients.dynamodb.codec.JSONCodec` that encodes
+        the requests and decodes the responses.  Defaults to the fastest
+        installed JSON library, see
+        :func:`~sprockets.clients.dynamodb.codec.default_codec`.
 
     Create an instance of this class to interact with a DynamoDB
     server.  A :class:`tornado_aws.client.AsyncAWSClient` instance
@@ -58,10 +199,34 @@ class DynamoDB(object):
 
     """
 
+    _priority = None
+
     def __init__(self, **kwargs):
         self.logger = LOGGER.getChild(self.__class__.__name__)
         self._client = None
         self._args = kwargs.copy()
+        self._coalesce_reads = self._args.pop('coalesce_reads', False)
+        self._coalesce_window = self._args.pop('coalesce_window', 0)
+        self._pending_gets = {}
+        self._deduplicate_reads = self._args.pop('deduplicate_reads', False)
+        self._in_flight = {}
+        self._key_attributes = {}
+        self._item_cache = self._args.pop('item_cache', None)
+        self._retry_policy = self._args.pop(
+            'retry_policy', retry.RetryPolicy(budget=retry.RetryBudget()))
+        self._retry_writes = self._args.pop('retry_writes', False)
+        self._rate_limiter = self._args.pop('rate_limiter', None)
+        self._concurrency_limiter = self._args.pop('concurrency_limiter', None)
+        self._decode_executor = self._args.pop('decode_executor', None)
+        self._decode_threshold = self._args.pop('decode_threshold',
+                                                DECODE_THRESHOLD)
+        self._lazy_items = self._args.pop('lazy_items', False)
+        self._stream_items = self._args.pop('stream_items', False)
+        self._codec = self._args.pop('json_codec', None) or \
+            codec.default_codec()
+        if self._concurrency_limiter is not None:
+            self._args.setdefault('max_clients',
+                                  self._concurrency_limiter.max_limit)
         if os.environ.get('DYNAMODB_ENDPOINT', None):
             self._args.setdefault('endpoint', os.environ['DYNAMODB_ENDPOINT'])
 
@@ -71,19 +236,68 @@ class DynamoDB(object):
             self._client = tornado_aws.AsyncAWSClient('dynamodb', **self._args)
         return self._client
 
-    def execute(self, function, body):
+    def with_priority(self, priority):
+        """
+        Return a view of the client that sends its requests in a
+        priority class of the ``concurrency_limiter``.
+
+        The view shares the connection, caches, limiters, and policies
+        of this client, only the priority of the requests differs.  It
+        has no effect when the client does not have a
+        ``concurrency_limiter``.
+
+        .. code:: python
+
+            background = client.with_priority('background')
+            items = yield background.batch_get_item(request_items)
+
+        :param str priority: the name of the priority class
+        :rtype: DynamoDB
+
+        """
+        return _ClientView(self, _priority=priority)
+
+    def with_retry_policy(self, retry_policy):
+        """
+        Return a view of the client that retries its requests with a
+        different :class:`~sprockets.clients.dynamodb.retry.RetryPolicy`.
+
+        The view shares the connection, caches, and limiters of this
+        client.  Use it for requests that need other limits, such as a
+        shorter deadline for a latency sensitive call.  The writes that
+        are not idempotent are still only retried after the
+        :data:`~sprockets.clients.dynamodb.retry.REJECTED_ERRORS` unless
+        the client was created with ``retry_writes``.
+
+        .. code:: python
+
+            quick = client.with_retry_policy(dynamodb.RetryPolicy(
+                deadline=0.5))
+            item = yield quick.get_item('table', key)
+
+        :param retry_policy: the policy, or :data:`None` to disable
+            retries
+        :rtype: DynamoDB
+
+        """
+        return _ClientView(self, _retry_policy=retry_policy)
+
+    def execute(self, function, body, priority=None):
         """
         Invoke a DynamoDB function.
 
         :param str function: DynamoDB function to invoke
         :param dict body: body to send with the function
+        :param str priority: the priority class to send the request in
+            when the client has a ``concurrency_limiter``.  Defaults to
+            the priority of the client view, see :meth:`with_priority`.
         :rtype: tornado.concurrent.Future
 
         This method creates a future that will resolve to the result
         of calling the specified DynamoDB function.  It does it's best
         to unwrap the response from the function to make life a little
-        easier for you.  It does this for the ``GetItem`` and ``Query``
-        functions currrently.
+        easier for you.  It does this for the ``GetItem``, ``Query``, and
+        ``Scan`` functions currrently.
 
         :raises: :exc:`~sprockets.clients.dynamodb.exceptions.DynamoDBException`
                  :exc:`~sprockets.clients.dynamodb.exceptions.ConfigNotFound`
@@ -103,35 +317,184 @@ class DynamoDB(object):
                  :exc:`~sprockets.clients.dynamodb.exceptions.ValidationException`
 
         """
-        encoded = json.dumps(body).encode('utf-8')
-        headers = {
-            'x-amz-target': 'DynamoDB_20120810.{}'.format(function),
-            'Content-Type': 'application/x-amz-json-1.0',
-        }
+        return self._send(function, body, None, priority)
+
+    def _send(self, function, body, encoded=None, priority=None):
+        """
+        Invoke a DynamoDB function with a body that may already be
+        encoded, see :meth:`execute`.
+
+        :param str function: DynamoDB function to invoke
+        :param dict body: body to send with the function
+        :param bytes encoded: the JSON encoded body, if it was encoded
+            by the caller
+        :param str priority: the priority class to send the request in
+        :rtype: tornado.concurrent.Future
+
+        """
+        if priority is None:
+            priority = self._priority
+        requested_capacity = None
+        if self._rate_limiter is not None:
+            prepared_body, requested_capacity = self._rate_limiter.prepare(
+                function, body)
+            if prepared_body is not body:
+                body, encoded = prepared_body, None
+        if encoded is None:
+            encoded = self._codec.dumps(body)
+        if not (self._deduplicate_reads and
+                function in DEDUPLICATED_FUNCTIONS and
+                not body.get('ConsistentRead') and
+                not (self._stream_items and function == 'Query')):
+            return self._execute(function, body, encoded, requested_capacity,
+                                 priority)
+
+        key = (function, encoded, priority)
+        if key in self._in_flight:
+            future = concurrent.TracebackFuture()
+            concurrent.chain_future(self._in_flight[key], future)
+            return future
+
+        self._in_flight[key] = future = self._execute(
+            function, body, encoded, requested_capacity, priority)
+        future.add_done_callback(lambda _f: self._in_flight.pop(key, None))
+        return future
+
+    @gen.coroutine
+    def _execute(self, function, body, encoded, requested_capacity=None,
+                 priority=None):
+        """
+        Send a request to DynamoDB, pacing it with the rate limiter and
+        retrying it as the retry policy allows.
+
+        :param str function: DynamoDB function to invoke
+        :param dict body: the body to send
+        :param bytes encoded: the JSON encoded body to send
+        :param str requested_capacity: the ``ReturnConsumedCapacity``
+            that the caller asked for when the rate limiter changed it,
+            which the ``ConsumedCapacity`` of the result is reduced to
+        :param str priority: the priority class to send the request in
+        :rtype: tornado.concurrent.Future
+
+        """
+        policy, limiter = self._retry_policy, self._rate_limiter
+        if self._concurrency_limiter is None:
+            fetch = self._fetch
+        else:
+            fetch = functools.partial(self._limited_fetch, priority=priority)
+        io_loop = ioloop.IOLoop.current()
+        start, retries = io_loop.time(), 0
+        while True:
+            reservation = None
+            if limiter is not None:
+                delay = limiter.delay(function, body)
+                while delay:
+                    yield gen.sleep(delay)
+                    delay = limiter.delay(function, body)
+                reservation = limiter.reserve(function, body)
+            try:
+                result = yield fetch(function, encoded)
+            except exceptions.DynamoDBException as error:
+                if reservation is not None:
+                    limiter.settle(function, reservation)
+                if policy is None:
+                    raise
+                if (self._retry_writes or _is_idempotent(function, body) or
+                        isinstance(error, retry.REJECTED_ERRORS)):
+                    delay = policy.delay(error, retries,
+                                         io_loop.time() - start)
+                else:
+                    delay = None
+                if delay is None:
+                    policy.complete(function, retries, error)
+                    raise
+                self.logger.debug('retrying %s() in %.3fs after %r',
+                                  function, delay, error)
+                retries += 1
+                yield gen.sleep(delay)
+            else:
+                if reservation is not None:
+                    limiter.settle(function, reservation,
+                                   result.get('ConsumedCapacity'))
+                    if requested_capacity is not None:
+                        limiter.restore(result, requested_capacity)
+                if policy is not None:
+                    policy.complete(function, retries)
+                raise gen.Return(_unwrap_result(function, result))
+
+    @gen.coroutine
+    def _limited_fetch(self, function, encoded, priority=None):
+        """
+        Send a single request to DynamoDB once the concurrency limiter
+        has a slot for it.
+
+        :param str function: DynamoDB function to invoke
+        :param bytes encoded: the JSON encoded body to send
+        :param str priority: the priority class to wait in
+        :rtype: tornado.concurrent.Future
+
+        """
+        limiter = self._concurrency_limiter
+        io_loop = ioloop.IOLoop.current()
+        yield limiter.acquire(priority)
+        start = io_loop.time()
+        try:
+            result = yield self._fetch(function, encoded)
+        except CONGESTION_ERRORS:
+            limiter.release(dropped=True)
+            raise
+        except Exception:
+            limiter.release()
+            raise
+        limiter.release(io_loop.time() - start)
+        raise gen.Return(result)
+
+    def _fetch(self, function, encoded):
+        """
+        Send a single request to DynamoDB.
+
+        :param str function: DynamoDB function to invoke
+        :param bytes encoded: the JSON encoded body to send
+        :rtype: tornado.concurrent.Future
+
+        """
+        headers = _headers(function)
         future = concurrent.TracebackFuture()
 
+        def handle_decoded(f):
+            error = f.exception()
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(f.result())
+
         def handle_response(f):
             self.logger.debug('processing %s() = %r', function, f)
             try:
-                result = self._process_response(f)
+                body = self._process_response(f)
+                if (self._decode_executor is not None and
+                        len(body) > self._decode_threshold):
+                    ioloop.IOLoop.current().add_future(
+                        self._decode_executor.submit(
+                            _decode_response, function, body, self._codec,
+                            self._lazy_items, self._stream_items),
+                        handle_decoded)
+                    return
+                result = _decode_response(function, body, self._codec,
+                                          self._lazy_items,
+                                          self._stream_items)
             except aws_exceptions.AWSError as aws_error:
                 future.set_exception(exceptions.DynamoDBException(aws_error))
             except httpclient.HTTPError as http_err:
-                if http_err.code == 599:
-                    future.set_exception(exceptions.TimeoutException())
-                else:
-                    response_reason = str(http_err.code)
-                    if http_err.response and \
-                            hasattr(http_err.response, 'body'):
-                        response_reason = http_err.response.body
-                    future.set_exception(
-                        exceptions.RequestException(response_reason))
+                future.set_exception(_http_exception(http_err))
             except TimeoutError:
                 future.set_exception(exceptions.TimeoutException())
+            except NETWORK_ERRORS as error:
+                future.set_exception(exceptions.ConnectionFailure(str(error)))
             except Exception as exception:
                 future.set_exception(exception)
             else:
-                future.set_result(_unwrap_result(function, result))
+                future.set_result(result)
 
         try:
             aws_response = self.client.fetch('POST', '/', body=encoded,
@@ -144,21 +507,10 @@ class DynamoDB(object):
             future.set_exception(exceptions.NoCredentialsError(str(error)))
         except aws_exceptions.NoProfileError as error:
             future.set_exception(exceptions.NoProfileError(str(error)))
-        except (ConnectionError,
-                ConnectionResetError,
-                OSError,
-                select.error,
-                ssl.socket_error,
-                socket.gaierror) as error:
-            future.set_exception(exceptions.RequestException(str(error)))
+        except NETWORK_ERRORS as error:
+            future.set_exception(exceptions.ConnectionFailure(str(error)))
         except httpclient.HTTPError as err:
-            if err.code == 599:
-                future.set_exception(exceptions.TimeoutException())
-            else:
-                reason = str(err.code)
-                if err.response and hasattr(err.response, 'body'):
-                    reason = err.response.body
-                future.set_exception(exceptions.RequestException(reason))
+            future.set_exception(_http_exception(err))
 
         else:
             ioloop.IOLoop.current().add_future(aws_response, handle_response)
@@ -473,6 +825,66 @@ class DynamoDB(object):
         ioloop.IOLoop.current().add_future(aws_response, handle_response)
         return future
 
+    def key_attributes(self, table_name):
+        """Return the names of the primary key attributes of a table
+        from the ``KeySchema`` of :meth:`describe_table`, partition key
+        first.  The names are cached by the client, so the table is
+        only described once.
+
+        :param str table_name: the table to return the key attributes of
+        :rtype: tornado.concurrent.Future
+
+        """
+        if table_name not in self._key_attributes:
+            future = concurrent.TracebackFuture()
+            self._key_attributes[table_name] = future
+
+            def handle_response(response):
+                exception = response.exception()
+                if exception:
+                    self._key_attributes.pop(table_name, None)
+                    future.set_exception(exception)
+                else:
+                    future.set_result(tuple(
+                        key['AttributeName']
+                        for key in response.result()['KeySchema']))
+
+            ioloop.IOLoop.current().add_future(
+                self.describe_table(table_name), handle_response)
+        return self._key_attributes[table_name]
+
+    @gen.coroutine
+    def configure_rate_limits(self, table_name, fraction=1.0):
+        """
+        Limit the requests to a table and its global secondary indexes to
+        a fraction of their provisioned capacity, creating a
+        :class:`~sprockets.clients.dynamodb.ratelimit.CapacityLimiter` if
+        the client does not have a ``rate_limiter``.  Tables that use
+        on-demand capacity are not limited.
+
+        :param str table_name: name of the table to limit
+        :param float fraction: the fraction of the provisioned capacity
+            to use
+        :rtype: tornado.concurrent.Future
+
+        :raises:
+            :exc:`~sprockets.clients.dynamodb.exceptions.DynamoDBException`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ConfigNotFound`
+            :exc:`~sprockets.clients.dynamodb.exceptions.NoCredentialsError`
+            :exc:`~sprockets.clients.dynamodb.exceptions.NoProfileError`
+            :exc:`~sprockets.clients.dynamodb.exceptions.TimeoutException`
+            :exc:`~sprockets.clients.dynamodb.exceptions.RequestException`
+            :exc:`~sprockets.clients.dynamodb.exceptions.InternalFailure`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ResourceNotFound`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ServiceUnavailable`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ValidationException`
+
+        """
+        table = yield self.describe_table(table_name)
+        if self._rate_limiter is None:
+            self._rate_limiter = ratelimit.CapacityLimiter()
+        self._rate_limiter.configure(table, fraction)
+
     def list_tables(self, exclusive_start_table_name=None, limit=None):
         """
         Invoke the `ListTables`_ function.
@@ -633,7 +1045,38 @@ class DynamoDB(object):
             payload['ReturnItemCollectionMetrics'] = 'SIZE'
         if return_values:
             payload['ReturnValues'] = return_values
-        return self.execute('PutItem', payload)
+        if self._item_cache is None:
+            return self.execute('PutItem', payload)
+        return self._write_through(table_name, item, payload['Item'],
+                                   self.execute('PutItem', payload))
+
+    def _write_through(self, table_name, key_dict, item, aws_response):
+        """Update the item cache when a write completes.  The cached item
+        is invalidated while the write is in flight and replaced with
+        `item` if the write succeeds.
+
+        :param str table_name: the table that is written to
+        :param dict key_dict: a native item or key to get the key from
+        :param dict item: the marshalled item that was written or
+            :data:`None` if the item should only be invalidated
+        :param tornado.concurrent.Future aws_response: the write result
+        :rtype: tornado.concurrent.Future
+
+        """
+        cache = self._item_cache
+        key = cache.key(table_name, key_dict)
+        if key is None:
+            return aws_response
+        cache.invalidate(table_name, key)
+
+        def handle_response(response):
+            if item is not None and not response.exception():
+                cache.store(table_name, key, utils.unmarshall(item))
+            else:
+                cache.invalidate(table_name, key)
+
+        aws_response.add_done_callback(handle_response)
+        return aws_response
 
     def get_item(self, table_name, key_dict, consistent_read=False,
                  expression_attribute_names=None,
@@ -692,7 +1135,85 @@ class DynamoDB(object):
         .. _GetItem: http://docs.aws.amazon.com/amazondynamodb/
            latest/APIReference/API_GetItem.html
 
+        .. note:: When ``coalesce_reads`` is enabled, items that are
+            retrieved with a ``projection_expression`` also include the
+            key attributes.
+
+        .. note:: When an ``item_cache`` is configured, calls without
+            a ``projection_expression`` or ``return_consumed_capacity``
+            are cached.  The top-level :class:`dict` that is returned is
+            a copy, but nested values are shared with the cache and
+            should not be modified.
+
+        """
+        if (self._item_cache is not None and not projection_expression and
+                not return_consumed_capacity):
+            return self._cached_get_item(table_name, key_dict,
+                                         consistent_read,
+                                         expression_attribute_names)
+        return self._get_item(table_name, key_dict, consistent_read,
+                              expression_attribute_names,
+                              projection_expression, return_consumed_capacity)
+
+    def _cached_get_item(self, table_name, key_dict, consistent_read,
+                         expression_attribute_names):
+        """Serve a :meth:`get_item` call from the item cache, filling the
+        cache on a miss.  Strongly consistent reads always go to DynamoDB
+        but their result is cached.
+
+        :param str table_name: table to retrieve the item from
+        :param dict key_dict: key to use for retrieval
+        :param bool consistent_read: use a strongly consistent read
+        :param dict expression_attribute_names: substitution tokens
+        :rtype: tornado.concurrent.Future
+
+        """
+        future = concurrent.TracebackFuture()
+        try:
+            key = utils.primary_key(key_dict)
+        except ValueError as error:
+            future.set_exception(error)
+            return future
+
+        cache = self._item_cache
+        if not consistent_read:
+            item = cache.get(table_name, key)
+            if item is not None:
+                future.set_result(dict(item))
+                return future
+        generation = cache.begin_read(table_name, key)
+
+        def handle_response(response):
+            exception = response.exception()
+            if exception:
+                future.set_exception(exception)
+                return
+            result = response.result()
+            cache.fill(table_name, key, dict(result), generation)
+            future.set_result(result)
+
+        aws_response = self._get_item(table_name, key_dict, consistent_read,
+                                      expression_attribute_names, None, None)
+        ioloop.IOLoop.current().add_future(aws_response, handle_response)
+        return future
+
+    def _get_item(self, table_name, key_dict, consistent_read,
+                  expression_attribute_names, projection_expression,
+                  return_consumed_capacity):
+        """Invoke the *GetItem* function, combining the call with other
+        calls when ``coalesce_reads`` is enabled.
+
+        :rtype: tornado.concurrent.Future
+
         """
+        if self._coalesce_reads and not return_consumed_capacity:
+            options = {'ConsistentRead': consistent_read}
+            if expression_attribute_names:
+                options['ExpressionAttributeNames'] = \
+                    expression_attribute_names
+            if projection_expression:
+                options['ProjectionExpression'] = projection_expression
+            return self._coalesce_get_item(table_name, key_dict, options)
         payload = {'TableName': table_name,
                    'Key': utils.marshall(key_dict),
                    'ConsistentRead': consistent_read}
@@ -704,6 +1225,89 @@ class DynamoDB(object):
             payload['ReturnConsumedCapacity'] = return_consumed_capacity
         return self.execute('GetItem', payload)
 
+    def _coalesce_get_item(self, table_name, key_dict, options):
+        """Buffer a :meth:`get_item` call so that it is sent with other
+        compatible calls in a *BatchGetItem* request.
+
+        :param str table_name: table to retrieve the item from
+        :param dict key_dict: key to use for retrieval
+        :param dict options: the *BatchGetItem* options for the table
+        :rtype: tornado.concurrent.Future
+
+        """
+        future = concurrent.TracebackFuture()
+        try:
+            key = utils.primary_key(key_dict)
+        except ValueError as error:
+            future.set_exception(error)
+            return future
+
+        if not self._pending_gets:
+            io_loop = ioloop.IOLoop.current()
+            if self._coalesce_window:
+                io_loop.call_later(self._coalesce_window,
+                                   self._flush_get_items)
+            else:
+                io_loop.add_callback(self._flush_get_items)
+
+        group = (table_name, options['ConsistentRead'],
+                 options.get('ProjectionExpression'),
+                 tuple(sorted(
+                     (options.get('ExpressionAttributeNames') or {}).items())),
+                 self._priority)
+        if group not in self._pending_gets:
+            self._pending_gets[group] = (options, [])
+        self._pending_gets[group][1].append((key_dict, key, future))
+        return future
+
+    def _flush_get_items(self):
+        """Send the buffered :meth:`get_item` calls as *BatchGetItem*
+        requests, combining groups for different tables and the same
+        priority in the same request.
+
+        """
+        pending, self._pending_gets = self._pending_gets, {}
+        requests = []
+        for group, (options, calls) in pending.items():
+            priority = group[-1]
+            for request_priority, request in requests:
+                if request_priority == priority and group[0] not in request:
+                    break
+            else:
+                request = {}
+                requests.append((priority, request))
+            request[group[0]] = (options, calls)
+
+        for priority, request in requests:
+            client = (self if priority == self._priority
+                      else self.with_priority(priority))
+            future = client.batch_get_item(
+                dict((table_name, dict(options, Keys=[
+                    key_dict for key_dict, _key, _future in calls]))
+                     for table_name, (options, calls) in request.items()))
+            ioloop.IOLoop.current().add_future(
+                future, functools.partial(self._on_get_items, request))
+
+    @staticmethod
+    def _on_get_items(request, response):
+        """Resolve the futures of the coalesced :meth:`get_item` calls.
+
+        :param dict request: the calls that were sent, by table name
+        :param tornado.concurrent.Future response: the batch result
+
+        """
+        exception = response.exception()
+        for table_name, (_options, calls) in request.items():
+            items = {} if exception else response.result()[table_name]
+            for _key_dict, key, future in calls:
+                if exception:
+                    future.set_exception(exception)
+                    continue
+                item = items.get(key, {})
+                if not isinstance(item, utils.LazyItem):
+                    item = dict(item)
+                future.set_result(item)
+
     def update_item(self, table_name, key, return_values=False,
                     condition_expression=None, update_expression=None,
                     expression_attribute_names=None,
@@ -719,6 +1323,16 @@ class DynamoDB(object):
         an existing name-value pair if it has certain expected attribute
         values).
 
+        The expressions can be built from native values with
+        :func:`~sprockets.clients.dynamodb.expressions.update`:
+
+        .. code:: python
+
+            yield client.update_item(
+                'table', {'id': item_id},
+                **expressions.update(set={'status': 'done'},
+                                     add={'attempts': 1}))
+
         :param str table_name: The name of the table that contains the item to
             update
         :param dict key: A dictionary of key/value pairs that are used to
@@ -727,9 +1341,11 @@ class DynamoDB(object):
             primary key, you only need to provide a value for the partition
             key. For a composite primary key, you must provide values for both
             the partition key and the sort key.
-        :param bool return_values: Set to ``True`` if you want to get the item
+        :param return_values: Set to ``True`` if you want to get the item
             attributes as they appeared before they were updated with the
-            *UpdateItem* request.
+            *UpdateItem* request, or to one of ``ALL_OLD``, ``UPDATED_OLD``,
+            ``ALL_NEW``, or ``UPDATED_NEW``.
+        :type return_values: bool or str
         :param str condition_expression: A condition that must be satisfied in
             order for a conditional *UpdateItem* operation to succeed. One of:
             ``attribute_exists``, ``attribute_not_exists``, ``attribute_type``,
@@ -748,7 +1364,7 @@ class DynamoDB(object):
             response. Should be ``None`` or one of ``INDEXES`` or ``TOTAL``
         :param bool return_item_collection_metrics: Determines whether item
             collection metrics are returned.
-        :rtype: dict
+        :rtype: tornado.concurrent.Future
 
         :raises: :exc:`~sprockets.clients.dynamodb.exceptions.DynamoDBException`
                  :exc:`~sprockets.clients.dynamodb.exceptions.ConfigNotFound`
@@ -771,7 +1387,26 @@ class DynamoDB(object):
            latest/APIReference/API_UpdateItem.html
 
         """
-        raise NotImplementedError
+        payload = {'TableName': table_name, 'Key': utils.marshall(key)}
+        if update_expression:
+            payload['UpdateExpression'] = update_expression
+        if condition_expression:
+            payload['ConditionExpression'] = condition_expression
+        if expression_attribute_names:
+            payload['ExpressionAttributeNames'] = expression_attribute_names
+        if expression_attribute_values:
+            payload['ExpressionAttributeValues'] = expression_attribute_values
+        if return_consumed_capacity:
+            payload['ReturnConsumedCapacity'] = return_consumed_capacity
+        if return_item_collection_metrics:
+            payload['ReturnItemCollectionMetrics'] = 'SIZE'
+        if return_values:
+            payload['ReturnValues'] = ('ALL_OLD' if return_values is True
+                                       else return_values)
+        if self._item_cache is None:
+            return self.execute('UpdateItem', payload)
+        return self._write_through(table_name, key, None,
+                                   self.execute('UpdateItem', payload))
 
     def delete_item(self, table_name, key, condition_expression=None,
                     expression_attribute_names=None,
@@ -927,11 +1562,59 @@ class DynamoDB(object):
            latest/APIReference/API_DeleteItem.html
 
         """
-        raise NotImplementedError
-
-    def batch_get_item(self):
+        payload = {'TableName': table_name, 'Key': utils.marshall(key)}
+        if condition_expression:
+            payload['ConditionExpression'] = condition_expression
+        if expression_attribute_names:
+            payload['ExpressionAttributeNames'] = expression_attribute_names
+        if expression_attribute_values:
+            payload['ExpressionAttributeValues'] = expression_attribute_values
+        if return_consumed_capacity:
+            payload['ReturnConsumedCapacity'] = return_consumed_capacity
+        if return_item_collection_metrics:
+            payload['ReturnItemCollectionMetrics'] = 'SIZE'
+        if return_values:
+            payload['ReturnValues'] = 'ALL_OLD'
+        if self._item_cache is None:
+            return self.execute('DeleteItem', payload)
+        return self._write_through(table_name, key, None,
+                                   self.execute('DeleteItem', payload))
+
+    @gen.coroutine
+    def batch_get_item(self, request_items, max_concurrency=BATCH_CONCURRENCY,
+                       max_attempts=BATCH_MAX_ATTEMPTS):
         """Invoke the `BatchGetItem`_ function.
 
+        Retrieves any number of items from one or more tables.  The keys
+        are split into requests of at most ``100`` keys which are sent
+        to DynamoDB in parallel.  Keys that DynamoDB returns as
+        ``UnprocessedKeys``, either due to throttling or because the
+        response exceeded the ``16 MB`` limit, are re-sent with an
+        exponential backoff until they are retrieved.
+
+        :param dict request_items: A map of table names to the keys to
+            retrieve from that table.  Each value is either a list of
+            key :class:`dict` instances or a :class:`dict` with a ``Keys``
+            list and any of the ``ConsistentRead``,
+            ``ExpressionAttributeNames``, or ``ProjectionExpression``
+            settings described in the `BatchGetItem`_ documentation.
+            The keys will be marshalled for you so native :class:`dict`
+            instances work.
+        :param int max_concurrency: The maximum number of *BatchGetItem*
+            requests to have in flight at the same time.
+        :param int max_attempts: The number of times to request a chunk
+            of keys before giving up on the unprocessed keys.
+        :returns: A map of table names to the retrieved items.  Each
+            table's items are in a :class:`dict` indexed by the value
+            of :func:`sprockets.clients.dynamodb.utils.primary_key` for
+            the item.  Keys that do not exist are not included.  The
+            items are :class:`~sprockets.clients.dynamodb.utils.LazyItem`
+            mappings when the client has ``lazy_items`` enabled.
+        :rtype: tornado.concurrent.Future
+
+        .. note:: When a ``ProjectionExpression`` is specified, the key
+            attributes are added to it so that the items can be indexed.
+
         :raises: :exc:`~sprockets.clients.dynamodb.exceptions.DynamoDBException`
                  :exc:`~sprockets.clients.dynamodb.exceptions.ConfigNotFound`
                  :exc:`~sprockets.clients.dynamodb.exceptions.NoCredentialsError`
@@ -953,11 +1636,106 @@ class DynamoDB(object):
            latest/APIReference/API_BatchGetItem.html
 
         """
-        raise NotImplementedError
+        tables, pending = {}, []
+        for table_name, spec in request_items.items():
+            if not isinstance(spec, dict):
+                spec = {'Keys': spec}
+            keys, seen = [], set()
+            for key in spec['Keys']:
+                value = utils.primary_key(key)
+                if value not in seen:
+                    seen.add(value)
+                    keys.append(utils.marshall(key))
+            if not keys:
+                continue
+            attributes = sorted(spec['Keys'][0])
+            options = dict((name, value) for name, value in spec.items()
+                           if name != 'Keys')
+            tables[table_name] = (attributes,
+                                  _project_key_attributes(options, attributes))
+            pending.extend((table_name, key) for key in keys)
+
+        results = dict((table_name, {}) for table_name in tables)
+
+        @gen.coroutine
+        def process_chunk(chunk):
+            request = {}
+            for table_name, keys in chunk.items():
+                request[table_name] = dict(tables[table_name][1])
+                request[table_name]['Keys'] = keys
+            responses = yield self._batch_get_chunk(request, max_attempts)
+            for table_name, items in responses.items():
+                attributes = tables[table_name][0]
+                for item in items:
+                    item = (utils.LazyItem(item) if self._lazy_items else
+                            utils.unmarshall(item))
+                    results[table_name][utils.primary_key(
+                        item, attributes)] = item
+
+        yield _process_chunks(_chunk(pending, BATCH_GET_LIMIT),
+                              process_chunk, max_concurrency)
+        raise gen.Return(results)
+
+    @gen.coroutine
+    def _batch_get_chunk(self, request_items, max_attempts):
+        """Send a single *BatchGetItem* request, re-driving the
+        ``UnprocessedKeys`` until all of the keys have been processed.
+
+        :param dict request_items: the marshalled ``RequestItems``
+        :param int max_attempts: the number of times to send the request
+        :returns: a map of table names to the raw items retrieved
+        :rtype: tornado.concurrent.Future
 
-    def batch_write_item(self):
+        """
+        responses, attempt = {}, 0
+        while request_items:
+            if attempt >= max_attempts:
+                raise exceptions.ThroughputExceeded(
+                    '{} keys were not processed after {} attempts'.format(
+                        sum(len(spec['Keys'])
+                            for spec in request_items.values()), attempt))
+            if attempt:
+                yield gen.sleep(_backoff(attempt))
+            result = yield self.execute('BatchGetItem',
+                                        {'RequestItems': request_items})
+            for table_name, items in result.get('Responses', {}).items():
+                responses.setdefault(table_name, []).extend(items)
+            request_items = result.get('UnprocessedKeys')
+            attempt += 1
+        raise gen.Return(responses)
+
+    @gen.coroutine
+    def batch_write_item(self, request_items,
+                         max_concurrency=BATCH_CONCURRENCY,
+                         timeout=BATCH_WRITE_TIMEOUT, deduplicate=False):
         """Invoke the `BatchWriteItem`_ function.
 
+        Puts or deletes any number of items in one or more tables.  The
+        write requests are split into requests of at most ``25`` items
+        which are sent to DynamoDB in parallel.  Write requests that
+        DynamoDB returns as ``UnprocessedItems`` are re-sent with a
+        jittered exponential backoff until they are written or
+        ``timeout`` seconds have passed.
+
+        :param dict request_items: A map of table names to a list of
+            write requests for the table.  Each write request is either
+            a ``{'PutRequest': {'Item': item}}`` or a
+            ``{'DeleteRequest': {'Key': key}}`` :class:`dict`.  The items
+            and keys will be marshalled for you so native :class:`dict`
+            instances work.
+        :param int max_concurrency: The maximum number of *BatchWriteItem*
+            requests to have in flight at the same time.
+        :param float timeout: The number of seconds to spend re-driving
+            unprocessed write requests before giving up on them.
+        :param bool deduplicate: Only send the last write request of
+            each item, since *BatchWriteItem* rejects requests that
+            write the same item more than once.  The key attributes of
+            the tables are read with :meth:`key_attributes`.
+        :returns: The write requests that could not be processed before
+            the ``timeout`` passed in the same format as
+            ``request_items``.  This is empty when every write succeeded.
+        :rtype: tornado.concurrent.Future
+
         :raises: :exc:`~sprockets.clients.dynamodb.exceptions.DynamoDBException`
                  :exc:`~sprockets.clients.dynamodb.exceptions.ConfigNotFound`
                  :exc:`~sprockets.clients.dynamodb.exceptions.NoCredentialsError`
@@ -979,14 +1757,246 @@ class DynamoDB(object):
            latest/APIReference/API_BatchWriteItem.html
 
         """
-        raise NotImplementedError
+        deadline = ioloop.IOLoop.current().time() + timeout
+        pending = []
+        for table_name, requests in request_items.items():
+            requests = [_marshall_write_request(request)
+                        for request in requests]
+            if deduplicate:
+                attributes = yield self.key_attributes(table_name)
+                requests = collections.OrderedDict(
+                    (_write_key(request, attributes), request)
+                    for request in requests).values()
+            pending.extend((table_name, request) for request in requests)
+        unprocessed = {}
+
+        @gen.coroutine
+        def process_chunk(chunk):
+            remaining = yield self._write_chunk(chunk, deadline)
+            for table_name, requests in remaining.items():
+                unprocessed.setdefault(table_name, []).extend(
+                    _unmarshall_write_request(request)
+                    for request in requests)
+
+        yield _process_chunks(_chunk(pending, BATCH_WRITE_LIMIT),
+                              process_chunk, max_concurrency)
+        raise gen.Return(unprocessed)
+
+    def buffered_writer(self, **kwargs):
+        """Return a
+        :class:`~sprockets.clients.dynamodb.writer.BufferedWriter` that
+        buffers puts and deletes and writes them in the background with
+        *BatchWriteItem* requests.  The keyword arguments are passed to
+        the writer.
+
+        .. code:: python
+
+            writer = client.buffered_writer(flush_interval=0.5)
+            writer.put('table', {'id': 'value'})
+            ...
+            yield writer.close()
+
+        :rtype: sprockets.clients.dynamodb.writer.BufferedWriter
+
+        """
+        from . import writer
+        return writer.BufferedWriter(self, **kwargs)
+
+    def counter_buffer(self, **kwargs):
+        """Return a
+        :class:`~sprockets.clients.dynamodb.counters.CounterBuffer` that
+        sums counter increments in memory and writes them periodically
+        with a single ``ADD`` :meth:`update_item` per item.  The keyword
+        arguments are passed to the buffer.
+
+        .. code:: python
+
+            counters = client.counter_buffer(flush_interval=5)
+            counters.increment('pages', {'id': page_id}, 'views')
+            ...
+            yield counters.close()
+
+        :rtype: sprockets.clients.dynamodb.counters.CounterBuffer
+
+        """
+        from . import counters
+        return counters.CounterBuffer(self, **kwargs)
+
+    def prepare_get_item(self, table_name, consistent_read=False,
+                         expression_attribute_names=None,
+                         projection_expression=None,
+                         return_consumed_capacity=None):
+        """Return a
+        :class:`~sprockets.clients.dynamodb.prepared.PreparedGetItem`
+        that is called with a key to retrieve an item.  The parameters
+        are the same as :meth:`get_item` and are encoded once.
+
+        .. code:: python
+
+            get_user = client.prepare_get_item('users')
+            user = yield get_user({'id': user_id})
+
+        .. note:: Prepared requests are always sent to DynamoDB, they are
+            neither combined by ``coalesce_reads`` nor served from the
+            ``item_cache``.
+
+        :rtype: sprockets.clients.dynamodb.prepared.PreparedGetItem
+
+        """
+        payload = {'TableName': table_name,
+                   'ConsistentRead': consistent_read}
+        if expression_attribute_names:
+            payload['ExpressionAttributeNames'] = expression_attribute_names
+        if projection_expression:
+            payload['ProjectionExpression'] = projection_expression
+        if return_consumed_capacity:
+            payload['ReturnConsumedCapacity'] = return_consumed_capacity
+        return prepared.PreparedGetItem(self, 'GetItem', payload)
+
+    def prepare_query(self, table_name, key_condition_expression,
+                      consistent_read=False, expression_attribute_names=None,
+                      filter_expression=None, projection_expression=None,
+                      index_name=None, return_consumed_capacity=None,
+                      scan_index_forward=True, select=None):
+        """Return a
+        :class:`~sprockets.clients.dynamodb.prepared.PreparedQuery` that
+        is called with the native values of the expression attribute
+        value placeholders to query a page.  The parameters are the same
+        as :meth:`query` and are encoded once.
+
+        .. code:: python
+
+            recent = client.prepare_query(
+                'events', 'id = :id AND ts > :ts', scan_index_forward=False)
+            result = yield recent({':id': user_id, ':ts': since})
+
+        :rtype: sprockets.clients.dynamodb.prepared.PreparedQuery
+
+        """
+        payload = {'TableName': table_name,
+                   'KeyConditionExpression': key_condition_expression,
+                   'ScanIndexForward': scan_index_forward}
+        if consistent_read:
+            payload['ConsistentRead'] = True
+        if expression_attribute_names:
+            payload['ExpressionAttributeNames'] = expression_attribute_names
+        if filter_expression:
+            payload['FilterExpression'] = filter_expression
+        if projection_expression:
+            payload['ProjectionExpression'] = projection_expression
+        if index_name:
+            payload['IndexName'] = index_name
+        if return_consumed_capacity:
+            payload['ReturnConsumedCapacity'] = return_consumed_capacity
+        if select:
+            payload['Select'] = select
+        return prepared.PreparedQuery(self, 'Query', payload)
+
+    def prepare_put_item(self, table_name, condition_expression=None,
+                         expression_attribute_names=None, return_values=None,
+                         return_consumed_capacity=None,
+                         return_item_collection_metrics=False):
+        """Return a
+        :class:`~sprockets.clients.dynamodb.prepared.PreparedPutItem`
+        that is called with an item to put it.  The parameters are the
+        same as :meth:`put_item` and are encoded once.
+
+        .. code:: python
+
+            create = client.prepare_put_item(
+                'users', condition_expression='attribute_not_exists(id)')
+            yield create({'id': user_id, 'name': name})
+
+        :rtype: sprockets.clients.dynamodb.prepared.PreparedPutItem
+
+        """
+        payload = {'TableName': table_name}
+        if condition_expression:
+            payload['ConditionExpression'] = condition_expression
+        if expression_attribute_names:
+            payload['ExpressionAttributeNames'] = expression_attribute_names
+        if return_consumed_capacity:
+            payload['ReturnConsumedCapacity'] = return_consumed_capacity
+        if return_item_collection_metrics:
+            payload['ReturnItemCollectionMetrics'] = 'SIZE'
+        if return_values:
+            payload['ReturnValues'] = return_values
+        return prepared.PreparedPutItem(self, 'PutItem', payload)
+
+    def _write_chunk(self, request_items, deadline):
+        """Write a chunk of marshalled write requests with a single
+        *BatchWriteItem* request, invalidating the cached items that it
+        writes.
+
+        :param dict request_items: the marshalled ``RequestItems``
+        :param float deadline: the IOLoop time to stop re-driving at
+        :returns: the marshalled write requests that were not processed
+        :rtype: tornado.concurrent.Future
+
+        """
+        if self._item_cache is not None:
+            return self._invalidate_writes(
+                request_items, self._batch_write_chunk(request_items,
+                                                       deadline))
+        return self._batch_write_chunk(request_items, deadline)
+
+    def _invalidate_writes(self, request_items, aws_response):
+        """Invalidate the cached items that are written by a
+        *BatchWriteItem* request while it is in flight and once it
+        completes.
+
+        :param dict request_items: the marshalled ``RequestItems``
+        :param tornado.concurrent.Future aws_response: the write result
+        :rtype: tornado.concurrent.Future
+
+        """
+        for table_name, requests in request_items.items():
+            attributes = self._item_cache.key_attributes(table_name)
+            if attributes is None:
+                continue
+            for request in requests:
+                if 'PutRequest' in request:
+                    values = request['PutRequest']['Item']
+                else:
+                    values = request['DeleteRequest']['Key']
+                key_dict = utils.unmarshall(
+                    dict((name, values[name]) for name in attributes
+                         if name in values))
+                self._write_through(table_name, key_dict, None,
+                                    aws_response)
+        return aws_response
+
+    @gen.coroutine
+    def _batch_write_chunk(self, request_items, deadline):
+        """Send a single *BatchWriteItem* request, re-driving the
+        ``UnprocessedItems`` until all of the writes have been processed
+        or the deadline has passed.
+
+        :param dict request_items: the marshalled ``RequestItems``
+        :param float deadline: the IOLoop time to stop re-driving at
+        :returns: the marshalled write requests that were not processed
+        :rtype: tornado.concurrent.Future
+
+        """
+        attempt = 0
+        while request_items:
+            if attempt:
+                delay = _backoff(attempt)
+                if ioloop.IOLoop.current().time() + delay > deadline:
+                    break
+                yield gen.sleep(delay)
+            result = yield self.execute('BatchWriteItem',
+                                        {'RequestItems': request_items})
+            request_items = result.get('UnprocessedItems')
+            attempt += 1
+        raise gen.Return(request_items or {})
 
     def query(self, table_name, consistent_read=False,
               exclusive_start_key=None, expression_attribute_names=None,
               expression_attribute_values=None, filter_expression=None,
-              projection_expression=None, index_name=None,limit=None,
+              projection_expression=None, index_name=None, limit=None,
               return_consumed_capacity=None, scan_index_forward=True,
-              select=None):
+              select=None, key_condition_expression=None):
         """A `Query`_ operation uses the primary key of a table or a secondary
         index to directly access items from that table or index.
 
@@ -1020,13 +2030,11 @@ class DynamoDB(object):
             you query a global secondary index with ``consistent_read`` set to
             ``True``, you will receive a
             :exc:`~tornado_dynamodb.exceptions.ValidationException`.
-        :param str|bytes|int exclusive_start_key: The primary key of the first
+        :param dict exclusive_start_key: The primary key of the first
             item that this operation will evaluate. Use the value that was
-            returned for ``LastEvaluatedKey`` in the previous operation. In a
-            parallel scan, a *Scan* request that includes
-            ``exclusive_start_key`` must specify the same segment whose
-            previous *Scan* returned the corresponding value of
-            ``LastEvaluatedKey``.
+            returned for ``LastEvaluatedKey`` in the previous operation.
+            This will be marshalled for you so a native :class:`dict`
+            works.
         :param dict expression_attribute_names: One or more substitution tokens
             for attribute names in an expression.
         :param dict expression_attribute_values: One or more values that can be
@@ -1105,7 +2113,20 @@ class DynamoDB(object):
                 ``ALL_ATTRIBUTES``.
               - ``COUNT``: Returns the number of matching items, rather than
                 the matching items themselves.
-        :rtype: dict
+        :param str key_condition_expression: The condition that specifies
+            the key values for the items to be retrieved.  It must perform
+            an equality test on the partition key and can test the sort key
+            with ``=``, ``<``, ``<=``, ``>``, ``>=``, ``BETWEEN``, or
+            ``begins_with``.
+        :rtype: tornado.concurrent.Future
+        :returns: The *Query* response with the ``Items`` unmarshalled.
+            ``LastEvaluatedKey`` is only present when there are more
+            results to retrieve.  It is a read-only
+            :class:`~sprockets.clients.dynamodb.utils.LazyItem` that keeps
+            the key in its marshalled form, so it is passed back as
+            ``exclusive_start_key`` without losing the precision of its
+            numbers.  See :meth:`query_iterator` to follow it
+            automatically.
 
         :raises: :exc:`~sprockets.clients.dynamodb.exceptions.DynamoDBException`
                  :exc:`~sprockets.clients.dynamodb.exceptions.ConfigNotFound`
@@ -1128,7 +2149,68 @@ class DynamoDB(object):
            latest/APIReference/API_Query.html
 
         """
-        raise NotImplementedError
+        payload = {'TableName': table_name,
+                   'ScanIndexForward': scan_index_forward}
+        if consistent_read:
+            payload['ConsistentRead'] = True
+        if key_condition_expression:
+            payload['KeyConditionExpression'] = key_condition_expression
+        if exclusive_start_key:
+            payload['ExclusiveStartKey'] = utils.marshall(exclusive_start_key)
+        if expression_attribute_names:
+            payload['ExpressionAttributeNames'] = expression_attribute_names
+        if expression_attribute_values:
+            payload['ExpressionAttributeValues'] = expression_attribute_values
+        if filter_expression:
+            payload['FilterExpression'] = filter_expression
+        if projection_expression:
+            payload['ProjectionExpression'] = projection_expression
+        if index_name:
+            payload['IndexName'] = index_name
+        if limit:
+            payload['Limit'] = limit
+        if return_consumed_capacity:
+            payload['ReturnConsumedCapacity'] = return_consumed_capacity
+        if select:
+            payload['Select'] = select
+        return self.execute('Query', payload)
+
+    def query_iterator(self, table_name, max_items=None, prefetch=1,
+                       **kwargs):
+        """
+        Return a :class:`~sprockets.clients.dynamodb.pagination.PageIterator`
+        over the results of a :meth:`query`, following the
+        ``LastEvaluatedKey`` of each page to request the next one.
+
+        .. code:: python
+
+            iterator = client.query_iterator(
+                'table', key_condition_expression='id = :id',
+                expression_attribute_values={':id': {'S': 'value'}},
+                limit=100, max_items=1000, prefetch=2)
+            while (yield iterator.fetch_next):
+                item = iterator.next_object()
+
+        :param str table_name: The name of the table containing the requested
+            items.
+        :param int max_items: optional maximum number of items to return
+        :param int prefetch: the number of pages to request ahead of the
+            caller while it processes the current page
+        :param kwargs: the :meth:`query` parameters.  ``limit`` sets the
+            number of items evaluated per page and
+            ``exclusive_start_key`` the key to start after.
+        :rtype: sprockets.clients.dynamodb.pagination.PageIterator
+
+        """
+        exclusive_start_key = kwargs.pop('exclusive_start_key', None)
+        page_size = kwargs.pop('limit', None)
+
+        def fetch(start_key, limit):
+            return self.query(table_name, exclusive_start_key=start_key,
+                              limit=limit, **kwargs)
+
+        return pagination.PageIterator(fetch, exclusive_start_key, page_size,
+                                       max_items, prefetch)
 
     def scan(self, table_name, consistent_read=False, exclusive_start_key=None,
              expression_attribute_names=None, expression_attribute_values=None,
@@ -1177,9 +2259,11 @@ class DynamoDB(object):
             scan a global secondary index and set ``consistent_read`` to
             ``true``, you will receive a
             :exc:`~tornado_dynamodb.exceptions.ValidationException`.
-        :param str|bytes|int exclusive_start_key: The primary key of the first
+        :param dict exclusive_start_key: The primary key of the first
             item that this operation will evaluate. Use the value that was
             returned for ``LastEvaluatedKey`` in the previous operation.
+            This will be marshalled for you so a native :class:`dict`
+            works.
 
             In a parallel scan, a *Scan* request that includes
             ``exclusive_start_key`` must specify the same segment whose
@@ -1268,7 +2352,12 @@ class DynamoDB(object):
 
             If you specify ``total_segments``, you must also specify
             ``segments``.
-        :rtype: dict
+        :rtype: tornado.concurrent.Future
+        :returns: The *Scan* response with the ``Items`` unmarshalled.
+            ``LastEvaluatedKey`` is a read-only
+            :class:`~sprockets.clients.dynamodb.utils.LazyItem` as
+            described in :meth:`query`.  See :meth:`parallel_scan` to scan
+            every segment of a table.
 
         :raises: :exc:`~sprockets.clients.dynamodb.exceptions.DynamoDBException`
                  :exc:`~sprockets.clients.dynamodb.exceptions.ConfigNotFound`
@@ -1291,27 +2380,537 @@ class DynamoDB(object):
            latest/APIReference/API_Scan.html
 
         """
-        raise NotImplementedError
+        payload = {'TableName': table_name}
+        if consistent_read:
+            payload['ConsistentRead'] = True
+        if exclusive_start_key:
+            payload['ExclusiveStartKey'] = utils.marshall(exclusive_start_key)
+        if expression_attribute_names:
+            payload['ExpressionAttributeNames'] = expression_attribute_names
+        if expression_attribute_values:
+            payload['ExpressionAttributeValues'] = expression_attribute_values
+        if filter_expression:
+            payload['FilterExpression'] = filter_expression
+        if projection_expression:
+            payload['ProjectionExpression'] = projection_expression
+        if index_name:
+            payload['IndexName'] = index_name
+        if limit:
+            payload['Limit'] = limit
+        if return_consumed_capacity:
+            payload['ReturnConsumedCapacity'] = return_consumed_capacity
+        if segment is not None:
+            payload['Segment'] = segment
+        if total_segments is not None:
+            payload['TotalSegments'] = total_segments
+        return self.execute('Scan', payload)
+
+    @gen.coroutine
+    def parallel_scan(self, table_name, total_segments=None,
+                      max_in_flight=SCAN_CONCURRENCY, max_buffered=None,
+                      segment_bytes=SCAN_SEGMENT_BYTES, segments=None,
+                      exclusive_start_keys=None, **kwargs):
+        """
+        Scan every segment of a table or index in parallel, merging the
+        pages of the segments into a single stream of items.
+
+        Each segment is paginated by following its ``LastEvaluatedKey``.
+        Pages are requested from the segments that are not already
+        waiting for a page, with at most ``max_in_flight`` requests in
+        flight and ``max_buffered`` pages in flight or waiting for the
+        caller, so memory use is bounded and a slow caller slows the
+        scan down.
+
+        .. code:: python
+
+            iterator = yield client.parallel_scan('table')
+            while (yield iterator.fetch_next):
+                item = iterator.next_object()
+
+        :param str table_name: The name of the table to scan.
+        :param int total_segments: The number of segments to divide the
+            table into.  When unspecified, it is chosen from the size of
+            the table or index reported by :meth:`describe_table`, with a
+            segment for every ``segment_bytes``.
+        :param int max_in_flight: The maximum number of *Scan* requests to
+            have in flight at the same time.
+        :param int max_buffered: The maximum number of pages that are in
+            flight or waiting for the caller.  Defaults to twice
+            ``max_in_flight``.
+        :param int segment_bytes: The number of bytes per segment when the
+            segment count is chosen automatically.
+        :param list segments: optional subset of the segment numbers to
+            scan, in the order of the returned iterators
+        :param dict exclusive_start_keys: optional ``LastEvaluatedKey`` to
+            resume each segment after, by segment number
+        :param kwargs: the :meth:`scan` parameters.  ``limit`` sets the
+            number of items evaluated per page.
+        :rtype: tornado.concurrent.Future
+        :returns: a
+            :class:`~sprockets.clients.dynamodb.pagination.MergedIterator`
+            with a
+            :class:`~sprockets.clients.dynamodb.pagination.PageIterator`
+            per segment
+
+        :raises:
+            :exc:`~sprockets.clients.dynamodb.exceptions.DynamoDBException`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ConfigNotFound`
+            :exc:`~sprockets.clients.dynamodb.exceptions.NoCredentialsError`
+            :exc:`~sprockets.clients.dynamodb.exceptions.NoProfileError`
+            :exc:`~sprockets.clients.dynamodb.exceptions.TimeoutException`
+            :exc:`~sprockets.clients.dynamodb.exceptions.RequestException`
+            :exc:`~sprockets.clients.dynamodb.exceptions.InternalFailure`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ResourceNotFound`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ServiceUnavailable`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ThroughputExceeded`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ValidationException`
+
+        """
+        if total_segments is None:
+            table = yield self.describe_table(table_name)
+            total_segments = _segment_count(table, kwargs.get('index_name'),
+                                            segment_bytes)
+        if segments is None:
+            segments = range(total_segments)
+        exclusive_start_keys = exclusive_start_keys or {}
+        page_size = kwargs.pop('limit', None)
+        iterators = [
+            pagination.PageIterator(
+                functools.partial(self._scan_segment, table_name, segment,
+                                  total_segments, kwargs),
+                exclusive_start_keys.get(segment), page_size, prefetch=0)
+            for segment in segments]
+        raise gen.Return(pagination.MergedIterator(iterators, max_in_flight,
+                                                   max_buffered))
+
+    def _scan_segment(self, table_name, segment, total_segments, kwargs,
+                      exclusive_start_key, limit):
+        """Request a page of a segment for a :meth:`parallel_scan`."""
+        return self.scan(table_name, exclusive_start_key=exclusive_start_key,
+                         limit=limit, segment=segment,
+                         total_segments=total_segments, **kwargs)
+
+    @gen.coroutine
+    def process_scan(self, table_name, total_segments=None, processes=None,
+                     reducer=None, pages_per_task=10, max_buffered=None,
+                     segment_bytes=SCAN_SEGMENT_BYTES, segments=None,
+                     exclusive_start_keys=None, **kwargs):
+        """
+        Scan every segment of a table or index in a pool of worker
+        processes so that decoding and unmarshalling the pages uses more
+        than one CPU core.
+
+        Each worker runs its own :class:`~tornado.ioloop.IOLoop` and
+        client, created with the connection arguments of this client.
+        The limiters, caches, and retry policy of this client are not
+        shared with the workers.  The items of each task, or the output
+        of the ``reducer`` for them, are returned by the
+        :meth:`~sprockets.clients.dynamodb.multiprocess.ProcessScan.next_page`
+        of the returned iterator in the order they arrive.
+
+        .. code:: python
+
+            scan = yield client.process_scan('table', processes=4)
+            while (yield scan.fetch_next):
+                item = scan.next_object()
+
+        :param str table_name: The name of the table to scan.
+        :param int total_segments: The number of segments to divide the
+            table into.  When unspecified, it is chosen from the size of
+            the table or index reported by :meth:`describe_table`, with a
+            segment for every ``segment_bytes``.
+        :param int processes: The number of worker processes.  Defaults to
+            the number of CPUs.
+        :param callable reducer: Optional module level function that is
+            called in the worker with the items of each task.  Its
+            picklable return value is sent to the caller instead of the
+            items.
+        :param int pages_per_task: The number of pages a task reads from a
+            segment before returning them.
+        :param int max_buffered: The maximum number of tasks that are
+            running or waiting for the caller.  Defaults to twice
+            ``processes``.
+        :param int segment_bytes: The number of bytes per segment when the
+            segment count is chosen automatically.
+        :param list segments: optional subset of the segment numbers to
+            scan
+        :param dict exclusive_start_keys: optional ``LastEvaluatedKey`` to
+            resume each segment after, by segment number
+        :param kwargs: the :meth:`scan` parameters
+        :rtype: tornado.concurrent.Future
+        :returns: a
+            :class:`~sprockets.clients.dynamodb.multiprocess.ProcessScan`
+
+        :raises:
+            :exc:`~sprockets.clients.dynamodb.exceptions.DynamoDBException`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ConfigNotFound`
+            :exc:`~sprockets.clients.dynamodb.exceptions.NoCredentialsError`
+            :exc:`~sprockets.clients.dynamodb.exceptions.NoProfileError`
+            :exc:`~sprockets.clients.dynamodb.exceptions.TimeoutException`
+            :exc:`~sprockets.clients.dynamodb.exceptions.RequestException`
+            :exc:`~sprockets.clients.dynamodb.exceptions.InternalFailure`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ResourceNotFound`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ServiceUnavailable`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ThroughputExceeded`
+            :exc:`~sprockets.clients.dynamodb.exceptions.ValidationException`
+
+        """
+        from . import multiprocess
+        if total_segments is None:
+            table = yield self.describe_table(table_name)
+            total_segments = _segment_count(table, kwargs.get('index_name'),
+                                            segment_bytes)
+        raise gen.Return(multiprocess.ProcessScan(
+            self._args, table_name, total_segments, processes, reducer,
+            pages_per_task, max_buffered, segments, exclusive_start_keys,
+            kwargs))
+
+    def export(self, table_name, path, checkpoint_path=None,
+               total_segments=None, interval=30.0, marshalled=False,
+               processes=None, **kwargs):
+        """
+        Export every item of a table to a `JSON Lines`_ file with a
+        :meth:`parallel_scan`, one item per line.
+
+        The ``LastEvaluatedKey`` of each segment is saved to the
+        checkpoint file every ``interval`` seconds, after the items that
+        were read before it are written to disk.  When the checkpoint
+        file exists, the export resumes from it: the output file is
+        truncated to the length recorded in the checkpoint, finished
+        segments are skipped, and the other segments resume after their
+        saved key.  The checkpoint file is removed once the export
+        completes.
+
+        The export is also available from the command line with
+        ``python -m sprockets.clients.dynamodb.export``.
+
+        :param str table_name: The name of the table to export.
+        :param str path: The file to write the items to.
+        :param str checkpoint_path: The checkpoint file.  Defaults to
+            ``path`` with a ``.checkpoint`` suffix.
+        :param int total_segments: The number of segments to scan.
+            Chosen from the table size when unspecified and taken from
+            the checkpoint when resuming.
+        :param float interval: The number of seconds between checkpoints.
+        :param bool marshalled: Write the items as DynamoDB
+            ``AttributeValue`` maps.  By default items are written as
+            plain JSON with sets as lists and binary values as base64
+            strings.
+        :param int processes: Scan the table with :meth:`process_scan` in
+            this many worker processes instead of with
+            :meth:`parallel_scan`.
+        :param kwargs: the :meth:`parallel_scan` or :meth:`process_scan`
+            parameters
+        :rtype: tornado.concurrent.Future
+        :returns: the number of items written
+
+        :raises: :exc:`ValueError`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.DynamoDBException`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.ConfigNotFound`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.NoCredentialsError`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.NoProfileError`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.TimeoutException`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.RequestException`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.InternalFailure`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.ResourceNotFound`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.ServiceUnavailable`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.ThroughputExceeded`
+                 :exc:`~sprockets.clients.dynamodb.exceptions.ValidationException`
+
+        .. _JSON Lines: http://jsonlines.org/
+
+        """
+        from . import export
+        return export.export(self, table_name, path, checkpoint_path,
+                             total_segments, interval, marshalled,
+                             processes, **kwargs)
 
     @staticmethod
     def _process_response(response):
         error = response.exception()
         if error:
             if isinstance(error, aws_exceptions.AWSError):
-                if error.args[1]['type'] in exceptions.MAP:
-                    raise exceptions.MAP[error.args[1]['type']](
-                        error.args[1]['message'])
+                error_type = error.args[1]['type']
+                exception_class = exceptions.MAP.get(
+                    error_type, exceptions.MAP_BY_NAME.get(
+                        error_type.rpartition('#')[2]))
+                if exception_class is not None:
+                    raise exception_class(error.args[1]['message'])
             raise error
         http_response = response.result()
         if not http_response or not http_response.body:
             raise exceptions.DynamoDBException('empty response')
-        return json.loads(http_response.body.decode('utf-8'))
+        return http_response.body
+
+
+def _decode_response(function, body, json_codec, lazy=False, stream=False):
+    """Decode a response body, unmarshalling the items of the
+    ``GetItem``, ``Query``, and ``Scan`` functions or wrapping them in
+    :class:`~sprockets.clients.dynamodb.utils.LazyItem` when ``lazy`` is
+    set.  The ``Query`` and ``Scan`` items are returned as a
+    :class:`~sprockets.clients.dynamodb.streaming.ItemStream` when
+    ``stream`` is set.  The ``LastEvaluatedKey`` is always a
+    :class:`~sprockets.clients.dynamodb.utils.LazyItem` so that it is
+    sent back exactly as DynamoDB returned it, since numbers with a
+    fraction lose precision when they are unmarshalled to a
+    :class:`float`.
+
+    """
+    if stream and function in ('Query', 'Scan'):
+        result = streaming.parse_page(body, json_codec, lazy)
+        if 'LastEvaluatedKey' in result:
+            result['LastEvaluatedKey'] = utils.LazyItem(
+                result['LastEvaluatedKey'])
+        return result
+    result = json_codec.loads(body)
+    if function == 'GetItem' and 'Item' in result:
+        result['Item'] = (utils.LazyItem(result['Item']) if lazy else
+                          utils.unmarshall(result['Item']))
+    elif function in ('Query', 'Scan'):
+        items = result.get('Items', [])
+        result['Items'] = ([utils.LazyItem(item) for item in items]
+                           if lazy else utils.unmarshall_many(items))
+        if 'LastEvaluatedKey' in result:
+            result['LastEvaluatedKey'] = utils.LazyItem(
+                result['LastEvaluatedKey'])
+    return result
+
+
+def _http_exception(error):
+    """Return the exception to raise for an HTTP error that did not
+    include an AWS error.  Timeouts and ``5xx`` responses are mapped to
+    the exceptions that the retry policy retries.
+
+    :param tornado.httpclient.HTTPError error: the HTTP error
+    :rtype: sprockets.clients.dynamodb.exceptions.DynamoDBException
+
+    """
+    if error.code == 599:
+        return exceptions.TimeoutException()
+    reason = str(error.code)
+    if error.response and hasattr(error.response, 'body'):
+        reason = error.response.body
+    if error.code >= 500:
+        return exceptions.ServerError(reason)
+    return exceptions.RequestException(reason)
+
+
+def _headers(function):
+    """Return the request headers of a DynamoDB function.  The headers
+    are created once per function and shared by its requests, since the
+    AWS client copies them before signing.
+
+    :param str function: DynamoDB function to invoke
+    :rtype: dict
+
+    """
+    try:
+        return _HEADERS[function]
+    except KeyError:
+        headers = _HEADERS[function] = {
+            'x-amz-target': 'DynamoDB_20120810.{}'.format(function),
+            'Content-Type': 'application/x-amz-json-1.0',
+        }
+        return headers
+
+
+def _is_idempotent(function, body):
+    """Return :data:`True` if sending the request again after it was
+    applied leaves the table as if it was sent once, with the same result.
+
+    :param str function: DynamoDB function to invoke
+    :param dict body: the body to send
+    :rtype: bool
+
+    """
+    if function == 'UpdateItem':
+        return False
+    if function in CONDITIONAL_FUNCTIONS:
+        return 'ConditionExpression' not in body
+    return True
 
 
 def _unwrap_result(function, result):
-    if result:
-        if function == 'GetItem':
-            return utils.unmarshall(result['Item'])
-        if function == 'Query':
-            return [utils.unmarshall(item) for item in result['Items']]
+    if result and function == 'GetItem':
+        return result['Item']
     return result
+
+
+def _segment_count(table, index_name, segment_bytes):
+    """Return the number of parallel *Scan* segments for a table or index
+    with a segment for every `segment_bytes`.
+
+    :param dict table: the table description
+    :param str index_name: the index that is scanned, if any
+    :param int segment_bytes: the number of bytes per segment
+    :rtype: int
+
+    """
+    size = table.get('TableSizeBytes', 0)
+    if index_name:
+        for index in (table.get('GlobalSecondaryIndexes', []) +
+                      table.get('LocalSecondaryIndexes', [])):
+            if index['IndexName'] == index_name:
+                size = index.get('IndexSizeBytes', 0)
+    segments = -(-size // segment_bytes)
+    return int(max(1, min(MAX_SCAN_SEGMENTS, segments)))
+
+
+def _backoff(attempt):
+    """Return a randomized delay for the specified retry attempt using
+    capped exponential backoff with full jitter.
+
+    :param int attempt: the number of attempts that have been made
+    :rtype: float
+
+    """
+    return random.uniform(
+        0, min(BATCH_BACKOFF_CAP, BATCH_BACKOFF_BASE * (2 ** attempt)))
+
+
+def _chunk(pending, size):
+    """Split a list of ``(table_name, value)`` tuples into chunks of at
+    most `size` values, grouping each chunk's values by table name.
+
+    :param list pending: the values to split
+    :param int size: the maximum number of values in a chunk
+    :rtype: list
+
+    """
+    chunks = []
+    for offset in range(0, len(pending), size):
+        chunk = {}
+        for table_name, value in pending[offset:offset + size]:
+            chunk.setdefault(table_name, []).append(value)
+        chunks.append(chunk)
+    return chunks
+
+
+def _marshall_write_request(request):
+    """Marshall the item or key in a *BatchWriteItem* write request.
+
+    :param dict request: the write request with native values
+    :rtype: dict
+
+    """
+    if 'PutRequest' in request:
+        return {'PutRequest': {
+            'Item': utils.marshall(request['PutRequest']['Item'])}}
+    elif 'DeleteRequest' in request:
+        return {'DeleteRequest': {
+            'Key': utils.marshall(request['DeleteRequest']['Key'])}}
+    raise ValueError('Unsupported write request: %r' % request)
+
+
+def _write_key(request, attributes):
+    """Return a hashable representation of the key of the item that a
+    marshalled *BatchWriteItem* write request writes.
+
+    :param dict request: the marshalled write request
+    :param list attributes: the key attribute names
+    :rtype: tuple
+    :raises: :exc:`ValueError`
+
+    """
+    if 'PutRequest' in request:
+        values = request['PutRequest']['Item']
+    else:
+        values = request['DeleteRequest']['Key']
+    try:
+        return tuple(tuple(values[name].items())[0] for name in attributes)
+    except KeyError as error:
+        raise ValueError('Missing key attribute {}'.format(error))
+
+
+def _unmarshall_write_request(request):
+    """Unmarshall the item or key in a *BatchWriteItem* write request.
+
+    :param dict request: the write request with AttributeValue values
+    :rtype: dict
+
+    """
+    if 'PutRequest' in request:
+        return {'PutRequest': {
+            'Item': utils.unmarshall(request['PutRequest']['Item'])}}
+    return {'DeleteRequest': {
+        'Key': utils.unmarshall(request['DeleteRequest']['Key'])}}
+
+
+@gen.coroutine
+def _process_chunks(chunks, process, max_concurrency):
+    """Invoke the `process` coroutine for each chunk, keeping at most
+    `max_concurrency` invocations in flight at the same time.
+
+    :param list chunks: the chunks to process
+    :param callable process: coroutine that processes a single chunk
+    :param int max_concurrency: the maximum number of chunks in flight
+    :rtype: tornado.concurrent.Future
+
+    """
+    chunks = list(reversed(chunks))
+
+    @gen.coroutine
+    def worker():
+        while chunks:
+            yield process(chunks.pop())
+
+    yield [worker() for _ in range(min(max_concurrency, len(chunks)))]
+
+
+def _project_key_attributes(options, attributes):
+    """Ensure that a *BatchGetItem* ``ProjectionExpression`` includes the
+    key attributes, returning the updated table options.  Attributes
+    that are already projected are not added again, and the added
+    attributes use placeholders that the caller's names do not use.
+
+    :param dict options: the per-table request options
+    :param list attributes: the key attribute names
+    :rtype: dict
+
+    """
+    if not options.get('ProjectionExpression'):
+        return options
+    options = dict(options)
+    names = dict(options.get('ExpressionAttributeNames') or {})
+    projection = [options['ProjectionExpression']]
+    projected = set(names.get(path.strip(), path.strip())
+                    for path in projection[0].split(','))
+    offset = 0
+    for attribute in attributes:
+        if attribute in projected:
+            continue
+        while '#pk{}'.format(offset) in names:
+            offset += 1
+        placeholder = '#pk{}'.format(offset)
+        names[placeholder] = attribute
+        projection.append(placeholder)
+    options['ProjectionExpression'] = ','.join(projection)
+    options['ExpressionAttributeNames'] = names
+    return options
+
+
+class _ClientView(DynamoDB):
+    """A :class:`DynamoDB` client that overrides some attributes of the
+    client that it was created from, such as the priority class of its
+    requests.  Every other attribute is read from and written to the
+    shared client.
+
+    :param DynamoDB client: the client or view to share
+    :param attributes: the attributes to override, in addition to the
+        overrides of the view that the view is created from
+
+    """
+
+    def __init__(self, client, **attributes):
+        overrides = dict(getattr(client, '_overrides', {}))
+        overrides.update(attributes)
+        object.__setattr__(self, '_shared', getattr(client, '_shared', client))
+        object.__setattr__(self, '_overrides', overrides)
+        for name, value in overrides.items():
+            object.__setattr__(self, name, value)
+
+    def __getattr__(self, name):
+        return getattr(self._shared, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._shared, name, value)
@@ -0,0 +1,169 @@
+"""
+Counter Aggregation
+===================
+
+Incrementing a counter attribute with an *UpdateItem* request per event
+turns every event into a write.  :class:`CounterBuffer` sums the
+increments of each item in memory instead and writes the totals with a
+single ``ADD`` *UpdateItem* request per item every ``flush_interval``
+seconds, so the counters are at most ``flush_interval`` seconds behind
+and a hot counter costs one write per interval.
+
+.. code:: python
+
+    counters = client.counter_buffer(flush_interval=5)
+    counters.increment('pages', {'id': page_id}, 'views')
+    ...
+    yield counters.close()
+
+The buffered increments are flushed early when more than ``max_keys``
+items have pending increments, which bounds the memory that is used.
+:meth:`~CounterBuffer.close` flushes the remaining increments, so call
+it when the application shuts down.
+
+``ADD`` updates are not idempotent: an update that timed out or lost
+its connection may still have been applied, and sending it again would
+count its increments twice.  The updates are therefore sent with
+:meth:`~sprockets.clients.dynamodb.retry.RetryPolicy.rejected_only`,
+a copy of the client's retry policy that only retries the throttling
+errors that DynamoDB raises before it applies a request.  An update
+that fails otherwise is passed to the ``failure_callback`` or logged,
+and is not retried.
+
+"""
+import logging
+
+from tornado import concurrent, gen, ioloop
+
+from . import connector, expressions, utils
+
+LOGGER = logging.getLogger(__name__)
+
+#: Default number of seconds that increments are buffered for
+FLUSH_INTERVAL = 1.0
+
+#: Default number of items with pending increments that triggers a flush
+MAX_KEYS = 10000
+
+
+class CounterBuffer(object):
+    """
+    Sums counter increments per item and attribute, writing them as
+    ``ADD`` updates.
+
+    :param client: the :class:`~sprockets.clients.dynamodb.DynamoDB`
+        client to write with
+    :param float flush_interval: the maximum number of seconds that an
+        increment is buffered for
+    :param int max_keys: the number of items with pending increments
+        above which they are flushed without waiting for the interval
+    :param int max_in_flight: the maximum number of *UpdateItem*
+        requests to have in flight at the same time
+    :param callable failure_callback: optional function that is called
+        with the table name, key, the increments by attribute name, and
+        the exception of each update that failed
+
+    :ivar int increments: the number of increments that were buffered
+    :ivar int updates: the number of *UpdateItem* requests that were sent
+
+    """
+
+    def __init__(self, client, flush_interval=FLUSH_INTERVAL,
+                 max_keys=MAX_KEYS, max_in_flight=connector.BATCH_CONCURRENCY,
+                 failure_callback=None):
+        policy = client._retry_policy
+        self._client = client.with_retry_policy(
+            None if policy is None else policy.rejected_only())
+        self._flush_interval = flush_interval
+        self._max_keys = max_keys
+        self._max_in_flight = max_in_flight
+        self._failure_callback = failure_callback
+        self._pending = {}
+        self._flushes = set()
+        self._timer = None
+        self._closed = False
+        self.increments = 0
+        self.updates = 0
+
+    def __len__(self):
+        return len(self._pending)
+
+    def increment(self, table_name, key, attribute, amount=1):
+        """Add ``amount`` to a counter attribute of an item.
+
+        :param str table_name: the table of the item
+        :param dict key: the primary key of the item
+        :param str attribute: the name of the counter attribute
+        :param amount: the number to add, which may be negative
+        :raises: :exc:`RuntimeError` when the buffer is closed
+
+        """
+        if self._closed:
+            raise RuntimeError('CounterBuffer is closed')
+        pending_key = (table_name, utils.primary_key(key))
+        if pending_key not in self._pending:
+            self._pending[pending_key] = (key, {})
+        amounts = self._pending[pending_key][1]
+        amounts[attribute] = amounts.get(attribute, 0) + amount
+        self.increments += 1
+        if len(self._pending) > self._max_keys:
+            self.flush()
+        elif self._timer is None:
+            self._timer = ioloop.IOLoop.current().call_later(
+                self._flush_interval, self.flush)
+
+    def flush(self):
+        """Write the buffered increments.
+
+        :returns: a future that resolves once the increments were
+            written
+        :rtype: tornado.concurrent.Future
+
+        """
+        if self._timer is not None:
+            ioloop.IOLoop.current().remove_timeout(self._timer)
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if not pending:
+            future = concurrent.TracebackFuture()
+            future.set_result(None)
+            return future
+        future = connector._process_chunks(
+            [(table_name, key, amounts)
+             for (table_name, _key), (key, amounts) in pending.items()],
+            self._update, self._max_in_flight)
+        self._flushes.add(future)
+        future.add_done_callback(self._flushes.discard)
+        return future
+
+    @gen.coroutine
+    def close(self):
+        """Stop accepting increments and write the buffered ones,
+        resolving once every flush completed.
+
+        """
+        self._closed = True
+        self.flush()
+        yield list(self._flushes)
+
+    @gen.coroutine
+    def _update(self, update):
+        """Write the increments of an item with an ``ADD`` update."""
+        table_name, key, amounts = update
+        amounts = dict((attribute, amount)
+                       for attribute, amount in amounts.items() if amount)
+        if not amounts:
+            return
+        self.updates += 1
+        try:
+            yield self._client.update_item(
+                table_name, key, **expressions.update(add=amounts))
+        except Exception as error:
+            if self._failure_callback is None:
+                LOGGER.error('Failed to add %r to %s %r: %r',
+                             amounts, table_name, key, error)
+            else:
+                try:
+                    self._failure_callback(table_name, key, amounts, error)
+                except Exception:
+                    LOGGER.exception('Error in failure callback')
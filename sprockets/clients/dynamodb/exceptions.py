@@ -143,6 +143,22 @@ class RequestException(DynamoDBException):
     pass
 
 
+class ConnectionFailure(RequestException):
+    """The connection to DynamoDB failed or was reset before a response was
+    received.
+
+    """
+    pass
+
+
+class ServerError(RequestException):
+    """DynamoDB responded with an HTTP ``5xx`` status code that did not
+    include an AWS error.
+
+    """
+    pass
+
+
 class RequestExpired(DynamoDBException):
     """The request reached the service more than 15 minutes after the date
     stamp on the request or more than 15 minutes after the request expiration
@@ -205,13 +221,22 @@ MAP = {
     'com.amazonaws.dynamodb.v20120810#ItemCollectionSizeLimitExceededException':
     ItemCollectionSizeLimitExceeded,
     'com.amazonaws.dynamodb.v20120810#InternalFailure': InternalFailure,
+    'com.amazonaws.dynamodb.v20120810#InternalServerError': InternalFailure,
     'com.amazonaws.dynamodb.v20120810#LimitExceededException': LimitExceeded,
     'com.amazonaws.dynamodb.v20120810#ProvisionedThroughputExceededException':
     ThroughputExceeded,
     'com.amazonaws.dynamodb.v20120810#ResourceInUseException': ResourceInUse,
     'com.amazonaws.dynamodb.v20120810#ResourceNotFoundException':
     ResourceNotFound,
+    'com.amazonaws.dynamodb.v20120810#ServiceUnavailable': ServiceUnavailable,
+    'com.amazonaws.dynamodb.v20120810#ServiceUnavailableException':
+    ServiceUnavailable,
     'com.amazonaws.dynamodb.v20120810#ThrottlingException':
     ThrottlingException,
     'com.amazon.coral.validate#ValidationException': ValidationException
 }
+
+#: The exception classes of :data:`MAP` by the error name after the ``#``,
+#: for errors that are returned with another namespace
+MAP_BY_NAME = dict((error_type.rpartition('#')[2], exception_class)
+                   for error_type, exception_class in MAP.items())
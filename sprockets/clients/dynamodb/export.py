@@ -0,0 +1,321 @@
+"""
+Table Export
+============
+
+Exports every item in a table to a `JSON Lines`_ file with a parallel
+*Scan*, checkpointing the progress of each segment so that an export
+that is interrupted resumes where it stopped instead of starting over.
+
+The checkpoint file records the ``LastEvaluatedKey`` of the last page
+of each segment that was written and the size of the output file at
+that point.  When an export is resumed the output file is truncated to
+that size, finished segments are skipped, and the other segments resume
+after their recorded key, so every item is written exactly once.  The
+checkpoint file is removed once the export completes.
+
+Exports can be started with :meth:`~sprockets.clients.dynamodb.DynamoDB.export`
+or from the command line::
+
+    python -m sprockets.clients.dynamodb.export my-table my-table.jsonl
+
+.. _JSON Lines: http://jsonlines.org/
+
+"""
+import argparse
+import base64
+import json
+import logging
+import os
+import sys
+
+from tornado import gen, ioloop
+
+from . import connector, utils
+
+LOGGER = logging.getLogger(__name__)
+
+#: Default number of seconds between checkpoints
+CHECKPOINT_INTERVAL = 30.0
+
+#: Version of the checkpoint file format
+CHECKPOINT_VERSION = 1
+
+
+class Checkpoint(object):
+    """
+    The progress of an export that is saved to a local file.
+
+    :param str path: the file the checkpoint is saved to
+    :param str table_name: the table that is exported
+    :param int total_segments: the number of segments the table is
+        scanned in
+
+    :ivar int offset: the size of the output file when the checkpoint
+        was taken
+    :ivar dict positions: the ``LastEvaluatedKey`` of each segment that
+        has started, by segment number.  The keys are saved in their
+        marshalled form and loaded as
+        :class:`~sprockets.clients.dynamodb.utils.LazyItem` instances so
+        that their numbers are resumed from without losing precision.
+    :ivar set finished: the segments that have been completely written
+
+    """
+
+    def __init__(self, path, table_name, total_segments):
+        self.path = path
+        self.table_name = table_name
+        self.total_segments = total_segments
+        self.offset = 0
+        self.positions = {}
+        self.finished = set()
+
+    @classmethod
+    def load(cls, path):
+        """Load a checkpoint from a file, returning :data:`None` if the
+        file does not exist.
+
+        :param str path: the file to load the checkpoint from
+        :rtype: Checkpoint
+        :raises: :exc:`ValueError`
+
+        """
+        try:
+            with open(path) as handle:
+                data = json.load(handle)
+        except IOError as error:
+            if not os.path.exists(path):
+                return None
+            raise error
+        if data.get('version') != CHECKPOINT_VERSION:
+            raise ValueError('Unsupported checkpoint version in {}'.format(
+                path))
+        checkpoint = cls(path, data['table_name'], data['total_segments'])
+        checkpoint.offset = data['offset']
+        checkpoint.positions = dict(
+            (int(segment), utils.LazyItem(key))
+            for segment, key in data['positions'].items())
+        checkpoint.finished = set(data['finished'])
+        return checkpoint
+
+    @property
+    def remaining(self):
+        """The segments that have not been completely written.
+
+        :rtype: list
+
+        """
+        return [segment for segment in range(self.total_segments)
+                if segment not in self.finished]
+
+    def save(self):
+        """Write the checkpoint to its file, replacing the previous
+        checkpoint atomically.
+
+        """
+        data = {'version': CHECKPOINT_VERSION,
+                'table_name': self.table_name,
+                'total_segments': self.total_segments,
+                'offset': self.offset,
+                'positions': dict((str(segment), utils.marshall(key))
+                                  for segment, key in self.positions.items()
+                                  if key is not None),
+                'finished': sorted(self.finished)}
+        temporary = '{}.tmp'.format(self.path)
+        with open(temporary, 'w') as handle:
+            json.dump(data, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.rename(temporary, self.path)
+
+    def remove(self):
+        """Remove the checkpoint file."""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+@gen.coroutine
+def export(client, table_name, path, checkpoint_path=None,
+           total_segments=None, interval=CHECKPOINT_INTERVAL,
+           marshalled=False, processes=None, **kwargs):
+    """
+    Export the items of a table to a JSON Lines file, resuming from the
+    checkpoint file if it exists.
+
+    :param client: the client to scan the table with
+    :type client: sprockets.clients.dynamodb.DynamoDB
+    :param str table_name: the table to export
+    :param str path: the file to write the items to
+    :param str checkpoint_path: the checkpoint file.  Defaults to
+        ``path`` with a ``.checkpoint`` suffix.
+    :param int total_segments: the number of segments to scan.  Chosen
+        from the table size when unspecified and taken from the
+        checkpoint when resuming.
+    :param float interval: the number of seconds between checkpoints
+    :param bool marshalled: write the items as DynamoDB
+        ``AttributeValue`` maps instead of plain JSON.  Plain JSON
+        writes sets as lists and binary values as base64 strings.
+    :param int processes: scan the table with
+        :meth:`~sprockets.clients.dynamodb.DynamoDB.process_scan` in this
+        many worker processes instead of with
+        :meth:`~sprockets.clients.dynamodb.DynamoDB.parallel_scan`
+    :param kwargs: the
+        :meth:`~sprockets.clients.dynamodb.DynamoDB.parallel_scan` or
+        :meth:`~sprockets.clients.dynamodb.DynamoDB.process_scan`
+        parameters
+    :returns: the number of items written by this invocation
+    :rtype: int
+    :raises: :exc:`ValueError` when the checkpoint is for another table
+        or the output file is shorter than the checkpoint
+
+    """
+    checkpoint_path = checkpoint_path or '{}.checkpoint'.format(path)
+    checkpoint = Checkpoint.load(checkpoint_path)
+    if checkpoint is None:
+        if total_segments is None:
+            table = yield client.describe_table(table_name)
+            total_segments = connector._segment_count(
+                table, kwargs.get('index_name'),
+                kwargs.pop('segment_bytes', connector.SCAN_SEGMENT_BYTES))
+        checkpoint = Checkpoint(checkpoint_path, table_name, total_segments)
+        checkpoint.save()
+        handle = open(path, 'w')
+    elif checkpoint.table_name != table_name:
+        raise ValueError('{} is a checkpoint for {}'.format(
+            checkpoint_path, checkpoint.table_name))
+    else:
+        handle = open(path, 'r+')
+        handle.seek(0, os.SEEK_END)
+        if handle.tell() < checkpoint.offset:
+            handle.close()
+            raise ValueError('{} is shorter than its checkpoint'.format(path))
+        handle.truncate(checkpoint.offset)
+        handle.seek(checkpoint.offset)
+        LOGGER.info('Resuming the export of %s with %i of %i segments '
+                    'remaining', table_name, len(checkpoint.remaining),
+                    checkpoint.total_segments)
+
+    io_loop = ioloop.IOLoop.current()
+    written = 0
+    with handle:
+        segments = checkpoint.remaining
+        if processes:
+            kwargs.pop('max_in_flight', None)
+            iterator = yield client.process_scan(
+                table_name, total_segments=checkpoint.total_segments,
+                processes=processes, segments=segments,
+                exclusive_start_keys=checkpoint.positions, **kwargs)
+        else:
+            iterator = yield client.parallel_scan(
+                table_name, total_segments=checkpoint.total_segments,
+                segments=segments, exclusive_start_keys=checkpoint.positions,
+                **kwargs)
+        saved = io_loop.time()
+        while True:
+            page = yield iterator.next_page()
+            if page is None:
+                break
+            written += len(page)
+            handle.writelines(_encode(item, marshalled) for item in page)
+            if io_loop.time() - saved >= interval:
+                _update(checkpoint, handle, segments, iterator)
+                checkpoint.save()
+                saved = io_loop.time()
+                LOGGER.debug('Checkpointed %s after %i items', table_name,
+                             written)
+        handle.flush()
+        os.fsync(handle.fileno())
+    checkpoint.remove()
+    raise gen.Return(written)
+
+
+def _update(checkpoint, handle, segments, iterator):
+    """Record the progress of the segments once the items that were
+    written for them are on disk.
+
+    """
+    handle.flush()
+    os.fsync(handle.fileno())
+    checkpoint.offset = handle.tell()
+    if isinstance(iterator.positions, dict):
+        checkpoint.positions.update(iterator.positions)
+        checkpoint.finished.update(iterator.finished)
+        return
+    for index, segment in enumerate(segments):
+        checkpoint.positions[segment] = iterator.positions[index]
+        if index in iterator.finished:
+            checkpoint.finished.add(segment)
+
+
+def _encode(item, marshalled):
+    if marshalled:
+        return json.dumps(utils.marshall(item), sort_keys=True) + '\n'
+    return json.dumps(item, default=_json_default, sort_keys=True) + '\n'
+
+
+def _json_default(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    elif isinstance(value, utils.LazyItem):
+        return dict(value)
+    elif isinstance(value, utils.LazyList):
+        return list(value)
+    elif isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode('ascii')
+    raise TypeError('{!r} is not JSON serializable'.format(value))
+
+
+def main(args=None):
+    """Export a table from the command line."""
+    parser = argparse.ArgumentParser(
+        prog='python -m sprockets.clients.dynamodb.export',
+        description='Export the items in a DynamoDB table to a JSON Lines '
+                    'file, resuming an interrupted export when its '
+                    'checkpoint file exists.')
+    parser.add_argument('table', help='the table to export')
+    parser.add_argument('output', help='the file to write the items to')
+    parser.add_argument('--checkpoint',
+                        help='the checkpoint file '
+                             '(default: OUTPUT.checkpoint)')
+    parser.add_argument('--segments', type=int,
+                        help='the number of segments to scan in parallel '
+                             '(default: from the table size)')
+    parser.add_argument('--max-in-flight', type=int,
+                        default=connector.SCAN_CONCURRENCY,
+                        help='the maximum number of Scan requests in flight')
+    parser.add_argument('--processes', type=int,
+                        help='scan in this many worker processes')
+    parser.add_argument('--interval', type=float,
+                        default=CHECKPOINT_INTERVAL,
+                        help='the number of seconds between checkpoints')
+    parser.add_argument('--marshalled', action='store_true',
+                        help='write DynamoDB AttributeValue maps')
+    parser.add_argument('--consistent-read', action='store_true',
+                        help='use strongly consistent reads')
+    parser.add_argument('--endpoint', help='the DynamoDB endpoint')
+    parser.add_argument('--region', help='the AWS region')
+    parser.add_argument('--profile', help='the AWS profile')
+    parser.add_argument('--verbose', '-v', action='store_true')
+    arguments = parser.parse_args(args)
+
+    logging.basicConfig(
+        level=logging.DEBUG if arguments.verbose else logging.INFO)
+    client = connector.DynamoDB(**dict(
+        (name, getattr(arguments, name))
+        for name in ('endpoint', 'region', 'profile')
+        if getattr(arguments, name)))
+
+    def run():
+        return export(client, arguments.table, arguments.output,
+                      arguments.checkpoint, arguments.segments,
+                      arguments.interval, arguments.marshalled,
+                      arguments.processes,
+                      max_in_flight=arguments.max_in_flight,
+                      consistent_read=arguments.consistent_read)
+
+    written = ioloop.IOLoop.current().run_sync(run)
+    LOGGER.info('Exported %i items from %s', written, arguments.table)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
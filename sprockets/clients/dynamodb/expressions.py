@@ -0,0 +1,223 @@
+"""
+Expression Builder
+==================
+
+:func:`update` and :func:`condition` build the ``UpdateExpression``
+and ``ConditionExpression`` of a request from native values, returning
+the keyword arguments of
+:meth:`~sprockets.clients.dynamodb.DynamoDB.update_item`,
+:meth:`~sprockets.clients.dynamodb.DynamoDB.delete_item`, and
+:meth:`~sprockets.clients.dynamodb.DynamoDB.put_item`.  Attribute names
+are always substituted with ``ExpressionAttributeNames`` so reserved
+words can be used, and the values are marshalled.
+
+.. code:: python
+
+    yield client.update_item(
+        'table', {'id': item_id},
+        **expressions.update(set={'status': 'done', 'updated': now},
+                             add={'attempts': 1},
+                             remove=['error'],
+                             condition={'status': ('<>', 'done')}))
+
+A condition maps attribute names to a value that the attribute must be
+equal to, or to a :class:`tuple` of a comparison and its operands:
+``('<', 5)``, ``('between', 1, 10)``, ``('begins_with', 'prefix')``,
+``('contains', 'value')``, ``('in', 'a', 'b')``,
+``('attribute_exists',)``, or ``('attribute_not_exists',)``.  The
+comparisons are combined with ``AND``.
+
+The expressions only depend on the attribute names and comparisons
+that are used, not on the values, so they are compiled once per
+combination and cached.  Repeated calls with the same attributes only
+marshal the values.
+
+"""
+from . import utils
+
+#: Maximum number of compiled expressions that are cached
+MAX_TEMPLATES = 1024
+
+_COMPARISONS = {'=', '<>', '<', '<=', '>', '>='}
+_FUNCTIONS = {'begins_with', 'contains'}
+_EXISTENCE = {'attribute_exists', 'attribute_not_exists'}
+
+_templates = {}
+
+
+def update(set=None, remove=None, add=None, delete=None, condition=None):
+    """Return the keyword arguments of an *UpdateItem* request that
+    sets, removes, adds to, and deletes from attributes.
+
+    :param dict set: the values to set by attribute name
+    :param list remove: the names of the attributes to remove
+    :param dict add: the numbers to add to numeric attributes or the
+        values to add to set attributes, by attribute name
+    :param dict delete: the values to delete from set attributes by
+        attribute name
+    :param dict condition: the condition that the item must meet
+    :rtype: dict
+    :raises: :exc:`ValueError`
+
+    """
+    set_items = sorted(set.items()) if set else []
+    add_items = sorted(add.items()) if add else []
+    delete_items = sorted(delete.items()) if delete else []
+    condition_items = sorted(condition.items()) if condition else []
+    shape = (tuple(name for name, _value in set_items),
+             tuple(sorted(remove)) if remove else (),
+             tuple(name for name, _value in add_items),
+             tuple(name for name, _value in delete_items),
+             _condition_shape(condition_items))
+    values = [value for _name, value in set_items]
+    values.extend(value for _name, value in add_items)
+    values.extend(value for _name, value in delete_items)
+    values.extend(_condition_operands(condition_items))
+    return _render(_template(_compile_update, shape), values)
+
+
+def condition(condition):
+    """Return the keyword arguments of a request with a
+    ``ConditionExpression``.
+
+    :param dict condition: the condition that the item must meet
+    :rtype: dict
+    :raises: :exc:`ValueError`
+
+    """
+    items = sorted(condition.items())
+    return _render(_template(_compile_condition, _condition_shape(items)),
+                   list(_condition_operands(items)))
+
+
+def _template(compile_function, shape):
+    """Return the compiled template of an expression shape from the
+    cache, compiling it when it is not cached.
+
+    """
+    key = (compile_function, shape)
+    try:
+        return _templates[key]
+    except KeyError:
+        pass
+    if len(_templates) >= MAX_TEMPLATES:
+        _templates.clear()
+    template = _templates[key] = compile_function(shape)
+    return template
+
+
+def _render(template, values):
+    """Return the keyword arguments of a compiled template with the
+    values substituted.
+
+    """
+    expressions, names, placeholders = template
+    kwargs = dict(expressions)
+    kwargs['expression_attribute_names'] = dict(names)
+    if placeholders:
+        kwargs['expression_attribute_values'] = utils.marshall(
+            dict(zip(placeholders, values)))
+    return kwargs
+
+
+def _condition_shape(items):
+    shape = []
+    for name, value in items:
+        if not isinstance(value, tuple):
+            shape.append((name, '=', 1))
+        elif not value or not (value[0] in _COMPARISONS or
+                               value[0] in _FUNCTIONS or
+                               value[0] in _EXISTENCE or
+                               value[0] in ('between', 'in')):
+            raise ValueError('Unsupported condition {!r}'.format(value))
+        else:
+            shape.append((name, value[0], len(value) - 1))
+    return tuple(shape)
+
+
+def _condition_operands(items):
+    for _name, value in items:
+        if isinstance(value, tuple):
+            for operand in value[1:]:
+                yield operand
+        else:
+            yield value
+
+
+class _Compiler(object):
+    """Assigns the placeholders of a compiled expression."""
+
+    def __init__(self):
+        self.names = {}
+        self.placeholders = []
+
+    def name(self, attribute):
+        placeholder = '#n{}'.format(len(self.names))
+        self.names[placeholder] = attribute
+        return placeholder
+
+    def value(self):
+        placeholder = ':v{}'.format(len(self.placeholders))
+        self.placeholders.append(placeholder)
+        return placeholder
+
+    def template(self, expressions):
+        return expressions, self.names, tuple(self.placeholders)
+
+
+def _compile_update(shape):
+    set_names, remove_names, add_names, delete_names, condition_shape = shape
+    compiler = _Compiler()
+    clauses = []
+    for action, names, separator in (('SET', set_names, ' = '),
+                                     ('REMOVE', remove_names, None),
+                                     ('ADD', add_names, ' '),
+                                     ('DELETE', delete_names, ' ')):
+        if not names:
+            continue
+        if separator is None:
+            paths = [compiler.name(name) for name in names]
+        else:
+            paths = [compiler.name(name) + separator + compiler.value()
+                     for name in names]
+        clauses.append('{} {}'.format(action, ', '.join(paths)))
+    if not clauses:
+        raise ValueError('An update requires at least one action')
+    expressions = {'update_expression': ' '.join(clauses)}
+    if condition_shape:
+        expressions['condition_expression'] = _compile_comparisons(
+            compiler, condition_shape)
+    return compiler.template(expressions)
+
+
+def _compile_condition(shape):
+    if not shape:
+        raise ValueError('A condition requires at least one comparison')
+    compiler = _Compiler()
+    return compiler.template(
+        {'condition_expression': _compile_comparisons(compiler, shape)})
+
+
+def _compile_comparisons(compiler, shape):
+    comparisons = []
+    for name, operator, operands in shape:
+        path = compiler.name(name)
+        placeholders = [compiler.value() for _ in range(operands)]
+        if operator in _COMPARISONS and operands == 1:
+            comparisons.append('{} {} {}'.format(path, operator,
+                                                 placeholders[0]))
+        elif operator in _FUNCTIONS and operands == 1:
+            comparisons.append('{}({}, {})'.format(operator, path,
+                                                   placeholders[0]))
+        elif operator in _EXISTENCE and not operands:
+            comparisons.append('{}({})'.format(operator, path))
+        elif operator == 'between' and operands == 2:
+            comparisons.append('{} BETWEEN {} AND {}'.format(
+                path, *placeholders))
+        elif operator == 'in' and operands:
+            comparisons.append('{} IN ({})'.format(
+                path, ', '.join(placeholders)))
+        else:
+            raise ValueError('Wrong number of operands for {}'.format(
+                operator))
+    return ' AND '.join(comparisons)
@@ -0,0 +1,231 @@
+"""
+Process Pool Scans
+==================
+
+A single :class:`~tornado.ioloop.IOLoop` spends most of a large *Scan*
+decoding the JSON responses and unmarshalling the items, which limits
+the scan to one CPU core.  :class:`ProcessScan` spreads the segments of
+a parallel *Scan* over a :mod:`multiprocessing` pool instead.  Every
+worker process runs its own :class:`~tornado.ioloop.IOLoop` and
+:class:`~sprockets.clients.dynamodb.DynamoDB` client, so the responses
+are decoded and unmarshalled in the workers.
+
+The work is handed out in tasks of up to ``pages_per_task`` pages of a
+segment.  A task returns its items, or the output of a ``reducer``
+that is applied to them in the worker, along with the segment's
+``LastEvaluatedKey``, and the segment's next task is submitted once
+the caller has room for it.  Reducers that summarize or filter the
+items keep the data that is sent back to the parent process small.
+
+.. code:: python
+
+    def count_types(items):
+        return collections.Counter(item['type'] for item in items)
+
+    scan = yield client.process_scan('table', reducer=count_types)
+    totals = collections.Counter()
+    while True:
+        counts = yield scan.next_page()
+        if counts is None:
+            break
+        totals.update(counts)
+
+The reducer and the items must be picklable, so reducers have to be
+module level functions.
+
+"""
+import collections
+import multiprocessing
+import pickle
+
+from tornado import concurrent, gen, ioloop
+
+from . import connector, pagination, utils
+
+#: Default number of pages that a task reads from a segment
+PAGES_PER_TASK = 10
+
+_worker = {}
+
+
+class ProcessScan(pagination._ItemIterator):
+    """
+    Scans the segments of a table in a pool of worker processes,
+    returning the batches of items in the order they arrive.
+
+    :param dict client_args: the keyword arguments that the
+        :class:`~sprockets.clients.dynamodb.DynamoDB` client of each
+        worker is created with
+    :param str table_name: the table to scan
+    :param int total_segments: the number of segments to divide the
+        table into
+    :param int processes: the number of worker processes.  Defaults to
+        the number of CPUs.
+    :param callable reducer: optional module level function that is
+        called in the worker with the items of each task and whose
+        return value is sent to the caller instead of the items
+    :param int pages_per_task: the number of pages a task reads from
+        its segment
+    :param int max_buffered: the maximum number of tasks that are either
+        running or waiting for the caller.  Defaults to twice the number
+        of processes.
+    :param list segments: optional subset of the segment numbers to scan
+    :param dict exclusive_start_keys: optional ``LastEvaluatedKey`` to
+        resume each segment after, by segment number
+    :param dict scan_args: the
+        :meth:`~sprockets.clients.dynamodb.DynamoDB.scan` parameters
+
+    :ivar dict positions: the ``LastEvaluatedKey`` of each segment after
+        the batches that were returned to the caller
+    :ivar set finished: the segments whose last batch was returned to
+        the caller
+    :ivar int count: the number of items that were read by the returned
+        batches
+
+    """
+
+    def __init__(self, client_args, table_name, total_segments,
+                 processes=None, reducer=None,
+                 pages_per_task=PAGES_PER_TASK, max_buffered=None,
+                 segments=None, exclusive_start_keys=None, scan_args=None):
+        super(ProcessScan, self).__init__()
+        self.table_name = table_name
+        self.total_segments = total_segments
+        self.positions = dict(exclusive_start_keys or {})
+        self._start_keys = dict(self.positions)
+        self.finished = set()
+        self.count = 0
+        processes = processes or multiprocessing.cpu_count()
+        self._reducer = reducer
+        self._pages_per_task = pages_per_task
+        self._scan_args = scan_args or {}
+        self._max_buffered = max_buffered or 2 * processes
+        self._idle = collections.deque(
+            range(total_segments) if segments is None else segments)
+        self._running = 0
+        self._batches = collections.deque()
+        self._error = None
+        self._waiter = None
+        self._io_loop = ioloop.IOLoop.current()
+        self._pool = multiprocessing.Pool(processes, _initialize,
+                                          (client_args,))
+
+    def close(self):
+        """Stop the worker processes, abandoning the running tasks."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+        self._idle.clear()
+        self._running = 0
+
+    @gen.coroutine
+    def next_page(self):
+        """Return the next batch to arrive or :data:`None` when every
+        segment has been scanned.  A batch is a list of items or the
+        output of the ``reducer`` for them.
+
+        """
+        self._submit()
+        while not self._batches:
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            elif not self._running and not self._idle:
+                if self._pool is not None:
+                    self._pool.close()
+                    self._pool.join()
+                    self._pool = None
+                raise gen.Return(None)
+            self._waiter = concurrent.TracebackFuture()
+            yield self._waiter
+        segment, last_evaluated_key, count, batch = self._batches.popleft()
+        self.positions[segment] = last_evaluated_key
+        self.count += count
+        if last_evaluated_key is None:
+            self.finished.add(segment)
+        self._submit()
+        raise gen.Return(batch)
+
+    def _submit(self):
+        """Submit tasks while there are idle segments and room for their
+        batches.
+
+        """
+        while (self._idle and self._error is None and
+               self._running + len(self._batches) < self._max_buffered):
+            segment = self._idle.popleft()
+            self._running += 1
+            kwargs = {}
+            if utils.PYTHON3:
+                kwargs['error_callback'] = (
+                    lambda error, segment=segment: self._io_loop.add_callback(
+                        self._on_result, (segment, None, 0, None, error)))
+            self._pool.apply_async(
+                _scan, (self.table_name, segment, self.total_segments,
+                        self._start_keys.get(segment), self._pages_per_task,
+                        self._reducer, self._scan_args),
+                callback=lambda result: self._io_loop.add_callback(
+                    self._on_result, result), **kwargs)
+
+    def _on_result(self, result):
+        """Receive the result of a task on the caller's IOLoop."""
+        if self._pool is None:
+            return
+        self._running -= 1
+        segment, last_evaluated_key, count, batch, error = result
+        if error is not None:
+            self._error = error
+            self.close()
+        else:
+            self._batches.append((segment, last_evaluated_key, count, batch))
+            self._start_keys[segment] = last_evaluated_key
+            if last_evaluated_key is not None:
+                self._idle.append(segment)
+        if self._waiter is not None:
+            waiter, self._waiter = self._waiter, None
+            waiter.set_result(None)
+        self._submit()
+
+
+def _initialize(client_args):
+    """Create the IOLoop and client of a worker process."""
+    io_loop = ioloop.IOLoop()
+    io_loop.make_current()
+    _worker['io_loop'] = io_loop
+    _worker['client'] = connector.DynamoDB(**client_args)
+
+
+def _scan(table_name, segment, total_segments, start_key, pages, reducer,
+          scan_args):
+    """Read up to ``pages`` pages of a segment in a worker process.
+
+    Errors are returned instead of raised since
+    :meth:`multiprocessing.pool.Pool.apply_async` does not report them
+    in Python 2.
+
+    """
+    @gen.coroutine
+    def read():
+        items = []
+        last_evaluated_key = start_key
+        for _ in range(pages):
+            result = yield _worker['client'].scan(
+                table_name, exclusive_start_key=last_evaluated_key,
+                segment=segment, total_segments=total_segments,
+                **scan_args)
+            items.extend(result['Items'])
+            last_evaluated_key = result.get('LastEvaluatedKey')
+            if last_evaluated_key is None:
+                break
+        raise gen.Return((last_evaluated_key, items))
+
+    try:
+        last_evaluated_key, items = _worker['io_loop'].run_sync(read)
+        batch = items if reducer is None else reducer(items)
+    except Exception as error:
+        try:
+            pickle.dumps(error)
+        except Exception:
+            error = RuntimeError(repr(error))
+        return segment, start_key, 0, None, error
+    return segment, last_evaluated_key, len(items), batch, None
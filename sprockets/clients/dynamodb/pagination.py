@@ -0,0 +1,332 @@
+"""
+Pagination
+==========
+
+:class:`PageIterator` follows the ``LastEvaluatedKey`` of paginated
+*Query* and *Scan* results, requesting the following page while the
+caller processes the current one.  At most ``prefetch`` pages are
+buffered ahead of the caller so memory use stays bounded no matter how
+large the result set is.
+
+Pages are retrieved with :meth:`~PageIterator.next_page` and items with
+:attr:`~PageIterator.fetch_next` and :meth:`~PageIterator.next_object`:
+
+.. code:: python
+
+    iterator = client.query_iterator(
+        'table', key_condition_expression='id = :id',
+        expression_attribute_values={':id': {'S': 'value'}})
+    while (yield iterator.fetch_next):
+        item = iterator.next_object()
+
+:class:`MergedIterator` drives several page iterators at once, such as
+the segments of a parallel *Scan*, and returns their pages as one stream
+in the order they arrive.  The number of requests in flight and pages
+waiting for the caller is bounded, so a slow caller stops the requests
+instead of accumulating pages.
+
+"""
+import collections
+
+from tornado import concurrent, gen, ioloop
+
+_MISSING = object()
+
+
+class _ItemIterator(object):
+    """Item access on top of the :meth:`next_page` of a subclass.
+
+    The items of the current page are read from it as they are
+    returned, so pages that decode their items one at a time, such as
+    a :class:`~sprockets.clients.dynamodb.streaming.ItemStream`, are
+    never copied.
+
+    """
+
+    def __init__(self):
+        self._page = iter(())
+        self._remaining = 0
+        self._next = _MISSING
+
+    def __len__(self):
+        return self._remaining
+
+    @property
+    def fetch_next(self):
+        """A future that resolves to :data:`True` when an item is
+        available from :meth:`next_object` or :data:`False` when the
+        iterator is exhausted.
+
+        :rtype: tornado.concurrent.Future
+
+        """
+        if self._next is not _MISSING or self._advance():
+            future = concurrent.TracebackFuture()
+            future.set_result(True)
+            return future
+        return self._fetch_next()
+
+    @gen.coroutine
+    def _fetch_next(self):
+        while not self._advance():
+            page = yield self.next_page()
+            if page is None:
+                raise gen.Return(False)
+            self._page, self._remaining = iter(page), len(page)
+        raise gen.Return(True)
+
+    def _advance(self):
+        """Read the next item of the current page, returning
+        :data:`False` when the page is exhausted.
+
+        """
+        if self._next is _MISSING:
+            self._next = next(self._page, _MISSING)
+        return self._next is not _MISSING
+
+    def next_object(self):
+        """Return the next item after :attr:`fetch_next` resolved to
+        :data:`True`.
+
+        :rtype: dict
+        :raises: :exc:`StopIteration`
+
+        """
+        if not self._advance():
+            raise StopIteration
+        item, self._next = self._next, _MISSING
+        self._remaining -= 1
+        return item
+
+    def next_page(self):
+        raise NotImplementedError
+
+    @gen.coroutine
+    def to_list(self):
+        """Return the remaining items.
+
+        :rtype: list
+
+        """
+        items = [] if self._next is _MISSING else [self._next]
+        items.extend(self._page)
+        self._page, self._remaining, self._next = iter(()), 0, _MISSING
+        while True:
+            page = yield self.next_page()
+            if page is None:
+                raise gen.Return(items)
+            items.extend(page)
+
+
+class PageIterator(_ItemIterator):
+    """
+    Iterates over the pages of a paginated result.
+
+    :param callable fetch: function that is called with the exclusive
+        start key and the ``Limit`` for a page and returns a future that
+        resolves to the unwrapped result
+    :param dict exclusive_start_key: the key to start after
+    :param int page_size: the maximum number of items to evaluate per page
+    :param int max_items: optional maximum number of items to return.
+        Page sizes are reduced so that DynamoDB does not read past it.
+    :param int prefetch: the maximum number of pages to request ahead
+        of the caller.  ``0`` only requests a page when it is asked for.
+
+    :ivar dict last_evaluated_key: the ``LastEvaluatedKey`` of the most
+        recently returned page.  Pass it as the ``exclusive_start_key``
+        to resume after that page.
+    :ivar int count: the number of items in the returned pages
+    :ivar int scanned_count: the number of items DynamoDB evaluated for
+        the returned pages
+
+    """
+
+    def __init__(self, fetch, exclusive_start_key=None, page_size=None,
+                 max_items=None, prefetch=1):
+        super(PageIterator, self).__init__()
+        self.last_evaluated_key = exclusive_start_key
+        self.count = 0
+        self.scanned_count = 0
+        self._fetch = fetch
+        self._page_size = page_size
+        self._max_items = max_items
+        self._prefetch = prefetch
+        self._start_key = exclusive_start_key
+        self._requested = 0
+        self._fetching = False
+        self._done = max_items is not None and max_items <= 0
+        self._pages = collections.deque()
+
+    @gen.coroutine
+    def next_page(self):
+        """Return the items of the next page or :data:`None` when the
+        iterator is exhausted.  Pages can be empty when a filter
+        expression is used.
+
+        :rtype: list
+
+        """
+        self._fill(force=True)
+        if not self._pages:
+            raise gen.Return(None)
+        result = yield self._pages.popleft()
+        self.last_evaluated_key = result.get('LastEvaluatedKey')
+        self.count += result.get('Count', len(result['Items']))
+        self.scanned_count += result.get('ScannedCount', 0)
+        self._fill()
+        raise gen.Return(result['Items'])
+
+    def _fill(self, force=False):
+        """Request the next page if the buffer has room for it."""
+        if self._fetching or self._done:
+            return
+        elif len(self._pages) >= self._prefetch and not (
+                force and not self._pages):
+            return
+
+        limit = self._page_size
+        if self._max_items is not None:
+            remaining = self._max_items - self._requested
+            limit = remaining if limit is None else min(limit, remaining)
+        self._fetching = True
+        future = concurrent.TracebackFuture()
+        self._pages.append(future)
+        try:
+            response = self._fetch(self._start_key, limit)
+        except Exception as error:
+            self._on_page(future, None, error)
+            return
+        ioloop.IOLoop.current().add_future(
+            response, lambda response: self._on_page(future, response))
+
+    def _on_page(self, future, response, error=None):
+        self._fetching = False
+        if error is None:
+            error = response.exception()
+        if error is not None:
+            self._done = True
+            future.set_exception(error)
+            return
+
+        result = response.result()
+        self._start_key = result.get('LastEvaluatedKey')
+        self._requested += len(result['Items'])
+        self._done = not self._start_key or (
+            self._max_items is not None and
+            self._requested >= self._max_items)
+        future.set_result(result)
+        self._fill()
+
+
+class MergedIterator(_ItemIterator):
+    """
+    Iterates over the pages of several :class:`PageIterator` instances
+    in parallel, returning the pages in the order they arrive.
+
+    :param list iterators: the :class:`PageIterator` instances to merge.
+        They should not prefetch since this iterator decides when their
+        pages are requested.
+    :param int max_in_flight: the maximum number of page requests in
+        flight at the same time
+    :param int max_buffered: the maximum number of pages that are either
+        in flight or waiting for the caller.  Requests stop while the
+        caller falls behind.  Defaults to twice ``max_in_flight``.
+
+    :ivar list iterators: the merged iterators
+    :ivar list positions: the ``LastEvaluatedKey`` of the most recent
+        page of each iterator that was returned to the caller, which is
+        where to resume the iterator after those pages were processed
+    :ivar set finished: the indexes of the iterators whose last page
+        was returned to the caller
+
+    """
+
+    def __init__(self, iterators, max_in_flight=10, max_buffered=None):
+        super(MergedIterator, self).__init__()
+        self.iterators = list(iterators)
+        self.positions = [iterator.last_evaluated_key
+                          for iterator in self.iterators]
+        self.finished = set()
+        self._max_in_flight = max_in_flight
+        self._max_buffered = max_buffered or 2 * max_in_flight
+        self._idle = collections.deque(enumerate(self.iterators))
+        self._in_flight = 0
+        self._pages = collections.deque()
+        self._error = None
+        self._waiter = None
+
+    @property
+    def count(self):
+        """The number of items in the returned pages.
+
+        :rtype: int
+
+        """
+        return sum(iterator.count for iterator in self.iterators)
+
+    @property
+    def scanned_count(self):
+        """The number of items DynamoDB evaluated for the returned pages.
+
+        :rtype: int
+
+        """
+        return sum(iterator.scanned_count for iterator in self.iterators)
+
+    @gen.coroutine
+    def next_page(self):
+        """Return the items of the next page to arrive or :data:`None`
+        when every iterator is exhausted.
+
+        :rtype: list
+
+        """
+        self._fill()
+        while not self._pages:
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            elif not self._in_flight and not self._idle:
+                raise gen.Return(None)
+            self._waiter = concurrent.TracebackFuture()
+            yield self._waiter
+        index, last_evaluated_key, page = self._pages.popleft()
+        self.positions[index] = last_evaluated_key
+        if last_evaluated_key is None:
+            self.finished.add(index)
+        self._fill()
+        raise gen.Return(page)
+
+    def _fill(self):
+        """Request pages while there are idle iterators and room for their
+        pages.
+
+        """
+        while (self._idle and self._error is None and
+               self._in_flight < self._max_in_flight and
+               self._in_flight + len(self._pages) < self._max_buffered):
+            index, iterator = self._idle.popleft()
+            self._in_flight += 1
+            ioloop.IOLoop.current().add_future(
+                iterator.next_page(),
+                lambda response, index=index:
+                    self._on_page(index, response))
+
+    def _on_page(self, index, response):
+        self._in_flight -= 1
+        error = response.exception()
+        iterator = self.iterators[index]
+        if error is not None:
+            self._error = error
+            self._idle.clear()
+        elif response.result() is not None:
+            self._pages.append((index, iterator.last_evaluated_key,
+                                response.result()))
+            if iterator.last_evaluated_key is not None:
+                self._idle.append((index, iterator))
+        else:
+            self.finished.add(index)
+        if self._waiter is not None:
+            waiter, self._waiter = self._waiter, None
+            waiter.set_result(None)
+        self._fill()
@@ -0,0 +1,139 @@
+"""
+Prepared Operations
+===================
+
+Most of the body of a request on a hot path is the same on every call:
+the table name, the projection, the expressions and their attribute
+names.  A prepared operation encodes those parameters to JSON once, and
+each call only marshals the key, item, or values that change and
+splices them into the encoded body.
+
+.. code:: python
+
+    get_user = client.prepare_get_item(
+        'users', projection_expression='#n, email',
+        expression_attribute_names={'#n': 'name'})
+    user = yield get_user({'id': user_id})
+
+Prepared operations are created with
+:meth:`~sprockets.clients.dynamodb.DynamoDB.prepare_get_item`,
+:meth:`~sprockets.clients.dynamodb.DynamoDB.prepare_query`, and
+:meth:`~sprockets.clients.dynamodb.DynamoDB.prepare_put_item` and are
+sent through the client like any other request, so the retry policy,
+limiters, and response options of the client apply to them.
+
+"""
+from . import utils
+
+
+class PreparedOperation(object):
+    """
+    A request whose constant parameters are encoded once.
+
+    :param client: the :class:`~sprockets.clients.dynamodb.DynamoDB`
+        client to send the requests with
+    :param str function: the DynamoDB function to invoke
+    :param dict body: the constant parameters of the request
+
+    """
+
+    def __init__(self, client, function, body):
+        self.function = function
+        self._client = client
+        self._body = body
+        self._encoded = client._codec.dumps(body)
+        self._prefix = self._encoded[:-1] + b','
+
+    def __repr__(self):
+        return '<{} {} {}>'.format(self.__class__.__name__, self.function,
+                                   self._body.get('TableName'))
+
+    def _send(self, parameters):
+        """Send the request with the parameters that vary by call, which
+        are encoded and spliced into the encoded constant parameters.
+        The complete body is only assembled when the rate limiter of the
+        client may need to add to it, the client otherwise only inspects
+        the constant parameters.
+
+        :param dict parameters: the marshalled varying parameters
+        :rtype: tornado.concurrent.Future
+
+        """
+        client = self._client
+        if not parameters:
+            return client._send(self.function, self._body, self._encoded)
+        encoded = self._prefix + client._codec.dumps(parameters)[1:]
+        if client._rate_limiter is None:
+            return client._send(self.function, self._body, encoded)
+        body = dict(self._body)
+        body.update(parameters)
+        return client._send(self.function, body, encoded)
+
+
+class PreparedGetItem(PreparedOperation):
+    """A prepared *GetItem* request, see
+    :meth:`~sprockets.clients.dynamodb.DynamoDB.prepare_get_item`.
+
+    """
+
+    def __call__(self, key_dict):
+        """Return the item with the primary key.
+
+        :param dict key_dict: the primary key of the item
+        :rtype: tornado.concurrent.Future
+
+        """
+        return self._send({'Key': utils.marshall(key_dict)})
+
+
+class PreparedQuery(PreparedOperation):
+    """A prepared *Query* request, see
+    :meth:`~sprockets.clients.dynamodb.DynamoDB.prepare_query`.
+
+    """
+
+    def __call__(self, values=None, exclusive_start_key=None, limit=None):
+        """Return a page of the query results.
+
+        :param dict values: the native values of the expression
+            attribute value placeholders
+        :param dict exclusive_start_key: the ``LastEvaluatedKey`` of the
+            previous page
+        :param int limit: the maximum number of items to evaluate
+        :rtype: tornado.concurrent.Future
+
+        """
+        parameters = {}
+        if values:
+            parameters['ExpressionAttributeValues'] = utils.marshall(values)
+        if exclusive_start_key:
+            parameters['ExclusiveStartKey'] = utils.marshall(
+                exclusive_start_key)
+        if limit:
+            parameters['Limit'] = limit
+        return self._send(parameters)
+
+
+class PreparedPutItem(PreparedOperation):
+    """A prepared *PutItem* request, see
+    :meth:`~sprockets.clients.dynamodb.DynamoDB.prepare_put_item`.
+
+    """
+
+    def __call__(self, item, values=None):
+        """Put the item, updating the client's item cache.
+
+        :param dict item: the item to put
+        :param dict values: the native values of the expression
+            attribute value placeholders of the condition
+        :rtype: tornado.concurrent.Future
+
+        """
+        parameters = {'Item': utils.marshall(item)}
+        if values:
+            parameters['ExpressionAttributeValues'] = utils.marshall(values)
+        future = self._send(parameters)
+        if self._client._item_cache is None:
+            return future
+        return self._client._write_through(self._body['TableName'], item,
+                                           parameters['Item'], future)
@@ -0,0 +1,288 @@
+"""
+Capacity Rate Limiting
+======================
+
+:class:`CapacityLimiter` paces requests to tables and global secondary
+indexes so that they stay within a read and write capacity unit rate.
+Each table and index has a token bucket for reads and another for
+writes that is refilled at the configured rate.
+
+A request waits until the buckets it uses are not in debt, reserves an
+estimate of the capacity that it will consume, and once the response
+arrives the estimate is replaced with the ``ConsumedCapacity`` that
+DynamoDB reports.  The rates can be configured by hand or from the
+``ProvisionedThroughput`` in a *DescribeTable* response.
+
+The consumed capacity is always requested with ``INDEXES`` detail, since
+the total alone does not say which global secondary index consumed it.
+The response is reduced to the detail that the caller asked for.  Local
+secondary indexes share the capacity of their table, so the requests to
+the local secondary indexes that :meth:`CapacityLimiter.configure` found
+are paced with the table's rate.
+
+"""
+import time
+
+#: Functions that consume read capacity
+READ_FUNCTIONS = {'BatchGetItem', 'GetItem', 'Query', 'Scan'}
+
+#: Functions that consume write capacity
+WRITE_FUNCTIONS = {'BatchWriteItem', 'DeleteItem', 'PutItem', 'UpdateItem'}
+
+#: The ``ConsumedCapacity`` detail that ``TOTAL`` does not return
+INDEX_DETAIL = ('GlobalSecondaryIndexes', 'LocalSecondaryIndexes', 'Table')
+
+_clock = getattr(time, 'monotonic', time.time)
+
+
+class TokenBucket(object):
+    """
+    Token bucket that is refilled at a constant rate and may go into
+    debt.
+
+    :param float rate: the number of tokens added per second
+    :param float burst: the number of seconds of tokens that the bucket
+        holds when full
+
+    """
+
+    def __init__(self, rate, burst=1.0):
+        self.rate = float(rate)
+        self.capacity = self.rate * burst
+        self._tokens = self.capacity
+        self._updated = _clock()
+
+    @property
+    def tokens(self):
+        """The number of tokens that are available, negative when the
+        bucket is in debt.
+
+        :rtype: float
+
+        """
+        now = _clock()
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        return self._tokens
+
+    def consume(self, tokens):
+        """Remove tokens from the bucket, going into debt if there are not
+        enough.  Pass a negative value to return tokens.
+
+        :param float tokens: the number of tokens to remove
+
+        """
+        self._tokens = self.tokens - tokens
+
+    def delay(self):
+        """Return the number of seconds until the bucket is out of debt.
+
+        :rtype: float
+
+        """
+        tokens = self.tokens
+        return 0 if tokens >= 0 else -tokens / self.rate
+
+
+class CapacityLimiter(object):
+    """
+    Paces requests to stay within per-table and per-index capacity unit
+    rates.
+
+    :param float burst: the number of seconds of unused capacity that
+        may be used in a burst
+
+    """
+
+    def __init__(self, burst=1.0):
+        self.burst = burst
+        self._buckets = {}
+        self._local_indexes = set()
+
+    def set_rate(self, table_name, read_units=None, write_units=None,
+                 index_name=None):
+        """Set the capacity unit rates for a table or global secondary
+        index.  Passing :data:`None` or ``0`` removes the limit.
+
+        :param str table_name: the table to limit
+        :param float read_units: read capacity units per second
+        :param float write_units: write capacity units per second
+        :param str index_name: optional global secondary index to limit
+
+        """
+        for kind, units in (('read', read_units), ('write', write_units)):
+            key = (table_name, index_name, kind)
+            if units:
+                self._buckets[key] = TokenBucket(units, self.burst)
+            else:
+                self._buckets.pop(key, None)
+
+    def configure(self, table, fraction=1.0):
+        """Set the capacity unit rates for a table and its global secondary
+        indexes from their ``ProvisionedThroughput``.  Requests to its
+        local secondary indexes are paced with the table's rates.
+
+        :param dict table: a table description as returned by
+            :meth:`~sprockets.clients.dynamodb.DynamoDB.describe_table`
+        :param float fraction: the fraction of the provisioned capacity
+            to use
+
+        """
+        indexes = [(None, table)]
+        indexes.extend((index['IndexName'], index)
+                       for index in table.get('GlobalSecondaryIndexes', []))
+        self._local_indexes.update(
+            (table['TableName'], index['IndexName'])
+            for index in table.get('LocalSecondaryIndexes', []))
+        for index_name, description in indexes:
+            throughput = description.get('ProvisionedThroughput', {})
+            self.set_rate(
+                table['TableName'],
+                throughput.get('ReadCapacityUnits', 0) * fraction,
+                throughput.get('WriteCapacityUnits', 0) * fraction,
+                index_name)
+
+    def prepare(self, function, body):
+        """Return the request body to send, requesting the consumed
+        capacity by index if the request uses a limited table.
+
+        :param str function: the DynamoDB function to invoke
+        :param dict body: the request body
+        :returns: the body to send and the ``ReturnConsumedCapacity``
+            that the caller asked for, which is ``NONE`` when it was not
+            specified, or :data:`None` when the body was not changed.
+            Pass it to :meth:`restore` with the result.
+        :rtype: tuple
+
+        """
+        requested = body.get('ReturnConsumedCapacity') or 'NONE'
+        if (requested == 'INDEXES' or
+                not any(self._requested(function, body))):
+            return body, None
+        body = dict(body)
+        body['ReturnConsumedCapacity'] = 'INDEXES'
+        return body, requested
+
+    @staticmethod
+    def restore(result, requested):
+        """Reduce the ``ConsumedCapacity`` of a result to the detail
+        that the caller asked for before :meth:`prepare` changed it.
+
+        :param dict result: the response
+        :param str requested: the ``ReturnConsumedCapacity`` returned by
+            :meth:`prepare`
+
+        """
+        if requested != 'TOTAL':
+            result.pop('ConsumedCapacity', None)
+            return
+        consumed_capacity = result.get('ConsumedCapacity')
+        if isinstance(consumed_capacity, dict):
+            result['ConsumedCapacity'] = _total(consumed_capacity)
+        elif consumed_capacity:
+            result['ConsumedCapacity'] = [
+                _total(consumed) for consumed in consumed_capacity]
+
+    def delay(self, function, body):
+        """Return the number of seconds to wait before sending a request.
+
+        :param str function: the DynamoDB function to invoke
+        :param dict body: the request body
+        :rtype: float
+
+        """
+        return max([bucket.delay()
+                    for bucket, _units in self._requested(function, body)] or
+                   [0])
+
+    def reserve(self, function, body):
+        """Remove an estimate of the capacity that a request will consume
+        from the buckets it uses, returning the reservation to pass to
+        :meth:`settle`.
+
+        :param str function: the DynamoDB function to invoke
+        :param dict body: the request body
+        :rtype: list
+
+        """
+        reservation = list(self._requested(function, body))
+        for bucket, units in reservation:
+            bucket.consume(units)
+        return reservation
+
+    def settle(self, function, reservation, consumed_capacity=None):
+        """Replace a reservation with the capacity that DynamoDB reports
+        as consumed.  When the request failed, pass :data:`None` for
+        ``consumed_capacity`` to return the reservation.
+
+        :param str function: the DynamoDB function that was invoked
+        :param list reservation: the value returned by :meth:`reserve`
+        :param consumed_capacity: the ``ConsumedCapacity`` from the
+            response
+        :type consumed_capacity: dict or list
+
+        """
+        for bucket, units in reservation:
+            bucket.consume(-units)
+        if not consumed_capacity:
+            return
+        if isinstance(consumed_capacity, dict):
+            consumed_capacity = [consumed_capacity]
+        kind = _kind(function)
+        for consumed in consumed_capacity:
+            table_name = consumed['TableName']
+            if 'Table' in consumed:
+                units = consumed['Table'].get('CapacityUnits', 0)
+                units += sum(index.get('CapacityUnits', 0) for index in
+                             consumed.get('LocalSecondaryIndexes',
+                                          {}).values())
+            else:
+                units = consumed.get('CapacityUnits', 0)
+            self._consume((table_name, None, kind), units)
+            for index_name, index in consumed.get('GlobalSecondaryIndexes',
+                                                  {}).items():
+                self._consume((table_name, index_name, kind),
+                              index.get('CapacityUnits', 0))
+
+    def _consume(self, key, units):
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket.consume(units)
+
+    def _requested(self, function, body):
+        """Yield the buckets that a request uses along with an estimate of
+        the capacity units it will consume from each.
+
+        """
+        kind = _kind(function)
+        if kind is None or not self._buckets:
+            return
+        if 'RequestItems' in body:
+            for table_name, requests in body['RequestItems'].items():
+                bucket = self._buckets.get((table_name, None, kind))
+                if bucket is not None:
+                    if isinstance(requests, dict):
+                        requests = requests.get('Keys', [])
+                    yield bucket, len(requests)
+        else:
+            table_name = body.get('TableName')
+            index_name = body.get('IndexName')
+            if (table_name, index_name) in self._local_indexes:
+                index_name = None
+            bucket = self._buckets.get((table_name, index_name, kind))
+            if bucket is not None:
+                yield bucket, 1
+
+
+def _total(consumed):
+    return dict((key, value) for key, value in consumed.items()
+                if key not in INDEX_DETAIL)
+
+
+def _kind(function):
+    if function in READ_FUNCTIONS:
+        return 'read'
+    elif function in WRITE_FUNCTIONS:
+        return 'write'
+    return None
@@ -0,0 +1,192 @@
+"""
+Retry Policies
+==============
+
+:class:`RetryPolicy` decides if and when a failed request is retried by
+:meth:`~sprockets.clients.dynamodb.DynamoDB.execute`.  Each retryable
+exception class has its own limit on the number of retries, the delay
+between attempts uses capped exponential backoff with full jitter, and
+an optional deadline bounds the total time spent on a call.
+
+A :class:`RetryBudget` is a token bucket that is shared by every call
+made with a policy.  Retries withdraw tokens and successful calls
+deposit them, so when DynamoDB is failing most requests the client
+stops retrying instead of multiplying the load on the service.
+
+"""
+import logging
+import random
+
+from . import exceptions
+
+LOGGER = logging.getLogger(__name__)
+
+#: Default number of retries by exception class
+RULES = {
+    exceptions.ThroughputExceeded: 10,
+    exceptions.ThrottlingException: 10,
+    exceptions.InternalFailure: 3,
+    exceptions.ServiceUnavailable: 3,
+    exceptions.TimeoutException: 3,
+    exceptions.ConnectionFailure: 3,
+    exceptions.ServerError: 3,
+}
+
+#: Errors that DynamoDB raises before it applies a request.  A request that
+#: is not idempotent can be retried after them without being applied twice.
+REJECTED_ERRORS = (exceptions.ThroughputExceeded,
+                   exceptions.ThrottlingException)
+
+#: Default base and maximum delay in seconds between attempts
+BASE_DELAY = 0.05
+MAX_DELAY = 5.0
+
+
+class RetryBudget(object):
+    """
+    Token bucket that limits the number of retries across calls.
+
+    :param int capacity: the maximum number of tokens in the bucket
+    :param int retry_cost: the tokens withdrawn for a retry
+    :param int timeout_cost: the tokens withdrawn for retrying a
+        :exc:`~sprockets.clients.dynamodb.exceptions.TimeoutException`
+    :param int refund: the tokens deposited for a successful call
+
+    :ivar int tokens: the number of tokens that are available
+
+    """
+
+    def __init__(self, capacity=500, retry_cost=5, timeout_cost=10,
+                 refund=1):
+        self.capacity = capacity
+        self.retry_cost = retry_cost
+        self.timeout_cost = timeout_cost
+        self.refund = refund
+        self.tokens = capacity
+
+    def acquire(self, error):
+        """Withdraw the tokens for retrying after `error`, returning
+        :data:`False` if there are not enough tokens.
+
+        :param Exception error: the error that is being retried
+        :rtype: bool
+
+        """
+        cost = (self.timeout_cost
+                if isinstance(error, exceptions.TimeoutException)
+                else self.retry_cost)
+        if cost > self.tokens:
+            return False
+        self.tokens -= cost
+        return True
+
+    def release(self):
+        """Deposit the tokens for a successful call."""
+        self.tokens = min(self.capacity, self.tokens + self.refund)
+
+
+class RetryPolicy(object):
+    """
+    Decides if and when a failed request is retried.
+
+    :param dict rules: the maximum number of retries by exception class.
+        The rule for the most specific class of an exception is used
+        and exceptions that are not an instance of a class in ``rules``
+        are not retried.
+    :param float base_delay: the delay in seconds before the first retry
+    :param float max_delay: the maximum delay in seconds between retries
+    :param float deadline: optional number of seconds after which a
+        call is no longer retried
+    :param budget: optional :class:`RetryBudget` that is shared by the
+        calls using this policy
+
+    :ivar int calls: the number of calls that have completed
+    :ivar int retries: the number of retries across all calls
+    :ivar int exhausted: the number of calls that failed with a
+        retryable error because a limit was reached
+
+    The number of retries for each call is passed to :meth:`report`,
+    which logs them by default.  Override it to send the counts to a
+    metrics system.
+
+    """
+
+    def __init__(self, rules=None, base_delay=BASE_DELAY, max_delay=MAX_DELAY,
+                 deadline=None, budget=None):
+        self.rules = dict(RULES if rules is None else rules)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.budget = budget
+        self.calls = 0
+        self.retries = 0
+        self.exhausted = 0
+
+    def rejected_only(self):
+        """Return a copy of the policy that only retries the
+        :data:`REJECTED_ERRORS`, for requests that are not idempotent.
+        The copy shares the budget of this policy.
+
+        :rtype: RetryPolicy
+
+        """
+        return RetryPolicy(
+            dict((exception_class, limit)
+                 for exception_class, limit in self.rules.items()
+                 if issubclass(exception_class, REJECTED_ERRORS)),
+            self.base_delay, self.max_delay, self.deadline, self.budget)
+
+    def delay(self, error, retries, elapsed):
+        """Return the number of seconds to wait before retrying after
+        `error` or :data:`None` if the call should not be retried.
+
+        :param Exception error: the error the attempt failed with
+        :param int retries: the number of retries made so far
+        :param float elapsed: the number of seconds since the call began
+        :rtype: float
+
+        """
+        limit = self._limit(error)
+        if limit is None:
+            return None
+        delay = random.uniform(
+            0, min(self.max_delay, self.base_delay * (2 ** retries)))
+        if (retries >= limit or
+                (self.deadline is not None and
+                 elapsed + delay > self.deadline) or
+                (self.budget is not None and not self.budget.acquire(error))):
+            self.exhausted += 1
+            return None
+        return delay
+
+    def complete(self, function, retries, error=None):
+        """Record the outcome of a call.
+
+        :param str function: the DynamoDB function that was invoked
+        :param int retries: the number of retries that were made
+        :param Exception error: the error the call failed with, if any
+
+        """
+        self.calls += 1
+        self.retries += retries
+        if error is None and self.budget is not None:
+            self.budget.release()
+        self.report(function, retries, error)
+
+    def report(self, function, retries, error):
+        """Report the number of retries made for a call.
+
+        :param str function: the DynamoDB function that was invoked
+        :param int retries: the number of retries that were made
+        :param Exception error: the error the call failed with, if any
+
+        """
+        if retries:
+            LOGGER.debug('%s() completed after %i retries: %r',
+                         function, retries, error)
+
+    def _limit(self, error):
+        for exception_class in type(error).__mro__:
+            if exception_class in self.rules:
+                return self.rules[exception_class]
+        return None
@@ -0,0 +1,198 @@
+"""
+Streamed Pages
+==============
+
+Decoding a *Query* or *Scan* page with :func:`json.loads` builds the
+marshalled form of every item before any of them are unmarshalled, so
+a page briefly holds each item twice on top of the response body.
+:func:`parse_page` instead locates the items in the response body
+without decoding them and returns them as an :class:`ItemStream` that
+decodes and unmarshalls one item at a time.  Only the item being
+unmarshalled is held in its marshalled form, and the response body is
+released once the last item has been read.
+
+The rest of the page, such as ``LastEvaluatedKey``, ``Count``, and
+``ConsumedCapacity``, is decoded up front.  Enable the mode with the
+``stream_items`` keyword of :class:`~sprockets.clients.dynamodb.DynamoDB`:
+
+.. code:: python
+
+    client = dynamodb.DynamoDB(stream_items=True)
+    result = yield client.scan('table')
+    for item in result['Items']:
+        process(item)
+    start_key = result.get('LastEvaluatedKey')
+
+Locating the items roughly doubles the CPU time that a page takes in
+exchange for the lower peak memory use, so the mode is intended for
+memory constrained workers.
+
+"""
+import collections
+import re
+
+from . import utils
+
+_STRING = br'"[^"\\]*(?:\\.[^"\\]*)*"'
+_SCALAR_VALUE = (br'\{"(?:S|N|B|BOOL|NULL)":(?:' + _STRING +
+                 br'|true|false)\}')
+
+#: Everything up to the next bracket that is not skipped as a whole.
+#: Strings, scalar attribute values, sets, and lists and maps of scalar
+#: attribute values are skipped by the regular expression engine, so
+#: the brackets of nested lists and maps are the only ones that are
+#: counted one at a time.
+_SKIP = re.compile(
+    br'(?:[^"{}\[\]]+|' + _STRING + br'|' + _SCALAR_VALUE +
+    br'|\{"(?:SS|NS|BS)":\[(?:' + _STRING + br'(?:,' + _STRING +
+    br')*)?\]\}|\{"L":\[(?:' + _SCALAR_VALUE + br'(?:,' + _SCALAR_VALUE +
+    br')*)?\]\}|\{"M":\{(?:' + _STRING + br':' + _SCALAR_VALUE + br'(?:,' +
+    _STRING + br':' + _SCALAR_VALUE + br')*)?\}\})*')
+
+_START = re.compile(br'\s*\{')
+_NAME = re.compile(br'[\s,]*(' + _STRING + br')\s*:\s*')
+_END = re.compile(br'[\s,]*\}')
+_SEPARATOR = re.compile(br'[\s,]*')
+_SCALAR = re.compile(br'-?[0-9][0-9.eE+-]*|true|false|null|' + _STRING)
+
+_OPEN = (b'{', b'[')
+_CLOSE = (b'}', b']')
+
+
+class ItemStream(object):
+    """
+    The items of a streamed page, decoded and unmarshalled one at a
+    time as they are iterated over.  The stream can be iterated over
+    once; :func:`len` returns the number of items that have not been
+    read yet.
+
+    :param bytes body: the response body
+    :param list spans: the ``(start, end)`` offsets of the items in the
+        response body
+    :param json_codec: the
+        :class:`~sprockets.clients.dynamodb.codec.JSONCodec` that decodes
+        the items
+    :param bool lazy: return the items as
+        :class:`~sprockets.clients.dynamodb.utils.LazyItem` mappings
+
+    """
+
+    def __init__(self, body, spans, json_codec, lazy=False):
+        self._body = body if spans else None
+        self._spans = collections.deque(spans)
+        self._codec = json_codec
+        self._lazy = lazy
+
+    def __iter__(self):
+        return self
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __next__(self):
+        if not self._spans:
+            raise StopIteration
+        start, end = self._spans.popleft()
+        values = self._codec.loads(self._body[start:end])
+        if not self._spans:
+            self._body = None
+        if self._lazy:
+            return utils.LazyItem(values)
+        return utils.unmarshall(values)
+
+    next = __next__
+
+    def __repr__(self):
+        return '<{} remaining={}>'.format(self.__class__.__name__,
+                                          len(self._spans))
+
+
+def parse_page(body, json_codec, lazy=False):
+    """Decode a *Query* or *Scan* response body, returning its
+    ``Items`` as an :class:`ItemStream`.  The other values of the
+    response are decoded as they are, the ``LastEvaluatedKey`` is not
+    unmarshalled.
+
+    :param bytes body: the response body
+    :param json_codec: the
+        :class:`~sprockets.clients.dynamodb.codec.JSONCodec` that decodes
+        the values
+    :param bool lazy: return the items as
+        :class:`~sprockets.clients.dynamodb.utils.LazyItem` mappings
+    :rtype: dict
+    :raises: :exc:`ValueError`
+
+    """
+    result = {}
+    spans = []
+    match = _START.match(body)
+    if match is None:
+        raise ValueError('Response is not a JSON object')
+    position = match.end()
+    while True:
+        match = _NAME.match(body, position)
+        if match is None:
+            if _END.match(body, position) is None:
+                raise ValueError('Expected a name at {}'.format(position))
+            break
+        name, position = json_codec.loads(match.group(1)), match.end()
+        if name == 'Items':
+            position = _item_spans(body, position, spans)
+        else:
+            end = _value_end(body, position)
+            result[name] = json_codec.loads(body[position:end])
+            position = end
+    result['Items'] = ItemStream(body, spans, json_codec, lazy)
+    return result
+
+
+def _item_spans(body, position, spans):
+    """Append the offsets of the objects in the array that starts at
+    ``position`` to ``spans``, returning the offset after the array.
+
+    """
+    if body[position:position + 1] != b'[':
+        raise ValueError('Expected "[" at {}'.format(position))
+    position += 1
+    while True:
+        position = _SEPARATOR.match(body, position).end()
+        character = body[position:position + 1]
+        if character == b']':
+            return position + 1
+        elif character != b'{':
+            raise ValueError('Expected an item at {}'.format(position))
+        end = _container_end(body, position)
+        spans.append((position, end))
+        position = end
+
+
+def _value_end(body, position):
+    """Return the offset after the JSON value that starts at
+    ``position``.
+
+    """
+    match = _SCALAR.match(body, position)
+    if match is not None:
+        return match.end()
+    return _container_end(body, position)
+
+
+def _container_end(body, position):
+    """Return the offset after the JSON object or array that starts at
+    ``position``.
+
+    """
+    if body[position:position + 1] not in _OPEN:
+        raise ValueError('Unexpected value at {}'.format(position))
+    skip, depth = _SKIP.match, 0
+    while True:
+        character = body[position:position + 1]
+        if character in _OPEN:
+            depth += 1
+        elif character in _CLOSE:
+            depth -= 1
+            if not depth:
+                return position + 1
+        else:
+            raise ValueError('Unexpected end of response')
+        position = skip(body, position + 1).end()
@@ -2,7 +2,11 @@
 Utilities for working with DynamoDB.
 
 - :func:`.marshall`
+- :func:`.register_marshaller`
 - :func:`.unmarshal`
+- :func:`.unmarshall_many`
+- :class:`.LazyItem`
+- :func:`.primary_key`
 
 This module contains some helpers that make working with the
 Amazon DynamoDB API a little less painful.  Data is encoded as
@@ -18,6 +22,10 @@ import base64
 import datetime
 import uuid
 import sys
+try:
+    from collections import abc
+except ImportError:  # Python 2
+    import collections as abc
 try:
     import arrow
 except ImportError:
@@ -25,6 +33,7 @@ except ImportError:
 
 
 PYTHON3 = True if sys.version_info > (3, 0, 0) else False
+TEXT_TYPE = type(u'')
 TEXTCHARS = bytearray({7,8,9,10,12,13,27} | set(range(0x20, 0x100)) - {0x7f})
 
 
@@ -40,12 +49,38 @@ def marshall(values):
     writing the values to DynamoDB.
 
     """
+    if isinstance(values, LazyItem):
+        return dict(values.marshalled)
     serialized = {}
     for key in values:
         serialized[key] = _marshall_value(values[key])
     return serialized
 
 
+def register_marshaller(value_type, marshaller):
+    """
+    Add support for marshalling another type of value.
+
+    :param type value_type: the type of the values, which also applies
+        to its subclasses
+    :param callable marshaller: function that is called with a value and
+        returns its `AttributeValue`_ dict
+
+    Registered types take precedence over the built-in types for their
+    subclasses, so a subclass of :class:`str` can be registered too.
+
+    .. code:: python
+
+        utils.register_marshaller(decimal.Decimal,
+                                  lambda value: {'N': str(value)})
+        utils.register_marshaller(datetime.date,
+                                  lambda value: {'S': value.isoformat()})
+
+    """
+    _TYPES.insert(0, (value_type, marshaller))
+    _build_marshallers()
+
+
 def _marshall_value(value):
     """
     Recursively transform `value` into an AttributeValue `dict`
@@ -54,56 +89,142 @@ def _marshall_value(value):
     :rtype: dict
     :raises ValueError: for unsupported types
 
-    Return the value as dict indicating the data type and transform or
-    recursively process the value if required.
+    The marshaller is found by the exact type of the value.  Subclasses
+    are resolved once with :func:`isinstance` and then cached by type.
 
     """
-    if PYTHON3 and isinstance(value, bytes):
+    marshaller = _MARSHALLERS.get(value.__class__)
+    if marshaller is None:
+        marshaller = _resolve_marshaller(value)
+    return marshaller(value)
+
+
+def _resolve_marshaller(value):
+    for value_type, marshaller in _TYPES:
+        if isinstance(value, value_type):
+            _MARSHALLERS[value.__class__] = marshaller
+            return marshaller
+    raise ValueError('Unsupported type: %s' % type(value))
+
+
+def _build_marshallers():
+    _MARSHALLERS.clear()
+    for value_type, marshaller in reversed(_TYPES):
+        _MARSHALLERS[value_type] = marshaller
+
+
+def _marshall_binary(value):
+    return {'B': base64.b64encode(value).decode('ascii')}
+
+
+def _marshall_text(value):
+    return {'S': value}
+
+
+def _marshall_str(value):
+    if _is_binary(value):
         return {'B': base64.b64encode(value).decode('ascii')}
-    elif PYTHON3 and isinstance(value, str):
-        return {'S': value}
-    elif not PYTHON3 and isinstance(value, str):
-        if _is_binary(value):
-            return {'B':  base64.b64encode(value).decode('ascii')}
-        return {'S': value}
-    elif isinstance(value, dict):
-        return {'M': marshall(value)}
-    elif isinstance(value, bool):
-        return {'BOOL': value}
-    elif isinstance(value, (int, float)):
-        return {'N': str(value)}
-    elif isinstance(value, datetime.datetime):
-        return {'S': value.isoformat()}
-    elif arrow is not None and isinstance(value, arrow.Arrow):
-        return {'S': value.isoformat()}
-    elif isinstance(value, uuid.UUID):
-        return {'S': str(value)}
-    elif isinstance(value, list):
-        return {'L': [_marshall_value(v) for v in value]}
-    elif isinstance(value, set):
-        if PYTHON3 and all([isinstance(v, bytes) for v in value]):
-            return {'BS': _encode_binary_set(value)}
-        elif PYTHON3 and all([isinstance(v, str) for v in value]):
-            return {'SS': sorted(list(value))}
-        elif all([isinstance(v, (int, float)) for v in value]):
-            return {'NS': sorted([str(v) for v in value])}
-        elif not PYTHON3 and all([isinstance(v, str) for v in value]) and \
-                all([_is_binary(v) for v in value]):
-            return {'BS': _encode_binary_set(value)}
-        elif not PYTHON3 and all([isinstance(v, str) for v in value]) and \
-                all([_is_binary(v) is False for v in value]):
-            return {'SS': sorted(list(value))}
-        else:
+    return {'S': value}
+
+
+def _marshall_dict(value):
+    return {'M': marshall(value)}
+
+
+def _marshall_bool(value):
+    return {'BOOL': value}
+
+
+def _marshall_number(value):
+    return {'N': str(value)}
+
+
+def _marshall_isoformat(value):
+    return {'S': value.isoformat()}
+
+
+def _marshall_uuid(value):
+    return {'S': str(value)}
+
+
+def _marshall_list(value):
+    return {'L': [_marshall_value(v) for v in value]}
+
+
+def _marshall_set(value):
+    """Marshall a set, classifying its members in a single pass."""
+    kind = None
+    for member in value:
+        member_kind = _SET_KINDS.get(member.__class__)
+        if member_kind is None:
+            return _marshall_registered_set(value)
+        if kind is None:
+            kind = member_kind
+        elif member_kind != kind:
             raise ValueError('Can not mix types in a set')
-    elif value is None:
-        return {'NULL': True}
-    raise ValueError('Unsupported type: %s' % type(value))
+    if kind == 'SS':
+        return {'SS': sorted(value)}
+    elif kind == 'NS':
+        return {'NS': sorted([str(v) for v in value])}
+    return {'BS': _encode_binary_set(value)}
+
+
+def _marshall_registered_set(value):
+    """Marshall a set with members of other types, classifying them by
+    the type code that their marshaller returns so that registered
+    number, string, and binary types can be used in sets.
+
+    """
+    kind, members = None, []
+    for member in value:
+        if isinstance(member, bool):
+            raise ValueError('Can not mix types in a set')
+        marshalled = _marshall_value(member)
+        code = next(iter(marshalled))
+        if (len(marshalled) != 1 or code not in _SET_CODES or
+                code != (kind or code)):
+            raise ValueError('Can not mix types in a set')
+        kind = code
+        members.append(marshalled[code])
+    return {kind + 'S': sorted(members)}
+
+
+def _marshall_null(value):
+    return {'NULL': True}
 
 
 def _encode_binary_set(value):
     return sorted([base64.b64encode(v).decode('ascii') for v in value])
 
 
+_SET_CODES = {'S', 'N', 'B'}
+
+if PYTHON3:
+    _TYPES = [(bytes, _marshall_binary),
+              (str, _marshall_text)]
+    _SET_KINDS = {bytes: 'BS', str: 'SS', int: 'NS', float: 'NS'}
+else:
+    _TYPES = [(str, _marshall_str),
+              (TEXT_TYPE, _marshall_text),
+              (long, _marshall_number)]  # noqa: F821
+    _SET_KINDS = {TEXT_TYPE: 'SS', int: 'NS', long: 'NS',  # noqa: F821
+                  float: 'NS'}
+_TYPES.extend([(dict, _marshall_dict),
+               (bool, _marshall_bool),
+               (int, _marshall_number),
+               (float, _marshall_number),
+               (datetime.datetime, _marshall_isoformat),
+               (uuid.UUID, _marshall_uuid),
+               (list, _marshall_list),
+               (set, _marshall_set),
+               (frozenset, _marshall_set),
+               (type(None), _marshall_null)])
+if arrow is not None:
+    _TYPES.append((arrow.Arrow, _marshall_isoformat))
+
+_MARSHALLERS = {}
+_build_marshallers()
+
 
 def unmarshall(values):
     """
@@ -114,9 +235,50 @@ def unmarshall(values):
     :raises ValueError: if an unsupported type code is encountered
 
     """
+    try:
+        return _unmarshall_item(values)
+    except KeyError as error:
+        raise ValueError('Unsupported value type: %s' % error.args[0])
+
+
+def unmarshall_many(items):
+    """
+    Transform a list of items, such as the ``Items`` of a *Query* or
+    *Scan* page, to native dicts.
+
+    :param list items: The items from the DynamoDB response
+    :rtype: list
+    :raises ValueError: if an unsupported type code is encountered
+
+    This is equivalent to calling :func:`unmarshall` for each item
+    without handling the errors of each item separately.
+
+    """
+    try:
+        return [_unmarshall_item(item) for item in items]
+    except KeyError as error:
+        raise ValueError('Unsupported value type: %s' % error.args[0])
+
+
+def _unmarshall_item(values):
+    """Unmarshall the top-level attributes of an item, dispatching on
+    the type code.  Strings and booleans, the most common values, are
+    returned without a function call.
+
+    :param dict values: The marshalled item
+    :rtype: dict
+    :raises KeyError: if an unsupported type code is encountered
+
+    """
+    unmarshallers = _UNMARSHALLERS
     unmarshalled = {}
-    for key in values:
-        unmarshalled[key] = _unmarshall_dict(values[key])
+    for name in values:
+        value = values[name]
+        for key in value:
+            if key == 'S' or key == 'BOOL':
+                unmarshalled[name] = value[key]
+            else:
+                unmarshalled[name] = unmarshallers[key](value[key])
     return unmarshalled
 
 
@@ -129,29 +291,15 @@ def _unmarshall_dict(value):
     :raises ValueError: if an unsupported type code is encountered
 
     """
-    key = list(value.keys()).pop()
-    if key == 'B':
-        return base64.b64decode(value[key].encode('ascii'))
-    elif key == 'BS':
-        return set([base64.b64decode(v.encode('ascii'))
-                    for v in value[key]])
-    elif key == 'BOOL':
-        return value[key]
-    elif key == 'L':
-        return [_unmarshall_dict(v) for v in value[key]]
-    elif key == 'M':
-        return unmarshall(value[key])
-    elif key == 'NULL':
-        return None
-    elif key == 'N':
-        return _to_number(value[key])
-    elif key == 'NS':
-        return set([_to_number(v) for v in value[key]])
-    elif key == 'S':
-        return value[key]
-    elif key == 'SS':
-        return set([v for v in value[key]])
-    raise ValueError('Unsupported value type: %s' % key)
+    for key in value:
+        if key == 'S' or key == 'BOOL':
+            return value[key]
+        try:
+            unmarshaller = _UNMARSHALLERS[key]
+        except KeyError:
+            break
+        return unmarshaller(value[key])
+    raise ValueError('Unsupported value type: %s' % ', '.join(value))
 
 
 def _to_number(value):
@@ -165,6 +313,191 @@ def _to_number(value):
     return float(value) if '.' in value else int(value)
 
 
+def _unmarshall_binary(value):
+    return base64.b64decode(value.encode('ascii'))
+
+
+def _unmarshall_binary_set(value):
+    return set([base64.b64decode(v.encode('ascii')) for v in value])
+
+
+def _unmarshall_list(value):
+    return [_unmarshall_dict(v) for v in value]
+
+
+def _unmarshall_null(value):
+    return None
+
+
+def _unmarshall_number_set(value):
+    return set(map(_to_number, value))
+
+
+def _unmarshall_value(value):
+    return value
+
+
+_UNMARSHALLERS = {'B': _unmarshall_binary,
+                  'BS': _unmarshall_binary_set,
+                  'BOOL': _unmarshall_value,
+                  'L': _unmarshall_list,
+                  'M': unmarshall,
+                  'NULL': _unmarshall_null,
+                  'N': _to_number,
+                  'NS': _unmarshall_number_set,
+                  'S': _unmarshall_value,
+                  'SS': set}
+
+
+class LazyItem(abc.Mapping):
+    """
+    Read-only mapping over a marshalled item that unmarshalls each
+    attribute the first time it is accessed and keeps the result.
+
+    :param dict values: The marshalled item
+
+    Nested maps and lists are returned as :class:`LazyItem` and
+    :class:`LazyList` instances so that their values are only decoded
+    when they are accessed as well.  Checking whether an attribute
+    exists does not decode it.  Items compare equal to the
+    :class:`dict` of their unmarshalled values.
+
+    :ivar dict marshalled: the marshalled item, which :func:`marshall`
+        returns without decoding it
+
+    """
+
+    def __init__(self, values):
+        self.marshalled = values
+        self._cache = {}
+
+    def __getitem__(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            value = self._cache[name] = _unmarshall_lazy(
+                self.marshalled[name])
+            return value
+
+    def __contains__(self, name):
+        return name in self.marshalled
+
+    def __iter__(self):
+        return iter(self.marshalled)
+
+    def __len__(self):
+        return len(self.marshalled)
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.marshalled)
+
+    def to_dict(self):
+        """Return the item as a :class:`dict`, unmarshalling every value.
+
+        :rtype: dict
+
+        """
+        return unmarshall(self.marshalled)
+
+
+class LazyList(abc.Sequence):
+    """
+    Read-only sequence over a marshalled list that unmarshalls each value
+    the first time it is accessed and keeps the result.
+
+    :param list values: The marshalled values
+
+    :ivar list marshalled: the marshalled values
+
+    """
+
+    _missing = object()
+
+    def __init__(self, values):
+        self.marshalled = values
+        self._cache = [self._missing] * len(values)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[offset]
+                    for offset in range(*index.indices(len(self)))]
+        value = self._cache[index]
+        if value is self._missing:
+            value = self._cache[index] = _unmarshall_lazy(
+                self.marshalled[index])
+        return value
+
+    def __len__(self):
+        return len(self.marshalled)
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, LazyList)):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({!r})'.format(self.__class__.__name__, self.marshalled)
+
+    def to_list(self):
+        """Return the values as a :class:`list`, unmarshalling every
+        value.
+
+        :rtype: list
+
+        """
+        return _unmarshall_list(self.marshalled)
+
+
+def _unmarshall_lazy(value):
+    """Unmarshall a value, deferring the values of maps and lists."""
+    for key in value:
+        if key == 'M':
+            return LazyItem(value[key])
+        elif key == 'L':
+            return LazyList(value[key])
+        break
+    return _unmarshall_dict(value)
+
+
+def _marshall_lazy_item(value):
+    return {'M': value.marshalled}
+
+
+def _marshall_lazy_list(value):
+    return {'L': value.marshalled}
+
+
+register_marshaller(LazyItem, _marshall_lazy_item)
+register_marshaller(LazyList, _marshall_lazy_list)
+
+
+def primary_key(values, attributes=None):
+    """
+    Return a hashable representation of a primary key.
+
+    :param dict values: native key values or an unmarshalled item
+    :param list attributes: the key attribute names to extract from
+        `values`.  If unspecified, every key in `values` is used.
+    :rtype: tuple
+
+    The key is returned as a tuple of ``(name, value)`` pairs sorted by
+    attribute name.  Values are normalized the same way that they would
+    be round-tripped through DynamoDB so a :class:`uuid.UUID` in a key
+    matches the string that is returned in the item.
+
+    """
+    if attributes is None:
+        attributes = values.keys()
+    return tuple((name, _unmarshall_dict(_marshall_value(values[name])))
+                 for name in sorted(attributes))
+
+
 def _is_binary(value):
     """
     Check to see if a string contains binary data in Python2
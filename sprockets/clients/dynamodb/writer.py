@@ -0,0 +1,399 @@
+"""
+Write-Behind Buffering
+======================
+
+:class:`BufferedWriter` takes puts and deletes that the caller does not
+need to wait for and writes them in the background with
+*BatchWriteItem* requests, so the latency of the writes is not added to
+the latency of the code that makes them.  A request is sent as soon as
+``flush_items`` writes or ``flush_bytes`` bytes are buffered, and the
+writes that are buffered for longer than ``flush_interval`` seconds are
+sent in a smaller request.  At most ``max_in_flight`` requests are sent
+at the same time.
+
+The writes that are buffered or in flight are limited to
+``max_buffered_bytes``.  The futures returned by :meth:`~BufferedWriter.put`
+and :meth:`~BufferedWriter.delete` resolve once the write was accepted
+into the buffer, so a caller that yields them waits while the buffer is
+full instead of growing it:
+
+.. code:: python
+
+    writer = client.buffered_writer(failure_callback=on_failure)
+    yield writer.put('table', {'id': 'value', 'count': 1})
+
+With ``deduplicate`` enabled, a put or delete replaces the buffered
+write of the same item, so an item that is written several times
+within the ``flush_interval`` is only written once, with its last
+value.  The items are identified by the ``KeySchema`` of the table.  A
+write of an item that is in flight waits for the earlier write to
+complete, so the writes of an item are never reordered.
+
+Without ``deduplicate``, two writes of the same item can end up in the
+same request, which DynamoDB rejects as a whole with a
+:exc:`~sprockets.clients.dynamodb.exceptions.ValidationException`.  The
+futures of the writes have already resolved by then, so the rejection
+only reaches the ``failure_callback``.  Enable ``deduplicate`` when an
+item may be written more than once within the ``flush_interval``.
+
+Writes that fail, or that DynamoDB leaves unprocessed until the
+``timeout`` passes, are passed to the ``failure_callback`` along with
+the error, in the ``request_items`` format of
+:meth:`~sprockets.clients.dynamodb.DynamoDB.batch_write_item`.  Without a
+callback they are logged.  :meth:`~BufferedWriter.close` writes the
+buffered writes before it resolves, so call it when the application
+shuts down.
+
+"""
+import collections
+import functools
+import itertools
+import logging
+
+from tornado import concurrent, gen, ioloop
+
+from . import connector, utils
+
+LOGGER = logging.getLogger(__name__)
+
+#: Default number of buffered bytes that are sent in a single request
+FLUSH_BYTES = 1024 ** 2
+
+#: Default number of seconds that a write is buffered for
+FLUSH_INTERVAL = 1.0
+
+#: Default number of bytes that may be buffered or in flight
+MAX_BUFFERED_BYTES = 16 * 1024 ** 2
+
+
+class BufferedWriter(object):
+    """
+    Buffers puts and deletes, writing them with *BatchWriteItem*
+    requests in the background.
+
+    :param client: the :class:`~sprockets.clients.dynamodb.DynamoDB`
+        client to write with
+    :param int flush_items: the number of buffered writes that are sent
+        in a single request.  At most ``25``.
+    :param int flush_bytes: the number of buffered bytes that are sent
+        in a single request
+    :param float flush_interval: the maximum number of seconds that a
+        write is buffered for before it is sent
+    :param int max_buffered_bytes: the maximum number of bytes of the
+        writes that are buffered or in flight.  Writes above the limit
+        wait for room in the buffer.
+    :param int max_in_flight: the maximum number of requests to have in
+        flight at the same time
+    :param float timeout: the number of seconds to spend re-driving the
+        unprocessed writes of a request before giving up on them
+    :param callable failure_callback: optional function that is called
+        with the ``request_items`` that could not be written and the
+        exception that prevented it, or :data:`None` when the writes
+        were left unprocessed
+    :param bool deduplicate: replace a buffered put or delete of an item
+        with a later put or delete of the same item, so that only the
+        last write of the item is sent.  The key attributes of the
+        tables are read with
+        :meth:`~sprockets.clients.dynamodb.DynamoDB.key_attributes`.
+        Without it, a request with two writes of the same item is
+        rejected by DynamoDB and every write in it is passed to the
+        ``failure_callback``.
+
+    :ivar int replaced: the number of buffered writes that were replaced
+        by a later write of the same item
+
+    """
+
+    def __init__(self, client, flush_items=connector.BATCH_WRITE_LIMIT,
+                 flush_bytes=FLUSH_BYTES, flush_interval=FLUSH_INTERVAL,
+                 max_buffered_bytes=MAX_BUFFERED_BYTES,
+                 max_in_flight=connector.BATCH_CONCURRENCY,
+                 timeout=connector.BATCH_WRITE_TIMEOUT,
+                 failure_callback=None, deduplicate=False):
+        self._client = client
+        self._flush_items = min(flush_items, connector.BATCH_WRITE_LIMIT)
+        self._flush_bytes = flush_bytes
+        self._flush_interval = flush_interval
+        self._max_buffered_bytes = max_buffered_bytes
+        self._max_in_flight = max_in_flight
+        self._timeout = timeout
+        self._failure_callback = failure_callback
+        self._deduplicate = deduplicate
+        self._keys = {}
+        self._lookups = set()
+        self._sequence = itertools.count()
+        self._pending = collections.OrderedDict()
+        self._writing = set()
+        self.replaced = 0
+        self._pending_bytes = 0
+        self._buffered_bytes = 0
+        self._in_flight = 0
+        self._waiters = collections.deque()
+        self._drain_waiters = []
+        self._due = False
+        self._timer = None
+        self._closed = False
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def stats(self):
+        """The number of buffered writes, the bytes that are buffered or
+        in flight, the requests in flight, and the writes that wait for
+        room in the buffer.
+
+        :rtype: dict
+
+        """
+        return {'buffered': len(self._pending),
+                'buffered_bytes': self._buffered_bytes,
+                'in_flight': self._in_flight,
+                'waiting': len(self._waiters)}
+
+    def put(self, table_name, item):
+        """Buffer a put of an item.
+
+        :param str table_name: the table to put the item to
+        :param dict item: the item to put
+        :returns: a future that resolves once the put was buffered.  It
+            fails with :exc:`RuntimeError` when the writer is closed and
+            with :exc:`ValueError` when ``deduplicate`` is enabled and
+            the item lacks one of the table's key attributes.
+        :rtype: tornado.concurrent.Future
+        :raises: :exc:`ValueError` when a value cannot be marshalled
+
+        """
+        return self._add(table_name,
+                         {'PutRequest': {'Item': utils.marshall(item)}})
+
+    def delete(self, table_name, key):
+        """Buffer a delete of an item.
+
+        :param str table_name: the table to delete the item from
+        :param dict key: the primary key of the item
+        :returns: a future that resolves once the delete was buffered.  It
+            fails with :exc:`RuntimeError` when the writer is closed and
+            with :exc:`ValueError` when ``deduplicate`` is enabled and
+            the key lacks one of the table's key attributes.
+        :rtype: tornado.concurrent.Future
+        :raises: :exc:`ValueError` when a value cannot be marshalled
+
+        """
+        return self._add(table_name,
+                         {'DeleteRequest': {'Key': utils.marshall(key)}})
+
+    def flush(self):
+        """Send the buffered writes without waiting for the
+        ``flush_interval``.
+
+        :returns: a future that resolves once every write that was
+            buffered or waiting for room in the buffer was sent and
+            processed
+        :rtype: tornado.concurrent.Future
+
+        """
+        future = concurrent.TracebackFuture()
+        if self._idle:
+            future.set_result(None)
+            return future
+        self._drain_waiters.append(future)
+        self._send()
+        return future
+
+    def close(self):
+        """Stop accepting writes and send the buffered ones.
+
+        :returns: a future that resolves once the buffered writes were
+            processed
+        :rtype: tornado.concurrent.Future
+
+        """
+        self._closed = True
+        return self.flush()
+
+    @property
+    def _idle(self):
+        return not (self._pending or self._waiters or self._in_flight)
+
+    def _add(self, table_name, request):
+        """Queue a marshalled write request for the buffer."""
+        future = concurrent.TracebackFuture()
+        if self._closed:
+            future.set_exception(RuntimeError('BufferedWriter is closed'))
+            return future
+        self._waiters.append((future, table_name, request,
+                              len(self._client._codec.dumps(request))))
+        self._admit()
+        return future
+
+    def _admit(self):
+        """Move the queued writes into the buffer while it has room for
+        them and the key attributes of their tables are known.
+
+        """
+        while self._waiters:
+            future, table_name, request, size = self._waiters[0]
+            if self._deduplicate and table_name not in self._keys:
+                self._lookup(table_name)
+                return
+            if not self._has_room(size):
+                return
+            self._waiters.popleft()
+            try:
+                self._append(table_name, request, size)
+            except ValueError as error:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
+
+    def _lookup(self, table_name):
+        """Look up the key attributes of a table for deduplication."""
+        if table_name in self._lookups:
+            return
+        self._lookups.add(table_name)
+        ioloop.IOLoop.current().add_future(
+            self._client.key_attributes(table_name),
+            functools.partial(self._on_key_attributes, table_name))
+
+    def _on_key_attributes(self, table_name, response):
+        self._lookups.discard(table_name)
+        error = response.exception()
+        if error is None:
+            self._keys[table_name] = response.result()
+        else:
+            failed = [waiter for waiter in self._waiters
+                      if waiter[1] == table_name]
+            self._waiters = collections.deque(
+                waiter for waiter in self._waiters if waiter[1] != table_name)
+            for future, _table_name, _request, _size in failed:
+                future.set_exception(error)
+            self._report({table_name: [request for
+                                       _future, _name, request, _size
+                                       in failed]}, error)
+        self._admit()
+        self._check_idle()
+
+    def _has_room(self, size):
+        return (not self._buffered_bytes or
+                self._buffered_bytes + size <= self._max_buffered_bytes)
+
+    def _append(self, table_name, request, size):
+        """Add a write to the buffer, replacing the buffered write of
+        the same item when deduplicating.
+
+        """
+        if self._deduplicate:
+            entry = (table_name,
+                     connector._write_key(request, self._keys[table_name]))
+            if entry in self._pending:
+                replaced = self._pending[entry][2]
+                self._pending_bytes -= replaced
+                self._buffered_bytes -= replaced
+                self.replaced += 1
+        else:
+            entry = next(self._sequence)
+        self._pending[entry] = (table_name, request, size)
+        self._pending_bytes += size
+        self._buffered_bytes += size
+        if self._full or self._due or self._drain_waiters:
+            self._send()
+        elif self._timer is None:
+            self._timer = ioloop.IOLoop.current().call_later(
+                self._flush_interval, self._on_timer)
+
+    @property
+    def _full(self):
+        return (len(self._pending) >= self._flush_items or
+                self._pending_bytes >= self._flush_bytes)
+
+    def _on_timer(self):
+        self._timer = None
+        self._due = True
+        self._send()
+
+    def _send(self):
+        """Send the buffered writes in requests while there is a full
+        request or the buffered writes are due.  A write of an item that
+        is in flight stays buffered until the earlier write completes,
+        so that the writes of an item are processed in order.
+
+        """
+        while (self._pending and self._in_flight < self._max_in_flight and
+               (self._due or self._full or self._drain_waiters)):
+            entries, size = [], 0
+            for entry, (_table_name, _request, request_size) in \
+                    self._pending.items():
+                if (len(entries) >= self._flush_items or
+                        (entries and
+                         size + request_size > self._flush_bytes)):
+                    break
+                if entry not in self._writing:
+                    entries.append(entry)
+                    size += request_size
+            if not entries:
+                break
+            batch = [self._pending.pop(entry)[:2] for entry in entries]
+            self._writing.update(entries)
+            self._pending_bytes -= size
+            self._in_flight += 1
+            ioloop.IOLoop.current().add_future(
+                self._write(batch),
+                functools.partial(self._on_written, size, entries))
+        if not self._pending:
+            self._due = False
+            if self._timer is not None:
+                ioloop.IOLoop.current().remove_timeout(self._timer)
+                self._timer = None
+
+    @gen.coroutine
+    def _write(self, batch):
+        """Write a batch of marshalled write requests, reporting the
+        writes that failed.
+
+        """
+        request_items = connector._chunk(batch, len(batch))[0]
+        deadline = ioloop.IOLoop.current().time() + self._timeout
+        try:
+            unprocessed = yield self._client._write_chunk(request_items,
+                                                          deadline)
+        except Exception as error:
+            self._report(request_items, error)
+        else:
+            if unprocessed:
+                self._report(unprocessed, None)
+
+    def _report(self, request_items, error):
+        request_items = dict(
+            (table_name, [connector._unmarshall_write_request(request)
+                          for request in requests])
+            for table_name, requests in request_items.items())
+        if self._failure_callback is None:
+            LOGGER.error('Failed to write %i items: %r',
+                         sum(len(requests)
+                             for requests in request_items.values()),
+                         error)
+            return
+        try:
+            self._failure_callback(request_items, error)
+        except Exception:
+            LOGGER.exception('Error in failure callback')
+
+    def _on_written(self, size, entries, _response):
+        self._in_flight -= 1
+        self._buffered_bytes -= size
+        self._writing.difference_update(entries)
+        self._admit()
+        self._send()
+        if self._pending and self._timer is None and not (
+                self._due or self._drain_waiters):
+            self._timer = ioloop.IOLoop.current().call_later(
+                self._flush_interval, self._on_timer)
+        self._check_idle()
+
+    def _check_idle(self):
+        """Resolve the futures of :meth:`flush` once nothing is left."""
+        if self._idle:
+            waiters, self._drain_waiters = self._drain_waiters, []
+            for future in waiters:
+                future.set_result(None)
@@ -1,19 +1,32 @@
 import datetime
+import errno
+import json
 import os
 import socket
 import sys
 import uuid
 import unittest
+from concurrent import futures
 
 import mock
 
 from tornado import concurrent
+from tornado import gen
 from tornado import httpclient
 from tornado import testing
 from tornado_aws import exceptions as aws_exceptions
 
 from sprockets.clients import dynamodb
 from sprockets.clients.dynamodb import exceptions
+from sprockets.clients.dynamodb import expressions
+from sprockets.clients.dynamodb import utils
+from sprockets.clients.dynamodb import streaming
+
+
+def resolved_future(result):
+    future = concurrent.Future()
+    future.set_result(result)
+    return future
 
 
 class AsyncTestCase(testing.AsyncTestCase):
@@ -138,6 +151,183 @@ class AWSClientTests(AsyncTestCase):
             with self.assertRaises(exceptions.RequestException):
                 yield self.client.create_table(self.generic_table_definition())
 
+    @testing.gen_test
+    def test_fetch_future_reset_raises_connection_failure(self):
+        with mock.patch('tornado_aws.client.AsyncAWSClient.fetch') as fetch:
+            future = concurrent.Future()
+            fetch.return_value = future
+            future.set_exception(OSError(errno.ECONNRESET, 'reset'))
+            with self.assertRaises(exceptions.ConnectionFailure):
+                yield self.client.create_table(self.generic_table_definition())
+
+
+class RetryTests(AsyncTestCase):
+
+    def setUp(self):
+        super(RetryTests, self).setUp()
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch')
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('random.uniform', return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_client(self):
+        self.policy = dynamodb.RetryPolicy(rules={
+            exceptions.ThroughputExceeded: 2,
+            exceptions.TimeoutException: 1})
+        return dynamodb.DynamoDB(endpoint=self.endpoint,
+                                 retry_policy=self.policy)
+
+    @staticmethod
+    def throttled():
+        future = concurrent.Future()
+        future.set_exception(aws_exceptions.AWSError(
+            type='com.amazonaws.dynamodb.v20120810#'
+                 'ProvisionedThroughputExceededException',
+            message='throttled'))
+        return future
+
+    @testing.gen_test
+    def test_throttled_request_is_retried(self):
+        response = mock.Mock(body=json.dumps({'TableNames': []}).encode())
+        self.fetch.side_effect = [self.throttled(), self.throttled(),
+                                  resolved_future(response)]
+        result = yield self.client.list_tables()
+        self.assertEqual(result, {'TableNames': []})
+        self.assertEqual(self.fetch.call_count, 3)
+        self.assertEqual(self.policy.retries, 2)
+
+    @testing.gen_test
+    def test_retries_are_limited(self):
+        self.fetch.side_effect = lambda *args, **kwargs: self.throttled()
+        with self.assertRaises(exceptions.ThroughputExceeded):
+            yield self.client.list_tables()
+        self.assertEqual(self.fetch.call_count, 3)
+        self.assertEqual(self.policy.exhausted, 1)
+
+    @testing.gen_test
+    def test_timeouts_are_retried(self):
+        self.fetch.side_effect = httpclient.HTTPError(599)
+        with self.assertRaises(exceptions.TimeoutException):
+            yield self.client.list_tables()
+        self.assertEqual(self.fetch.call_count, 2)
+
+    @testing.gen_test
+    def test_connection_reset_is_retried(self):
+        client = dynamodb.DynamoDB(endpoint=self.endpoint)
+        reset = concurrent.Future()
+        reset.set_exception(OSError(errno.ECONNRESET, 'reset'))
+        response = mock.Mock(body=json.dumps({'TableNames': []}).encode())
+        self.fetch.side_effect = [reset, resolved_future(response)]
+        result = yield client.list_tables()
+        self.assertEqual(result, {'TableNames': []})
+        self.assertEqual(self.fetch.call_count, 2)
+
+    @testing.gen_test
+    def test_server_errors_are_retried(self):
+        client = dynamodb.DynamoDB(endpoint=self.endpoint, retry_policy=(
+            dynamodb.RetryPolicy(rules={exceptions.ServerError: 1})))
+        self.fetch.side_effect = httpclient.HTTPError(503)
+        with self.assertRaises(exceptions.ServerError):
+            yield client.list_tables()
+        self.assertEqual(self.fetch.call_count, 2)
+
+    @testing.gen_test
+    def test_internal_server_error_is_retried(self):
+        client = dynamodb.DynamoDB(endpoint=self.endpoint)
+        error = concurrent.Future()
+        error.set_exception(aws_exceptions.AWSError(
+            type='com.amazonaws.dynamodb.v20120810#InternalServerError',
+            message='boom'))
+        response = mock.Mock(body=json.dumps({'TableNames': []}).encode())
+        self.fetch.side_effect = [error, resolved_future(response)]
+        result = yield client.list_tables()
+        self.assertEqual(result, {'TableNames': []})
+        self.assertEqual(self.fetch.call_count, 2)
+
+    @testing.gen_test
+    def test_unmapped_namespace_is_mapped_by_name(self):
+        error = concurrent.Future()
+        error.set_exception(aws_exceptions.AWSError(
+            type='com.amazon.coral.availability#ThrottlingException',
+            message='throttled'))
+        self.fetch.return_value = error
+        client = dynamodb.DynamoDB(endpoint=self.endpoint, retry_policy=(
+            dynamodb.RetryPolicy(rules={})))
+        with self.assertRaises(exceptions.ThrottlingException):
+            yield client.list_tables()
+
+    @testing.gen_test
+    def test_update_item_is_not_retried_after_timeout(self):
+        self.fetch.side_effect = httpclient.HTTPError(599)
+        with self.assertRaises(exceptions.TimeoutException):
+            yield self.client.update_item(
+                'table', {'id': 'a'}, update_expression='ADD hits :one',
+                expression_attribute_values={':one': 1})
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertEqual(self.policy.calls, 1)
+
+    @testing.gen_test
+    def test_update_item_is_retried_when_throttled(self):
+        response = mock.Mock(body=json.dumps({}).encode())
+        self.fetch.side_effect = [self.throttled(), resolved_future(response)]
+        yield self.client.update_item(
+            'table', {'id': 'a'}, update_expression='ADD hits :one',
+            expression_attribute_values={':one': 1})
+        self.assertEqual(self.fetch.call_count, 2)
+
+    @testing.gen_test
+    def test_conditional_put_item_is_not_retried_after_timeout(self):
+        self.fetch.side_effect = httpclient.HTTPError(599)
+        with self.assertRaises(exceptions.TimeoutException):
+            yield self.client.put_item(
+                'table', {'id': 'a'},
+                condition_expression='attribute_not_exists(id)')
+        self.assertEqual(self.fetch.call_count, 1)
+
+    @testing.gen_test
+    def test_put_item_is_retried_after_timeout(self):
+        self.fetch.side_effect = httpclient.HTTPError(599)
+        with self.assertRaises(exceptions.TimeoutException):
+            yield self.client.put_item('table', {'id': 'a'})
+        self.assertEqual(self.fetch.call_count, 2)
+
+    @testing.gen_test
+    def test_retry_writes_retries_update_item_after_timeout(self):
+        client = dynamodb.DynamoDB(endpoint=self.endpoint, retry_writes=True,
+                                   retry_policy=self.policy)
+        self.fetch.side_effect = httpclient.HTTPError(599)
+        with self.assertRaises(exceptions.TimeoutException):
+            yield client.update_item(
+                'table', {'id': 'a'}, update_expression='ADD hits :one',
+                expression_attribute_values={':one': 1})
+        self.assertEqual(self.fetch.call_count, 2)
+
+    @testing.gen_test
+    def test_client_errors_are_not_retried(self):
+        client = dynamodb.DynamoDB(endpoint=self.endpoint)
+        self.fetch.side_effect = httpclient.HTTPError(400)
+        with self.assertRaises(exceptions.RequestException):
+            yield client.list_tables()
+        self.assertEqual(self.fetch.call_count, 1)
+
+    @testing.gen_test
+    def test_other_errors_are_not_retried(self):
+        self.fetch.side_effect = aws_exceptions.NoCredentialsError()
+        with self.assertRaises(exceptions.NoCredentialsError):
+            yield self.client.list_tables()
+        self.assertEqual(self.fetch.call_count, 1)
+
+    @testing.gen_test
+    def test_retries_can_be_disabled(self):
+        client = dynamodb.DynamoDB(endpoint=self.endpoint, retry_policy=None)
+        self.fetch.side_effect = lambda *args, **kwargs: self.throttled()
+        with self.assertRaises(exceptions.ThroughputExceeded):
+            yield client.list_tables()
+        self.assertEqual(self.fetch.call_count, 1)
+
+
 class CreateTableTests(AsyncTestCase):
 
     @testing.gen_test
@@ -248,3 +438,1071 @@ class PutGetDeleteTests(AsyncTestCase):
         response = yield self.client.get_item(definition['TableName'],
                                               {'id': row_id})
         self.assertEqual(response['id'], str(row_id))
+
+    @testing.gen_test
+    def test_batch_get_item(self):
+        definition = self.generic_table_definition()
+        response = yield self.client.create_table(definition)
+        self.assertEqual(response['TableName'], definition['TableName'])
+
+        row_ids = [uuid.uuid4() for _ in range(3)]
+        for row_id in row_ids:
+            yield self.client.put_item(definition['TableName'],
+                                       {'id': row_id, 'value': 1})
+
+        keys = [{'id': row_id} for row_id in row_ids]
+        keys.append({'id': uuid.uuid4()})
+        response = yield self.client.batch_get_item(
+            {definition['TableName']: keys})
+        items = response[definition['TableName']]
+        self.assertEqual(len(items), 3)
+        for row_id in row_ids:
+            self.assertEqual(items[utils.primary_key({'id': row_id})],
+                             {'id': str(row_id), 'value': 1})
+
+    @testing.gen_test
+    def test_batch_write_item(self):
+        definition = self.generic_table_definition()
+        response = yield self.client.create_table(definition)
+        self.assertEqual(response['TableName'], definition['TableName'])
+
+        row_ids = [uuid.uuid4() for _ in range(30)]
+        response = yield self.client.batch_write_item(
+            {definition['TableName']: [
+                {'PutRequest': {'Item': {'id': row_id, 'value': 1}}}
+                for row_id in row_ids]})
+        self.assertEqual(response, {})
+
+        response = yield self.client.get_item(definition['TableName'],
+                                              {'id': row_ids[-1]})
+        self.assertEqual(response['id'], str(row_ids[-1]))
+
+        response = yield self.client.batch_write_item(
+            {definition['TableName']: [
+                {'DeleteRequest': {'Key': {'id': row_id}}}
+                for row_id in row_ids]})
+        self.assertEqual(response, {})
+
+        response = yield self.client.get_item(definition['TableName'],
+                                              {'id': row_ids[-1]})
+        self.assertEqual(response, {})
+
+    @testing.gen_test
+    def test_query(self):
+        definition = self.generic_table_definition()
+        response = yield self.client.create_table(definition)
+        self.assertEqual(response['TableName'], definition['TableName'])
+
+        row_id = uuid.uuid4()
+        yield self.client.put_item(definition['TableName'],
+                                   {'id': row_id, 'value': 1})
+        iterator = self.client.query_iterator(
+            definition['TableName'], key_condition_expression='id = :id',
+            expression_attribute_values={':id': {'S': str(row_id)}})
+        items = yield iterator.to_list()
+        self.assertEqual(items, [{'id': str(row_id), 'value': 1}])
+
+
+class BatchGetItemTests(AsyncTestCase):
+
+    def setUp(self):
+        super(BatchGetItemTests, self).setUp()
+        self.requests = []
+        patcher = mock.patch.object(self.client, 'execute',
+                                    side_effect=self.execute)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            'sprockets.clients.dynamodb.connector._backoff', return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def execute(self, function, body):
+        self.requests.append((function, body))
+        responses = {}
+        for table_name, spec in body['RequestItems'].items():
+            responses[table_name] = [
+                dict(key, value={'S': 'value-' + key['id']['S']})
+                for key in spec['Keys']]
+        return resolved_future({'Responses': responses,
+                                'UnprocessedKeys': {}})
+
+    @testing.gen_test
+    def test_keys_are_chunked(self):
+        keys = [{'id': str(value)} for value in range(250)]
+        result = yield self.client.batch_get_item({'table': keys})
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(
+            sorted(len(body['RequestItems']['table']['Keys'])
+                   for _function, body in self.requests), [50, 100, 100])
+        self.assertEqual(len(result['table']), 250)
+        self.assertEqual(result['table'][utils.primary_key({'id': '42'})],
+                         {'id': '42', 'value': 'value-42'})
+
+    @testing.gen_test
+    def test_multiple_tables_share_chunks(self):
+        result = yield self.client.batch_get_item({
+            'one': [{'id': 'a'}],
+            'two': {'Keys': [{'id': 'b'}], 'ConsistentRead': True}})
+        self.assertEqual(len(self.requests), 1)
+        request_items = self.requests[0][1]['RequestItems']
+        self.assertTrue(request_items['two']['ConsistentRead'])
+        self.assertEqual(set(result['one']), {(('id', 'a'),)})
+        self.assertEqual(set(result['two']), {(('id', 'b'),)})
+
+    @testing.gen_test
+    def test_duplicate_keys_are_removed(self):
+        row_id = uuid.uuid4()
+        result = yield self.client.batch_get_item(
+            {'table': [{'id': row_id}, {'id': str(row_id)}]})
+        keys = self.requests[0][1]['RequestItems']['table']['Keys']
+        self.assertEqual(keys, [{'id': {'S': str(row_id)}}])
+        self.assertIn(utils.primary_key({'id': row_id}), result['table'])
+
+    @testing.gen_test
+    def test_projection_includes_key_attributes(self):
+        yield self.client.batch_get_item(
+            {'table': {'Keys': [{'id': 'a'}],
+                       'ProjectionExpression': '#v',
+                       'ExpressionAttributeNames': {'#v': 'value'}}})
+        spec = self.requests[0][1]['RequestItems']['table']
+        self.assertEqual(spec['ProjectionExpression'], '#v,#pk0')
+        self.assertEqual(spec['ExpressionAttributeNames'],
+                         {'#v': 'value', '#pk0': 'id'})
+
+    @testing.gen_test
+    def test_projection_keeps_caller_placeholders(self):
+        yield self.client.batch_get_item(
+            {'table': {'Keys': [{'id': 'a', 'sk': 1}],
+                       'ProjectionExpression': '#pk0, sk',
+                       'ExpressionAttributeNames': {'#pk0': 'value'}}})
+        spec = self.requests[0][1]['RequestItems']['table']
+        self.assertEqual(spec['ProjectionExpression'], '#pk0, sk,#pk1')
+        self.assertEqual(spec['ExpressionAttributeNames'],
+                         {'#pk0': 'value', '#pk1': 'id'})
+
+    @testing.gen_test
+    def test_unprocessed_keys_are_redriven(self):
+        responses = [
+            {'Responses': {'table': [{'id': {'S': 'a'}}]},
+             'UnprocessedKeys': {'table': {'Keys': [{'id': {'S': 'b'}}]}}},
+            {'Responses': {'table': [{'id': {'S': 'b'}}]}}]
+        self.client.execute.side_effect = lambda function, body: \
+            resolved_future(responses.pop(0))
+        result = yield self.client.batch_get_item(
+            {'table': [{'id': 'a'}, {'id': 'b'}]})
+        self.assertEqual(self.client.execute.call_count, 2)
+        self.assertEqual(self.client.execute.call_args[0][1],
+                         {'RequestItems': {
+                             'table': {'Keys': [{'id': {'S': 'b'}}]}}})
+        self.assertEqual(len(result['table']), 2)
+
+    @testing.gen_test
+    def test_unprocessed_keys_raise_after_max_attempts(self):
+        self.client.execute.side_effect = lambda function, body: \
+            resolved_future({'Responses': {},
+                             'UnprocessedKeys': body['RequestItems']})
+        with self.assertRaises(exceptions.ThroughputExceeded):
+            yield self.client.batch_get_item({'table': [{'id': 'a'}]},
+                                             max_attempts=3)
+        self.assertEqual(self.client.execute.call_count, 3)
+
+    @testing.gen_test
+    def test_concurrency_is_bounded(self):
+        in_flight, peak = [], []
+
+        def execute(function, body):
+            future = concurrent.Future()
+            in_flight.append(future)
+            peak.append(len(in_flight))
+
+            def complete():
+                in_flight.remove(future)
+                future.set_result({'Responses': {}})
+            self.io_loop.add_callback(complete)
+            return future
+
+        self.client.execute.side_effect = execute
+        keys = [{'id': str(value)} for value in range(1000)]
+        yield self.client.batch_get_item({'table': keys}, max_concurrency=3)
+        self.assertEqual(len(peak), 10)
+        self.assertEqual(max(peak), 3)
+
+
+class BatchWriteItemTests(AsyncTestCase):
+
+    def setUp(self):
+        super(BatchWriteItemTests, self).setUp()
+        patcher = mock.patch.object(
+            self.client, 'execute',
+            side_effect=lambda function, body: resolved_future({}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch(
+            'sprockets.clients.dynamodb.connector._backoff', return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @testing.gen_test
+    def test_requests_are_chunked_and_marshalled(self):
+        row_id = uuid.uuid4()
+        requests = [{'PutRequest': {'Item': {'id': str(value), 'n': value}}}
+                    for value in range(60)]
+        requests.append({'DeleteRequest': {'Key': {'id': row_id}}})
+        result = yield self.client.batch_write_item({'table': requests})
+        self.assertEqual(result, {})
+        bodies = [call[0][1] for call in self.client.execute.call_args_list]
+        self.assertEqual(
+            [len(body['RequestItems']['table']) for body in bodies],
+            [25, 25, 11])
+        self.assertEqual(bodies[0]['RequestItems']['table'][1],
+                         {'PutRequest': {'Item': {'id': {'S': '1'},
+                                                  'n': {'N': '1'}}}})
+        self.assertEqual(
+            bodies[2]['RequestItems']['table'][-1],
+            {'DeleteRequest': {'Key': {'id': {'S': str(row_id)}}}})
+
+    @testing.gen_test
+    def test_invalid_request_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            yield self.client.batch_write_item(
+                {'table': [{'UpdateRequest': {}}]})
+
+    @testing.gen_test
+    def test_unprocessed_items_are_redriven(self):
+        unprocessed = {
+            'table': [{'DeleteRequest': {'Key': {'id': {'S': 'b'}}}}]}
+        responses = [{'UnprocessedItems': unprocessed}, {}]
+        self.client.execute.side_effect = lambda function, body: \
+            resolved_future(responses.pop(0))
+        result = yield self.client.batch_write_item(
+            {'table': [{'DeleteRequest': {'Key': {'id': 'a'}}},
+                       {'DeleteRequest': {'Key': {'id': 'b'}}}]})
+        self.assertEqual(result, {})
+        self.assertEqual(self.client.execute.call_args[0][1],
+                         {'RequestItems': unprocessed})
+
+    @testing.gen_test
+    def test_unprocessed_items_returned_after_timeout(self):
+        self.client.execute.side_effect = lambda function, body: \
+            resolved_future({'UnprocessedItems': body['RequestItems']})
+        with mock.patch('sprockets.clients.dynamodb.connector._backoff',
+                        return_value=1):
+            result = yield self.client.batch_write_item(
+                {'table': [{'PutRequest': {'Item': {'id': 'a'}}}]},
+                timeout=0.5)
+        self.assertEqual(self.client.execute.call_count, 1)
+        self.assertEqual(result,
+                         {'table': [{'PutRequest': {'Item': {'id': 'a'}}}]})
+
+    @testing.gen_test
+    def test_deduplicate_sends_last_write(self):
+        self.client.describe_table = mock.Mock(return_value=resolved_future(
+            {'KeySchema': [{'AttributeName': 'id', 'KeyType': 'HASH'}]}))
+        result = yield self.client.batch_write_item(
+            {'table': [{'PutRequest': {'Item': {'id': 'a', 'n': 1}}},
+                       {'PutRequest': {'Item': {'id': 'b', 'n': 1}}},
+                       {'PutRequest': {'Item': {'id': 'a', 'n': 2}}}]},
+            deduplicate=True)
+        self.assertEqual(result, {})
+        self.assertEqual(
+            self.client.execute.call_args[0][1]['RequestItems']['table'],
+            [{'PutRequest': {'Item': {'id': {'S': 'a'}, 'n': {'N': '2'}}}},
+             {'PutRequest': {'Item': {'id': {'S': 'b'}, 'n': {'N': '1'}}}}])
+
+    @testing.gen_test
+    def test_key_attributes_are_cached(self):
+        self.client.describe_table = mock.Mock(return_value=resolved_future(
+            {'KeySchema': [{'AttributeName': 'id', 'KeyType': 'HASH'},
+                           {'AttributeName': 'ts', 'KeyType': 'RANGE'}]}))
+        first, second = yield [self.client.key_attributes('table'),
+                               self.client.key_attributes('table')]
+        self.assertEqual(first, ('id', 'ts'))
+        self.assertEqual(second, ('id', 'ts'))
+        self.client.describe_table.assert_called_once_with('table')
+
+
+class UpdateDeleteItemTests(AsyncTestCase):
+
+    def setUp(self):
+        super(UpdateDeleteItemTests, self).setUp()
+        patcher = mock.patch.object(
+            self.client, 'execute',
+            return_value=resolved_future({'Attributes': {}}))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @testing.gen_test
+    def test_update_item_payload(self):
+        yield self.client.update_item(
+            'table', {'id': 'a'}, update_expression='ADD #n :n',
+            expression_attribute_names={'#n': 'count'},
+            expression_attribute_values={':n': {'N': '1'}},
+            return_values='UPDATED_NEW')
+        self.client.execute.assert_called_once_with('UpdateItem', {
+            'TableName': 'table', 'Key': {'id': {'S': 'a'}},
+            'UpdateExpression': 'ADD #n :n',
+            'ExpressionAttributeNames': {'#n': 'count'},
+            'ExpressionAttributeValues': {':n': {'N': '1'}},
+            'ReturnValues': 'UPDATED_NEW'})
+
+    @testing.gen_test
+    def test_update_item_return_values_true_returns_old_item(self):
+        yield self.client.update_item(
+            'table', {'id': 'a'}, return_values=True,
+            update_expression='REMOVE #n',
+            expression_attribute_names={'#n': 'count'})
+        self.client.execute.assert_called_once_with('UpdateItem', {
+            'TableName': 'table', 'Key': {'id': {'S': 'a'}},
+            'UpdateExpression': 'REMOVE #n',
+            'ExpressionAttributeNames': {'#n': 'count'},
+            'ReturnValues': 'ALL_OLD'})
+
+    @testing.gen_test
+    def test_delete_item_payload(self):
+        yield self.client.delete_item(
+            'table', {'id': 'a'}, return_values=True,
+            **expressions.condition({'version': 2}))
+        self.client.execute.assert_called_once_with('DeleteItem', {
+            'TableName': 'table', 'Key': {'id': {'S': 'a'}},
+            'ConditionExpression': '#n0 = :v0',
+            'ExpressionAttributeNames': {'#n0': 'version'},
+            'ExpressionAttributeValues': {':v0': {'N': '2'}},
+            'ReturnValues': 'ALL_OLD'})
+
+
+class CoalescedGetItemTests(AsyncTestCase):
+
+    def setUp(self):
+        super(CoalescedGetItemTests, self).setUp()
+        patcher = mock.patch.object(self.client, 'execute',
+                                    side_effect=self.execute)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_client(self):
+        return dynamodb.DynamoDB(endpoint=self.endpoint, coalesce_reads=True)
+
+    @staticmethod
+    def execute(function, body):
+        if function == 'GetItem':
+            return resolved_future(utils.unmarshall(body['Key']))
+        responses = {}
+        for table_name, spec in body['RequestItems'].items():
+            responses[table_name] = [key for key in spec['Keys']
+                                     if key['id']['S'] != 'missing']
+        return resolved_future({'Responses': responses})
+
+    @testing.gen_test
+    def test_calls_in_same_iteration_are_combined(self):
+        responses = yield [self.client.get_item('one', {'id': 'a'}),
+                           self.client.get_item('one', {'id': 'b'}),
+                           self.client.get_item('two', {'id': 'c'}),
+                           self.client.get_item('one', {'id': 'missing'})]
+        self.assertEqual(responses,
+                         [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}, {}])
+        self.assertEqual(self.client.execute.call_count, 1)
+        function, body = self.client.execute.call_args[0]
+        self.assertEqual(function, 'BatchGetItem')
+        self.assertEqual(len(body['RequestItems']['one']['Keys']), 3)
+
+    @testing.gen_test
+    def test_incompatible_calls_are_not_combined(self):
+        responses = yield [
+            self.client.get_item('one', {'id': 'a'}),
+            self.client.get_item('one', {'id': 'b'}, consistent_read=True),
+            self.client.get_item('one', {'id': 'c'},
+                                 projection_expression='id')]
+        self.assertEqual(responses, [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}])
+        self.assertEqual(self.client.execute.call_count, 3)
+        bodies = [call[0][1] for call in self.client.execute.call_args_list]
+        self.assertEqual(
+            sorted(body['RequestItems']['one']['Keys'][0]['id']['S']
+                   for body in bodies), ['a', 'b', 'c'])
+
+    @testing.gen_test
+    def test_calls_in_later_iterations_are_not_combined(self):
+        response = yield self.client.get_item('one', {'id': 'a'})
+        self.assertEqual(response, {'id': 'a'})
+        response = yield self.client.get_item('one', {'id': 'b'})
+        self.assertEqual(response, {'id': 'b'})
+        self.assertEqual(self.client.execute.call_count, 2)
+
+    @testing.gen_test
+    def test_window_combines_later_calls(self):
+        self.client._coalesce_window = 0.01
+        first = self.client.get_item('one', {'id': 'a'})
+        yield gen.moment
+        second = self.client.get_item('one', {'id': 'b'})
+        responses = yield [first, second]
+        self.assertEqual(responses, [{'id': 'a'}, {'id': 'b'}])
+        self.assertEqual(self.client.execute.call_count, 1)
+
+    @testing.gen_test
+    def test_consumed_capacity_calls_are_not_combined(self):
+        response = yield self.client.get_item(
+            'one', {'id': 'a'}, return_consumed_capacity='TOTAL')
+        self.assertEqual(response, {'id': 'a'})
+        self.assertEqual(self.client.execute.call_args[0][0], 'GetItem')
+
+    @testing.gen_test
+    def test_batch_errors_are_raised_to_each_caller(self):
+        future = concurrent.Future()
+        future.set_exception(exceptions.InternalFailure())
+        self.client.execute.side_effect = None
+        self.client.execute.return_value = future
+        first = self.client.get_item('one', {'id': 'a'})
+        second = self.client.get_item('two', {'id': 'b'})
+        for future in (first, second):
+            with self.assertRaises(exceptions.InternalFailure):
+                yield future
+
+    @testing.gen_test
+    def test_unsupported_key_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            yield self.client.get_item('one', {'id': self})
+        self.assertFalse(self.client.execute.called)
+
+
+class DeduplicatedReadTests(AsyncTestCase):
+
+    def setUp(self):
+        super(DeduplicatedReadTests, self).setUp()
+        self.responses = []
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch',
+                             side_effect=self.fetch)
+        self.fetch_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_client(self):
+        return dynamodb.DynamoDB(endpoint=self.endpoint,
+                                 deduplicate_reads=True, retry_policy=None)
+
+    def fetch(self, method, path, body, headers):
+        future = concurrent.Future()
+        self.responses.append(future)
+        return future
+
+    def respond(self, result):
+        response = mock.Mock(body=json.dumps(result).encode('utf-8'))
+        for future in self.responses:
+            future.set_result(response)
+
+    @testing.gen_test
+    def test_identical_reads_share_a_request(self):
+        futures = [self.client.get_item('table', {'id': 'a'})
+                   for _ in range(3)]
+        self.assertEqual(self.fetch_mock.call_count, 1)
+        self.respond({'Item': {'id': {'S': 'a'}}})
+        responses = yield futures
+        self.assertEqual(responses, [{'id': 'a'}] * 3)
+
+    @testing.gen_test
+    def test_completed_reads_are_not_shared(self):
+        future = self.client.describe_table('table')
+        self.respond({'Table': {'TableName': 'table'}})
+        yield future
+        self.client.describe_table('table')
+        self.assertEqual(self.fetch_mock.call_count, 2)
+
+    @testing.gen_test
+    def test_errors_are_raised_to_each_caller(self):
+        futures = [self.client.get_item('table', {'id': 'a'})
+                   for _ in range(2)]
+        self.responses[0].set_exception(httpclient.HTTPError(599))
+        for future in futures:
+            with self.assertRaises(exceptions.TimeoutException):
+                yield future
+
+    def test_different_reads_are_not_shared(self):
+        self.client.get_item('table', {'id': 'a'})
+        self.client.get_item('table', {'id': 'b'})
+        self.assertEqual(self.fetch_mock.call_count, 2)
+
+    def test_consistent_reads_are_not_shared(self):
+        for _ in range(2):
+            self.client.get_item('table', {'id': 'a'}, consistent_read=True)
+        self.assertEqual(self.fetch_mock.call_count, 2)
+
+    def test_writes_are_not_shared(self):
+        for _ in range(2):
+            self.client.put_item('table', {'id': 'a'})
+        self.assertEqual(self.fetch_mock.call_count, 2)
+
+
+class CachedGetItemTests(AsyncTestCase):
+
+    def setUp(self):
+        super(CachedGetItemTests, self).setUp()
+        patcher = mock.patch.object(self.client, 'execute',
+                                    side_effect=self.execute)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_client(self):
+        self.cache = dynamodb.ItemCache()
+        return dynamodb.DynamoDB(endpoint=self.endpoint,
+                                 item_cache=self.cache)
+
+    @staticmethod
+    def execute(function, body):
+        if function == 'GetItem':
+            return resolved_future(
+                {} if body['Key']['id']['S'] == 'missing'
+                else dict(utils.unmarshall(body['Key']), value=1))
+        return resolved_future({})
+
+    @testing.gen_test
+    def test_hits_are_served_from_cache(self):
+        first = yield self.client.get_item('table', {'id': 'a'})
+        first['value'] = 2
+        second = yield self.client.get_item('table', {'id': 'a'})
+        self.assertEqual(second, {'id': 'a', 'value': 1})
+        self.assertEqual(self.client.execute.call_count, 1)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    @testing.gen_test
+    def test_missing_items_are_not_cached(self):
+        for _ in range(2):
+            response = yield self.client.get_item('table', {'id': 'missing'})
+            self.assertEqual(response, {})
+        self.assertEqual(self.client.execute.call_count, 2)
+
+    @testing.gen_test
+    def test_missing_items_are_cached_with_absent_ttl(self):
+        self.cache.absent_ttl = 5
+        for _ in range(2):
+            response = yield self.client.get_item('table', {'id': 'missing'})
+            self.assertEqual(response, {})
+        self.assertEqual(self.client.execute.call_count, 1)
+        self.assertEqual(self.cache.absent_hits, 1)
+
+    @testing.gen_test
+    def test_put_item_replaces_missing_item(self):
+        self.cache.absent_ttl = 5
+        yield self.client.get_item('table', {'id': 'missing'})
+        yield self.client.put_item('table', {'id': 'missing', 'value': 3})
+        response = yield self.client.get_item('table', {'id': 'missing'})
+        self.assertEqual(response, {'id': 'missing', 'value': 3})
+
+    @testing.gen_test
+    def test_consistent_reads_bypass_cache(self):
+        yield self.client.get_item('table', {'id': 'a'})
+        yield self.client.get_item('table', {'id': 'a'}, consistent_read=True)
+        self.assertEqual(self.client.execute.call_count, 2)
+        self.assertEqual(self.cache.hits, 0)
+
+    @testing.gen_test
+    def test_projections_bypass_cache(self):
+        for _ in range(2):
+            yield self.client.get_item('table', {'id': 'a'},
+                                       projection_expression='id')
+        self.assertEqual(self.client.execute.call_count, 2)
+        self.assertEqual(len(self.cache), 0)
+
+    @testing.gen_test
+    def test_put_item_updates_cache(self):
+        yield self.client.get_item('table', {'id': 'a'})
+        yield self.client.put_item('table', {'id': 'a', 'value': 3})
+        response = yield self.client.get_item('table', {'id': 'a'})
+        self.assertEqual(response, {'id': 'a', 'value': 3})
+        self.assertEqual(self.client.execute.call_count, 2)
+
+    @testing.gen_test
+    def test_failed_put_item_invalidates_cache(self):
+        yield self.client.get_item('table', {'id': 'a'})
+        future = concurrent.Future()
+        future.set_exception(exceptions.ConditionalCheckFailedException())
+        self.client.execute.side_effect = None
+        self.client.execute.return_value = future
+        with self.assertRaises(exceptions.ConditionalCheckFailedException):
+            yield self.client.put_item('table', {'id': 'a', 'value': 3})
+        self.assertEqual(len(self.cache), 0)
+
+    @testing.gen_test
+    def test_read_during_write_is_not_cached(self):
+        read = concurrent.Future()
+        self.client.execute.side_effect = None
+        self.client.execute.return_value = read
+        future = self.client.get_item('table', {'id': 'a'})
+        self.client.execute.side_effect = self.execute
+        yield self.client.put_item('table', {'id': 'a', 'value': 3})
+        read.set_result({'id': 'a', 'value': 1})
+        response = yield future
+        self.assertEqual(response, {'id': 'a', 'value': 1})
+        self.assertEqual(self.cache.get('table', (('id', 'a'),)),
+                         {'id': 'a', 'value': 3})
+
+    @testing.gen_test
+    def test_batch_write_item_invalidates_cache(self):
+        yield self.client.get_item('table', {'id': 'a'})
+        yield self.client.get_item('table', {'id': 'b'})
+        yield self.client.batch_write_item(
+            {'table': [{'PutRequest': {'Item': {'id': 'a', 'value': 3}}},
+                       {'DeleteRequest': {'Key': {'id': 'b'}}}]})
+        self.assertEqual(len(self.cache), 0)
+
+
+class RateLimitedTests(AsyncTestCase):
+
+    def setUp(self):
+        super(RateLimitedTests, self).setUp()
+        self.bodies = []
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch',
+                             side_effect=self.fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_client(self):
+        self.limiter = dynamodb.CapacityLimiter()
+        self.limiter.set_rate('table', 1000, 1000)
+        return dynamodb.DynamoDB(endpoint=self.endpoint,
+                                 rate_limiter=self.limiter)
+
+    def fetch(self, method, path, body, headers):
+        self.bodies.append(json.loads(body.decode('utf-8')))
+        return resolved_future(mock.Mock(body=json.dumps({
+            'Item': {'id': {'S': 'a'}},
+            'ConsumedCapacity': {'TableName': 'table',
+                                 'CapacityUnits': 1500,
+                                 'Table': {'CapacityUnits': 1500}}}).encode()))
+
+    @testing.gen_test
+    def test_consumed_capacity_is_requested_and_discarded(self):
+        result = yield self.client.get_item('table', {'id': 'a'})
+        self.assertEqual(result, {'id': 'a'})
+        self.assertEqual(self.bodies[0]['ReturnConsumedCapacity'], 'INDEXES')
+
+    @testing.gen_test
+    def test_requested_consumed_capacity_is_returned(self):
+        result = yield self.client.put_item('table', {'id': 'a'},
+                                            return_consumed_capacity='TOTAL')
+        self.assertEqual(result['ConsumedCapacity'],
+                         {'TableName': 'table', 'CapacityUnits': 1500})
+        self.assertEqual(self.bodies[0]['ReturnConsumedCapacity'], 'INDEXES')
+        self.assertAlmostEqual(
+            self.limiter.delay('PutItem', {'TableName': 'table'}), 0.5,
+            places=2)
+
+    @testing.gen_test
+    def test_no_consumed_capacity_still_debits_buckets(self):
+        result = yield self.client.put_item('table', {'id': 'a'},
+                                            return_consumed_capacity='NONE')
+        self.assertNotIn('ConsumedCapacity', result)
+        self.assertEqual(self.bodies[0]['ReturnConsumedCapacity'], 'INDEXES')
+        self.assertAlmostEqual(
+            self.limiter.delay('PutItem', {'TableName': 'table'}), 0.5,
+            places=2)
+
+    @testing.gen_test
+    def test_requests_wait_for_capacity(self):
+        yield self.client.get_item('table', {'id': 'a'})
+        with mock.patch('tornado.gen.sleep',
+                        side_effect=gen.sleep) as sleep:
+            yield self.client.get_item('table', {'id': 'a'})
+        self.assertEqual(len(sleep.call_args_list), 1)
+        self.assertAlmostEqual(sleep.call_args[0][0], 0.5, places=2)
+
+    @testing.gen_test
+    def test_unlimited_tables_are_not_changed(self):
+        yield self.client.get_item('other', {'id': 'a'})
+        self.assertNotIn('ReturnConsumedCapacity', self.bodies[0])
+
+    @testing.gen_test
+    def test_configure_rate_limits_from_provisioned_throughput(self):
+        client = dynamodb.DynamoDB(endpoint=self.endpoint)
+        description = {
+            'TableName': 'table',
+            'ProvisionedThroughput': {'ReadCapacityUnits': 10,
+                                      'WriteCapacityUnits': 4}}
+        with mock.patch.object(client, 'describe_table',
+                               return_value=resolved_future(description)):
+            yield client.configure_rate_limits('table', fraction=0.5)
+        self.assertEqual(
+            client._rate_limiter.delay('GetItem', {'TableName': 'table'}), 0)
+        self.assertEqual(
+            client._rate_limiter._buckets[('table', None, 'write')].rate, 2)
+
+
+class ConcurrencyLimitedTests(AsyncTestCase):
+
+    def setUp(self):
+        super(ConcurrencyLimitedTests, self).setUp()
+        self.responses = []
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch',
+                             side_effect=self.fetch)
+        self.fetch_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_client(self):
+        self.limiter = dynamodb.AdaptiveLimiter(initial_limit=2)
+        return dynamodb.DynamoDB(endpoint=self.endpoint, retry_policy=None,
+                                 concurrency_limiter=self.limiter)
+
+    def fetch(self, method, path, body, headers):
+        future = concurrent.Future()
+        self.responses.append(future)
+        return future
+
+    def test_max_clients_follows_the_limiter(self):
+        self.assertEqual(self.client._args['max_clients'],
+                         self.limiter.max_limit)
+
+    @testing.gen_test
+    def test_requests_above_the_limit_wait(self):
+        futures = [self.client.list_tables() for _ in range(3)]
+        self.assertEqual(self.fetch_mock.call_count, 2)
+        self.assertEqual(len(self.limiter), 1)
+        self.responses[0].set_result(
+            mock.Mock(body=json.dumps({'TableNames': []}).encode()))
+        yield futures[0]
+        yield gen.moment
+        self.assertEqual(self.fetch_mock.call_count, 3)
+
+    @testing.gen_test
+    def test_errors_release_the_slot(self):
+        future = self.client.list_tables()
+        self.responses[0].set_exception(httpclient.HTTPError(599))
+        with self.assertRaises(exceptions.TimeoutException):
+            yield future
+        self.assertEqual(self.limiter.in_flight, 0)
+        self.assertLess(self.limiter.limit, 2)
+
+
+class PriorityViewTests(AsyncTestCase):
+
+    def setUp(self):
+        super(PriorityViewTests, self).setUp()
+        self.responses = []
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch',
+                             side_effect=self.fetch)
+        self.fetch_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_client(self):
+        self.limiter = dynamodb.ConcurrencyLimiter(limit=1)
+        return dynamodb.DynamoDB(endpoint=self.endpoint, retry_policy=None,
+                                 concurrency_limiter=self.limiter)
+
+    def fetch(self, method, path, body, headers):
+        future = concurrent.Future()
+        self.responses.append(future)
+        return future
+
+    def respond(self, result):
+        self.responses[-1].set_result(
+            mock.Mock(body=json.dumps(result).encode('utf-8')))
+
+    def test_view_shares_client_state(self):
+        view = self.client.with_priority('background')
+        self.assertIsInstance(view, dynamodb.DynamoDB)
+        self.assertIs(view.client, self.client.client)
+        view._in_flight['key'] = 'value'
+        self.assertEqual(self.client._in_flight, {'key': 'value'})
+        self.assertIsNone(
+            view.with_priority('interactive')._shared._priority)
+
+    def test_views_combine_overrides(self):
+        policy = dynamodb.RetryPolicy()
+        view = self.client.with_priority('background').with_retry_policy(
+            policy)
+        self.assertEqual(view._priority, 'background')
+        self.assertIs(view._retry_policy, policy)
+        self.assertIsNone(self.client._retry_policy)
+        self.assertIsNone(self.client._priority)
+
+    @testing.gen_test
+    def test_interactive_requests_are_sent_first(self):
+        background = self.client.with_priority('background')
+        first = background.list_tables()
+        queued = [background.describe_table('background'),
+                  self.client.describe_table('interactive')]
+        self.assertEqual(self.limiter.stats['priorities'],
+                         {'background': {'waiting': 1, 'wait_time': 0},
+                          'interactive': {'waiting': 1, 'wait_time': 0}})
+        self.respond({'TableNames': []})
+        yield first
+        yield gen.moment
+        self.assertEqual(
+            json.loads(self.fetch_mock.call_args[1]['body'].decode('utf-8')),
+            {'TableName': 'interactive'})
+        self.respond({'Table': {'TableName': 'interactive'}})
+        yield queued[1]
+        yield gen.moment
+        self.respond({'Table': {'TableName': 'background'}})
+        yield queued[0]
+
+    @testing.gen_test
+    def test_priority_per_call(self):
+        with mock.patch.object(self.limiter, 'acquire',
+                               wraps=self.limiter.acquire) as acquire:
+            future = self.client.execute('ListTables', {},
+                                         priority='background')
+            self.respond({'TableNames': []})
+            yield future
+        acquire.assert_called_once_with('background')
+
+    @testing.gen_test
+    def test_unknown_priority_is_raised(self):
+        with self.assertRaises(ValueError):
+            yield self.client.with_priority('batch').list_tables()
+
+
+class QueryTests(AsyncTestCase):
+
+    def setUp(self):
+        super(QueryTests, self).setUp()
+        self.pages = [
+            {'Items': [{'id': {'S': 'a'}}], 'Count': 1, 'ScannedCount': 1,
+             'LastEvaluatedKey': {'id': {'S': 'a'}}},
+            {'Items': [{'id': {'S': 'b'}}], 'Count': 1, 'ScannedCount': 1}]
+        self.bodies = []
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch',
+                             side_effect=self.fetch)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fetch(self, method, path, body, headers):
+        self.bodies.append(json.loads(body.decode('utf-8')))
+        return resolved_future(mock.Mock(
+            body=json.dumps(self.pages[len(self.bodies) - 1]).encode()))
+
+    @testing.gen_test
+    def test_query_keeps_last_evaluated_key(self):
+        result = yield self.client.query(
+            'table', key_condition_expression='id = :id',
+            expression_attribute_values={':id': {'S': 'a'}},
+            index_name='index', limit=1, scan_index_forward=False)
+        self.assertEqual(result['Items'], [{'id': 'a'}])
+        self.assertEqual(result['LastEvaluatedKey'], {'id': 'a'})
+        self.assertEqual(self.bodies[0], {
+            'TableName': 'table', 'IndexName': 'index', 'Limit': 1,
+            'KeyConditionExpression': 'id = :id',
+            'ExpressionAttributeValues': {':id': {'S': 'a'}},
+            'ScanIndexForward': False})
+
+    @testing.gen_test
+    def test_query_iterator_follows_pages(self):
+        iterator = self.client.query_iterator(
+            'table', key_condition_expression='id = :id', limit=1)
+        items = []
+        while (yield iterator.fetch_next):
+            items.append(iterator.next_object())
+        self.assertEqual(items, [{'id': 'a'}, {'id': 'b'}])
+        self.assertEqual(self.bodies[1]['ExclusiveStartKey'],
+                         {'id': {'S': 'a'}})
+        self.assertEqual([body['Limit'] for body in self.bodies], [1, 1])
+
+    @testing.gen_test
+    def test_last_evaluated_key_numbers_are_sent_back_unchanged(self):
+        key = {'id': {'S': 'a'}, 'score': {'N': '1234567890.123456789012'}}
+        self.pages[0]['LastEvaluatedKey'] = key
+        iterator = self.client.query_iterator(
+            'table', key_condition_expression='id = :id', limit=1)
+        yield iterator.to_list()
+        self.assertEqual(self.bodies[1]['ExclusiveStartKey'], key)
+
+    @testing.gen_test
+    def test_query_iterator_stops_at_max_items(self):
+        iterator = self.client.query_iterator(
+            'table', key_condition_expression='id = :id', max_items=1,
+            prefetch=2)
+        items = yield iterator.to_list()
+        self.assertEqual(items, [{'id': 'a'}])
+        self.assertEqual(len(self.bodies), 1)
+        self.assertEqual(iterator.last_evaluated_key, {'id': 'a'})
+
+
+class ScanTests(AsyncTestCase):
+
+    def setUp(self):
+        super(ScanTests, self).setUp()
+        patcher = mock.patch.object(self.client, 'execute',
+                                    side_effect=self.execute)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.bodies = []
+
+    def execute(self, function, body):
+        if function == 'DescribeTable':
+            return resolved_future({'Table': {
+                'TableName': 'table', 'TableSizeBytes': 5 * 1024 ** 3,
+                'GlobalSecondaryIndexes': [{'IndexName': 'index',
+                                            'IndexSizeBytes': 10}]}})
+        self.bodies.append(body)
+        result = {'Items': [{'segment': body.get('Segment')}], 'Count': 1}
+        if 'ExclusiveStartKey' not in body:
+            result['LastEvaluatedKey'] = {'id': 'a'}
+        return resolved_future(result)
+
+    @testing.gen_test
+    def test_scan_segment(self):
+        yield self.client.scan('table', filter_expression='v > :v',
+                               expression_attribute_values={':v': {'N': '1'}},
+                               exclusive_start_key={'id': 'a'},
+                               segment=0, total_segments=2)
+        self.assertEqual(self.bodies[0], {
+            'TableName': 'table', 'FilterExpression': 'v > :v',
+            'ExpressionAttributeValues': {':v': {'N': '1'}},
+            'ExclusiveStartKey': {'id': {'S': 'a'}},
+            'Segment': 0, 'TotalSegments': 2})
+
+    @testing.gen_test
+    def test_parallel_scan_pages_every_segment(self):
+        iterator = yield self.client.parallel_scan('table', total_segments=3,
+                                                   limit=50)
+        items = yield iterator.to_list()
+        self.assertEqual(sorted(item['segment'] for item in items),
+                         [0, 0, 1, 1, 2, 2])
+        self.assertEqual(len(self.bodies), 6)
+        self.assertTrue(all(body['TotalSegments'] == 3 and
+                            body['Limit'] == 50 for body in self.bodies))
+
+    @testing.gen_test
+    def test_parallel_scan_segments_from_table_size(self):
+        iterator = yield self.client.parallel_scan('table')
+        self.assertEqual(len(iterator.iterators), 3)
+        iterator = yield self.client.parallel_scan('table',
+                                                   index_name='index')
+        self.assertEqual(len(iterator.iterators), 1)
+
+
+class DecodeExecutorTests(AsyncTestCase):
+
+    def setUp(self):
+        super(DecodeExecutorTests, self).setUp()
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch')
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.executor.shutdown)
+
+    def get_client(self):
+        self.executor = futures.ThreadPoolExecutor(1)
+        self.submit = mock.Mock(wraps=self.executor.submit)
+        executor = mock.Mock(submit=self.submit)
+        return dynamodb.DynamoDB(endpoint=self.endpoint,
+                                 decode_executor=executor,
+                                 decode_threshold=100)
+
+    def respond(self, items):
+        body = json.dumps({'Items': [utils.marshall(item) for item in items],
+                           'Count': len(items)}).encode('utf-8')
+        self.fetch.return_value = resolved_future(mock.Mock(body=body))
+
+    @testing.gen_test
+    def test_large_responses_are_decoded_in_executor(self):
+        items = [{'id': str(value), 'tags': {'a', 'b'}}
+                 for value in range(10)]
+        self.respond(items)
+        result = yield self.client.query(
+            'table', key_condition_expression='id = :id')
+        self.assertEqual(result['Items'], items)
+        self.assertEqual(self.submit.call_count, 1)
+
+    @testing.gen_test
+    def test_small_responses_are_decoded_inline(self):
+        self.respond([{'id': '1'}])
+        result = yield self.client.query(
+            'table', key_condition_expression='id = :id')
+        self.assertEqual(result['Items'], [{'id': '1'}])
+        self.assertEqual(self.submit.call_count, 0)
+
+    @testing.gen_test
+    def test_decode_errors_are_raised(self):
+        self.fetch.return_value = resolved_future(
+            mock.Mock(body=b'{' * 200))
+        with self.assertRaises(ValueError):
+            yield self.client.query(
+                'table', key_condition_expression='id = :id')
+        self.assertEqual(self.submit.call_count, 1)
+
+
+class LazyItemsTests(AsyncTestCase):
+
+    def setUp(self):
+        super(LazyItemsTests, self).setUp()
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch')
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.item = {'id': 'a', 'nested': {'values': [1, 2]}}
+
+    def get_client(self):
+        return dynamodb.DynamoDB(endpoint=self.endpoint, lazy_items=True)
+
+    def respond(self, result):
+        body = json.dumps(result).encode('utf-8')
+        self.fetch.return_value = resolved_future(mock.Mock(body=body))
+
+    @testing.gen_test
+    def test_get_item_returns_lazy_item(self):
+        self.respond({'Item': utils.marshall(self.item)})
+        item = yield self.client.get_item('table', {'id': 'a'})
+        self.assertIsInstance(item, utils.LazyItem)
+        self.assertEqual(item['nested']['values'][1], 2)
+        self.assertEqual(item, self.item)
+
+    @testing.gen_test
+    def test_query_returns_lazy_items(self):
+        self.respond({'Items': [utils.marshall(self.item)], 'Count': 1,
+                      'LastEvaluatedKey': {'id': {'S': 'a'}}})
+        result = yield self.client.query(
+            'table', key_condition_expression='id = :id')
+        self.assertIsInstance(result['Items'][0], utils.LazyItem)
+        self.assertEqual(result['Items'], [self.item])
+        self.assertEqual(result['LastEvaluatedKey'], {'id': 'a'})
+
+    @testing.gen_test
+    def test_coalesced_get_item_returns_lazy_item(self):
+        self.client._coalesce_reads = True
+        self.respond({'Responses': {'table': [utils.marshall(self.item)]}})
+        item = yield self.client.get_item('table', {'id': 'a'})
+        self.assertIsInstance(item, utils.LazyItem)
+        self.assertEqual(item, self.item)
+        self.assertEqual(self.fetch.call_args[1]['headers']['x-amz-target'],
+                         'DynamoDB_20120810.BatchGetItem')
+
+
+class StreamItemsTests(AsyncTestCase):
+
+    def setUp(self):
+        super(StreamItemsTests, self).setUp()
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch')
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.items = [{'id': 'a', 'count': 1}, {'id': 'b', 'count': 2}]
+        body = json.dumps({
+            'Items': [utils.marshall(item) for item in self.items],
+            'Count': 2, 'LastEvaluatedKey': {'id': {'S': 'b'}}})
+        self.fetch.return_value = resolved_future(
+            mock.Mock(body=body.encode('utf-8')))
+
+    def get_client(self):
+        return dynamodb.DynamoDB(endpoint=self.endpoint, stream_items=True,
+                                 deduplicate_reads=True)
+
+    @testing.gen_test
+    def test_scan_returns_item_stream(self):
+        result = yield self.client.scan('table')
+        self.assertIsInstance(result['Items'], streaming.ItemStream)
+        self.assertEqual(list(result['Items']), self.items)
+        self.assertEqual(result['Count'], 2)
+        self.assertEqual(result['LastEvaluatedKey'], {'id': 'b'})
+
+    @testing.gen_test
+    def test_streamed_queries_are_not_shared(self):
+        first, second = yield [
+            self.client.query('table', key_condition_expression='id = :id'),
+            self.client.query('table', key_condition_expression='id = :id')]
+        self.assertEqual(list(first['Items']), self.items)
+        self.assertEqual(list(second['Items']), self.items)
+        self.assertEqual(self.fetch.call_count, 2)
+
+    @testing.gen_test
+    def test_query_iterator_reads_streamed_pages(self):
+        iterator = self.client.query_iterator(
+            'table', key_condition_expression='id = :id', max_items=2)
+        items = []
+        while (yield iterator.fetch_next):
+            items.append(iterator.next_object())
+        self.assertEqual(items, self.items)
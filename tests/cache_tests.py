@@ -0,0 +1,171 @@
+import unittest
+
+import mock
+
+from sprockets.clients.dynamodb import cache
+from sprockets.clients.dynamodb import utils
+
+
+class ItemCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = cache.ItemCache(max_entries=3, max_bytes=1000, ttl=10)
+        self.now = 1000.0
+        patcher = mock.patch('sprockets.clients.dynamodb.cache._clock',
+                             side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fill(self, value, table_name='table', item=None):
+        key = utils.primary_key({'id': value})
+        item = item or {'id': value}
+        self.cache.fill(table_name, key, item,
+                        self.cache.begin_read(table_name, key))
+        return key
+
+    def test_hit_returns_item(self):
+        key = self.fill('a')
+        self.assertEqual(self.cache.get('table', key), {'id': 'a'})
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 0)
+
+    def test_miss_returns_none(self):
+        self.assertIsNone(self.cache.get('table', (('id', 'a'),)))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_expired_items_are_misses(self):
+        key = self.fill('a')
+        self.now += 11
+        self.assertIsNone(self.cache.get('table', key))
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_table_ttl_overrides_default(self):
+        self.cache.table_ttls['short'] = 1
+        key = self.fill('a', 'short')
+        self.now += 2
+        self.assertIsNone(self.cache.get('short', key))
+
+    def test_zero_table_ttl_disables_caching(self):
+        self.cache.table_ttls['uncached'] = 0
+        self.fill('a', 'uncached')
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        first, second, third = self.fill('a'), self.fill('b'), self.fill('c')
+        self.cache.get('table', first)
+        self.fill('d')
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertIsNotNone(self.cache.get('table', first))
+        self.assertIsNone(self.cache.get('table', second))
+        self.assertIsNotNone(self.cache.get('table', third))
+
+    def test_size_bound_evicts_entries(self):
+        self.fill('a', item={'id': 'a', 'value': 'x' * 600})
+        self.fill('b', item={'id': 'b', 'value': 'x' * 600})
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertLessEqual(self.cache.size, 1000)
+
+    def test_oversized_items_are_not_cached(self):
+        self.fill('a', item={'id': 'a', 'value': 'x' * 2000})
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_fill_after_write_is_ignored(self):
+        key = utils.primary_key({'id': 'a'})
+        generation = self.cache.begin_read('table', key)
+        self.cache.invalidate('table', key)
+        self.cache.fill('table', key, {'id': 'a'}, generation)
+        self.assertIsNone(self.cache.get('table', key))
+
+    def test_store_replaces_item(self):
+        key = self.fill('a')
+        self.cache.store('table', key, {'id': 'a', 'value': 1})
+        self.assertEqual(self.cache.get('table', key),
+                         {'id': 'a', 'value': 1})
+
+    def test_invalidate_removes_item(self):
+        key = self.fill('a')
+        self.cache.invalidate('table', key)
+        self.assertIsNone(self.cache.get('table', key))
+        self.assertEqual(self.cache.size, 0)
+
+    def test_clear_removes_items(self):
+        self.fill('a')
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size, 0)
+
+    def test_key_uses_cached_key_attributes(self):
+        self.assertIsNone(self.cache.key('table', {'id': 'a', 'value': 1}))
+        self.fill('a')
+        self.assertEqual(self.cache.key('table', {'id': 'a', 'value': 1}),
+                         (('id', 'a'),))
+        self.assertIsNone(self.cache.key('table', {'value': 1}))
+
+    def test_stats(self):
+        key = self.fill('a')
+        self.cache.get('table', key)
+        self.cache.get('table', (('id', 'b'),))
+        stats = self.cache.stats
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['evictions'], 0)
+        self.assertGreater(stats['size'], 0)
+
+
+class AbsentKeyCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = cache.ItemCache(absent_ttl=5, max_absent_entries=2)
+        self.now = 1000.0
+        patcher = mock.patch('sprockets.clients.dynamodb.cache._clock',
+                             side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fill_absent(self, value):
+        key = utils.primary_key({'id': value})
+        self.cache.fill('table', key, {},
+                        self.cache.begin_read('table', key))
+        return key
+
+    def test_absent_key_returns_empty_dict(self):
+        key = self.fill_absent('a')
+        self.assertEqual(self.cache.get('table', key), {})
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.absent_hits, 1)
+        self.assertEqual(self.cache.stats['absent'], 1)
+
+    def test_absent_key_expires(self):
+        key = self.fill_absent('a')
+        self.now += 6
+        self.assertIsNone(self.cache.get('table', key))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_absent_keys_are_bounded(self):
+        first = self.fill_absent('a')
+        self.fill_absent('b')
+        self.fill_absent('c')
+        self.assertEqual(self.cache.stats['absent'], 2)
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertIsNone(self.cache.get('table', first))
+
+    def test_store_replaces_absent_key(self):
+        key = self.fill_absent('a')
+        self.cache.store('table', key, {'id': 'a'})
+        self.assertEqual(self.cache.get('table', key), {'id': 'a'})
+
+    def test_invalidate_removes_absent_key(self):
+        key = self.fill_absent('a')
+        self.cache.invalidate('table', key)
+        self.assertIsNone(self.cache.get('table', key))
+
+    def test_absent_keys_are_not_cached_by_default(self):
+        self.cache.absent_ttl = 0
+        key = self.fill_absent('a')
+        self.assertIsNone(self.cache.get('table', key))
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+import mock
+
+from sprockets.clients import dynamodb
+from sprockets.clients.dynamodb import codec
+
+VALUE = {'TableName': 'table',
+         'Item': {'id': {'S': u'café'}, 'count': {'N': '10'},
+                  'ratio': {'N': '0.25'}, 'flag': {'BOOL': True},
+                  'list': {'L': [{'NULL': True}, {'S': 'a/b'}]}},
+         'ConsumedCapacity': {'CapacityUnits': 0.5}}
+
+
+class CodecTests(unittest.TestCase):
+
+    def test_codecs_round_trip(self):
+        for json_codec in codec.available_codecs():
+            encoded = json_codec.dumps(VALUE)
+            self.assertIsInstance(encoded, bytes, json_codec.name)
+            self.assertEqual(json.loads(encoded.decode('utf-8')), VALUE,
+                             json_codec.name)
+            self.assertEqual(json_codec.loads(encoded), VALUE,
+                             json_codec.name)
+
+    def test_codecs_decode_utf8(self):
+        data = u'{"id":{"S":"café"}}'.encode('utf-8')
+        for json_codec in codec.available_codecs():
+            self.assertEqual(json_codec.loads(data),
+                             {'id': {'S': u'café'}}, json_codec.name)
+
+    def test_default_codec_prefers_installed_libraries(self):
+        with mock.patch.object(codec, 'orjson', None):
+            with mock.patch.object(codec, 'ujson', None):
+                self.assertIsInstance(codec.default_codec(), codec.JSONCodec)
+            with mock.patch.object(codec, 'ujson', mock.Mock()):
+                self.assertIsInstance(codec.default_codec(),
+                                      codec.UjsonCodec)
+        with mock.patch.object(codec, 'orjson', mock.Mock()):
+            self.assertIsInstance(codec.default_codec(), codec.OrjsonCodec)
+
+    def test_client_uses_json_codec(self):
+        json_codec = mock.Mock(dumps=mock.Mock(return_value=b'{}'))
+        client = dynamodb.DynamoDB(json_codec=json_codec)
+        with mock.patch.object(client, '_execute') as execute:
+            client.execute('ListTables', {'Limit': 1})
+        json_codec.dumps.assert_called_once_with({'Limit': 1})
+        self.assertEqual(execute.call_args[0][2], b'{}')
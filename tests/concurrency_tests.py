@@ -0,0 +1,138 @@
+import unittest
+
+import mock
+
+from sprockets.clients.dynamodb import concurrency
+
+
+class AdaptiveLimiterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch(
+            'sprockets.clients.dynamodb.concurrency._clock',
+            side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = concurrency.AdaptiveLimiter(
+            initial_limit=2, min_limit=1, max_limit=4)
+
+    def test_requests_above_the_limit_wait(self):
+        futures = [self.limiter.acquire() for _ in range(3)]
+        self.assertEqual([future.done() for future in futures],
+                         [True, True, False])
+        self.assertEqual(len(self.limiter), 1)
+        self.now += 0.25
+        self.limiter.release()
+        self.assertTrue(futures[2].done())
+        self.assertEqual(self.limiter.stats['queued'], 1)
+        self.assertEqual(self.limiter.wait_time, 0.25)
+        self.assertEqual(self.limiter.in_flight, 2)
+
+    def test_limit_grows_with_fast_responses(self):
+        for _ in range(20):
+            self.limiter.acquire()
+            self.limiter.acquire()
+            self.limiter.release(0.01)
+            self.limiter.release(0.01)
+        self.assertEqual(self.limiter.limit, 4)
+
+    def test_limit_does_not_grow_when_unused(self):
+        limiter = concurrency.AdaptiveLimiter(initial_limit=10)
+        for _ in range(20):
+            limiter.acquire()
+            limiter.release(0.01)
+        self.assertEqual(limiter.limit, 10)
+
+    def test_limit_shrinks_when_throttled(self):
+        self.limiter.limit = 4.0
+        self.limiter.acquire()
+        self.limiter.release(dropped=True)
+        self.assertAlmostEqual(self.limiter.limit, 3.6)
+
+    def test_limit_shrinks_with_slow_responses(self):
+        self.limiter.limit = 4.0
+        self.limiter.acquire()
+        self.limiter.release(0.01)
+        self.now += 1
+        self.limiter.acquire()
+        self.limiter.release(0.05)
+        self.assertLess(self.limiter.limit, 4.0)
+
+    def test_limit_shrinks_once_per_round_trip(self):
+        self.limiter.limit = 4.0
+        self.limiter.acquire()
+        self.limiter.release(1.0)
+        for _ in range(3):
+            self.limiter.acquire()
+            self.limiter.release(dropped=True)
+        self.assertAlmostEqual(self.limiter.limit, 3.6)
+
+    def test_limit_is_bounded(self):
+        for _ in range(50):
+            self.now += 10
+            self.limiter.acquire()
+            self.limiter.release(dropped=True)
+        self.assertEqual(self.limiter.limit, 1)
+        self.assertEqual(self.limiter.in_flight, 0)
+
+
+class ConcurrencyLimiterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.limiter = concurrency.ConcurrencyLimiter(
+            limit=1, weights={'interactive': 3, 'background': 1})
+        self.limiter.acquire()
+
+    def drain(self):
+        order = []
+        while len(self.limiter):
+            self.limiter.release()
+            order.append(self.granted())
+        return order
+
+    def granted(self):
+        for priority, futures in self.futures.items():
+            for future in futures:
+                if future.done() and future not in self.seen:
+                    self.seen.add(future)
+                    return priority
+
+    def test_slots_are_shared_by_weight(self):
+        self.seen = set()
+        self.futures = {
+            'background': [self.limiter.acquire('background')
+                           for _ in range(4)],
+            'interactive': [self.limiter.acquire('interactive')
+                            for _ in range(6)]}
+        self.assertEqual(self.limiter.stats['priorities']['background'],
+                         {'waiting': 4, 'wait_time': 0.0})
+        order = self.drain()
+        self.assertEqual(order[:8].count('interactive'), 6)
+        self.assertEqual(order[:4].count('background'), 1)
+
+    def test_idle_priorities_do_not_accumulate_credit(self):
+        self.seen = set()
+        self.futures = {
+            'background': [self.limiter.acquire('background')
+                           for _ in range(6)],
+            'interactive': []}
+        for _ in range(5):
+            self.limiter.release()
+        self.futures['interactive'] = [self.limiter.acquire('interactive')
+                                       for _ in range(3)]
+        self.futures['background'] = self.futures['background'][5:]
+        self.assertEqual(self.drain(),
+                         ['interactive', 'interactive', 'interactive',
+                          'background'])
+
+    def test_default_priority(self):
+        self.limiter.acquire()
+        self.assertEqual(
+            self.limiter.stats['priorities']['interactive']['waiting'], 1)
+
+    def test_unknown_priority(self):
+        with self.assertRaises(ValueError):
+            self.limiter.acquire('batch')
+        with self.assertRaises(ValueError):
+            concurrency.ConcurrencyLimiter(weights={'a': 1})
@@ -0,0 +1,149 @@
+import mock
+
+from tornado import concurrent
+from tornado import gen
+from tornado import httpclient
+from tornado import testing
+from tornado_aws import exceptions as aws_exceptions
+
+from sprockets.clients import dynamodb
+from sprockets.clients.dynamodb import exceptions
+
+
+class CounterBufferTests(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(CounterBufferTests, self).setUp()
+        self.client = dynamodb.DynamoDB()
+        patcher = mock.patch.object(dynamodb.DynamoDB, 'execute',
+                                    side_effect=self.execute)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.bodies = []
+        self.failures = []
+        self.errors = {}
+
+    def execute(self, function, body):
+        self.assertEqual(function, 'UpdateItem')
+        self.bodies.append(body)
+        future = concurrent.Future()
+        error = self.errors.get(body['Key']['id']['S'])
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result({})
+        return future
+
+    def get_counters(self, **kwargs):
+        kwargs.setdefault('failure_callback',
+                          lambda *args: self.failures.append(args))
+        return self.client.counter_buffer(**kwargs)
+
+    @testing.gen_test
+    def test_increments_are_summed_per_item(self):
+        counters = self.get_counters(flush_interval=60)
+        for _ in range(100):
+            counters.increment('table', {'id': 'a'}, 'views')
+        counters.increment('table', {'id': 'a'}, 'likes', 3)
+        counters.increment('table', {'id': 'b'}, 'views', 2)
+        self.assertEqual(len(counters), 2)
+        self.assertEqual(self.bodies, [])
+        yield counters.flush()
+        self.assertEqual(counters.increments, 102)
+        self.assertEqual(counters.updates, 2)
+        body = [body for body in self.bodies
+                if body['Key'] == {'id': {'S': 'a'}}][0]
+        self.assertEqual(body['UpdateExpression'], 'ADD #n0 :v0, #n1 :v1')
+        self.assertEqual(body['ExpressionAttributeNames'],
+                         {'#n0': 'likes', '#n1': 'views'})
+        self.assertEqual(body['ExpressionAttributeValues'],
+                         {':v0': {'N': '3'}, ':v1': {'N': '100'}})
+        self.assertEqual(len(counters), 0)
+
+    @testing.gen_test
+    def test_increments_are_flushed_after_interval(self):
+        counters = self.get_counters(flush_interval=0.05)
+        counters.increment('table', {'id': 'a'}, 'views')
+        yield gen.sleep(0.1)
+        self.assertEqual(len(self.bodies), 1)
+
+    @testing.gen_test
+    def test_too_many_keys_are_flushed(self):
+        counters = self.get_counters(flush_interval=60, max_keys=2)
+        for value in 'abc':
+            counters.increment('table', {'id': value}, 'views')
+        self.assertEqual(len(counters), 0)
+        yield counters.close()
+        self.assertEqual(len(self.bodies), 3)
+
+    @testing.gen_test
+    def test_zero_totals_are_not_written(self):
+        counters = self.get_counters()
+        counters.increment('table', {'id': 'a'}, 'views', 2)
+        counters.increment('table', {'id': 'a'}, 'views', -2)
+        yield counters.close()
+        self.assertEqual(self.bodies, [])
+
+    @testing.gen_test
+    def test_failures_are_reported(self):
+        error = exceptions.ValidationException('invalid')
+        self.errors['a'] = error
+        counters = self.get_counters()
+        counters.increment('table', {'id': 'a'}, 'views', 5)
+        counters.increment('table', {'id': 'b'}, 'views')
+        yield counters.close()
+        self.assertEqual(self.failures,
+                         [('table', {'id': 'a'}, {'views': 5}, error)])
+        self.assertEqual(len(self.bodies), 2)
+
+    @testing.gen_test
+    def test_closed_buffer_rejects_increments(self):
+        counters = self.get_counters()
+        yield counters.close()
+        with self.assertRaises(RuntimeError):
+            counters.increment('table', {'id': 'a'}, 'views')
+
+
+class CounterRetryTests(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(CounterRetryTests, self).setUp()
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch')
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch('random.uniform', return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = dynamodb.DynamoDB(endpoint='http://localhost:8000')
+        self.failures = []
+        self.counters = self.client.counter_buffer(
+            flush_interval=60,
+            failure_callback=lambda *args: self.failures.append(args))
+
+    @testing.gen_test
+    def test_timed_out_update_is_not_retried(self):
+        self.fetch.side_effect = httpclient.HTTPError(599)
+        self.counters.increment('table', {'id': 'a'}, 'views')
+        yield self.counters.flush()
+        self.assertEqual(self.fetch.call_count, 1)
+        self.assertIsInstance(self.failures[0][3],
+                              exceptions.TimeoutException)
+
+    @testing.gen_test
+    def test_throttled_update_is_retried(self):
+        throttled = concurrent.Future()
+        throttled.set_exception(aws_exceptions.AWSError(
+            type='com.amazonaws.dynamodb.v20120810#'
+                 'ProvisionedThroughputExceededException',
+            message='throttled'))
+        response = concurrent.Future()
+        response.set_result(mock.Mock(body=b'{}'))
+        self.fetch.side_effect = [throttled, response]
+        self.counters.increment('table', {'id': 'a'}, 'views')
+        yield self.counters.flush()
+        self.assertEqual(self.fetch.call_count, 2)
+        self.assertEqual(self.failures, [])
+
+    def test_client_keeps_its_retry_policy(self):
+        self.assertIn(exceptions.TimeoutException,
+                      self.client._retry_policy.rules)
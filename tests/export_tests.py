@@ -0,0 +1,137 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from tornado import concurrent
+from tornado import testing
+
+from sprockets.clients import dynamodb
+from sprockets.clients.dynamodb import exceptions
+from sprockets.clients.dynamodb import export
+from sprockets.clients.dynamodb import utils
+
+
+class ExportTests(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(ExportTests, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'table.jsonl')
+        self.checkpoint = self.path + '.checkpoint'
+        self.client = dynamodb.DynamoDB()
+        self.client.scan = mock.Mock(side_effect=self.scan)
+        self.pages = {
+            (0, None): ([{'id': 'a'}, {'id': 'b'}], {'id': 'b'}),
+            (0, 'b'): ([{'id': 'c', 'tags': {'x'}}], None),
+            (1, None): ([{'id': 'd'}], {'id': 'd'}),
+            (1, 'd'): ([{'id': 'e'}], None)}
+        self.failures = set()
+        self.requests = []
+
+    def scan(self, table_name, exclusive_start_key=None, limit=None,
+             segment=None, total_segments=None, **kwargs):
+        start = exclusive_start_key['id'] if exclusive_start_key else None
+        self.requests.append((segment, start))
+        future = concurrent.Future()
+        if (segment, start) in self.failures:
+            future.set_exception(exceptions.InternalFailure())
+            return future
+        items, last_key = self.pages[(segment, start)]
+        result = {'Items': items, 'Count': len(items)}
+        if last_key:
+            result['LastEvaluatedKey'] = last_key
+        future.set_result(result)
+        return future
+
+    def read(self):
+        with open(self.path) as handle:
+            return [json.loads(line) for line in handle]
+
+    @testing.gen_test
+    def test_export_writes_json_lines(self):
+        written = yield self.client.export('table', self.path,
+                                           total_segments=2)
+        self.assertEqual(written, 5)
+        self.assertEqual(
+            sorted(self.read(), key=lambda item: item['id']),
+            [{'id': 'a'}, {'id': 'b'}, {'id': 'c', 'tags': ['x']},
+             {'id': 'd'}, {'id': 'e'}])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    @unittest.skipUnless(utils.PYTHON3, 'binary values are str in Python 2')
+    def test_binary_values_are_base64(self):
+        self.assertEqual(export._encode({'data': b'\x00'}, False),
+                         '{"data": "AA=="}\n')
+
+    @testing.gen_test
+    def test_export_marshalled(self):
+        yield self.client.export('table', self.path, total_segments=2,
+                                 marshalled=True)
+        self.assertIn({'id': {'S': 'c'}, 'tags': {'SS': ['x']}}, self.read())
+
+    @testing.gen_test
+    def test_interrupted_export_resumes_from_checkpoint(self):
+        self.failures.add((0, 'b'))
+        with self.assertRaises(exceptions.InternalFailure):
+            yield self.client.export('table', self.path, total_segments=2,
+                                     interval=0, max_in_flight=1)
+        self.assertTrue(os.path.exists(self.checkpoint))
+        with open(self.checkpoint) as handle:
+            saved = json.load(handle)
+        self.assertEqual(saved['total_segments'], 2)
+        self.assertEqual(saved['positions']['0'], {'id': {'S': 'b'}})
+
+        with open(self.path, 'a') as handle:
+            handle.write('{"id": "partial')
+        self.failures.clear()
+        del self.requests[:]
+        yield self.client.export('table', self.path, interval=0)
+        self.assertEqual(sorted(item['id'] for item in self.read()),
+                         ['a', 'b', 'c', 'd', 'e'])
+        self.assertNotIn((0, None), self.requests)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    @testing.gen_test
+    def test_finished_segments_are_skipped(self):
+        checkpoint = export.Checkpoint(self.checkpoint, 'table', 2)
+        checkpoint.finished.add(1)
+        checkpoint.positions[0] = {'id': 'b'}
+        checkpoint.save()
+        open(self.path, 'w').close()
+        written = yield self.client.export('table', self.path)
+        self.assertEqual(written, 1)
+        self.assertEqual(self.requests, [(0, 'b')])
+
+    def test_checkpoint_keeps_marshalled_keys(self):
+        key = {'id': {'S': 'a'}, 'score': {'N': '1234567890.123456789012'}}
+        checkpoint = export.Checkpoint(self.checkpoint, 'table', 2)
+        checkpoint.positions[0] = utils.LazyItem(key)
+        checkpoint.save()
+        checkpoint = export.Checkpoint.load(self.checkpoint)
+        checkpoint.save()
+        loaded = export.Checkpoint.load(self.checkpoint)
+        self.assertEqual(utils.marshall(loaded.positions[0]), key)
+
+    @testing.gen_test
+    def test_checkpoint_for_another_table(self):
+        export.Checkpoint(self.checkpoint, 'other', 2).save()
+        with self.assertRaises(ValueError):
+            yield self.client.export('table', self.path)
+
+    @testing.gen_test
+    def test_segments_from_table_size(self):
+        self.client.describe_table = mock.Mock(
+            return_value=self.future({'TableSizeBytes': 3}))
+        yield self.client.export('table', self.path, segment_bytes=2)
+        self.assertEqual(sorted(set(segment for segment, _ in self.requests)),
+                         [0, 1])
+
+    def future(self, result):
+        future = concurrent.Future()
+        future.set_result(result)
+        return future
@@ -0,0 +1,75 @@
+import unittest
+
+from sprockets.clients.dynamodb import expressions
+
+
+class UpdateTests(unittest.TestCase):
+
+    def setUp(self):
+        expressions._templates.clear()
+
+    def test_actions(self):
+        kwargs = expressions.update(set={'status': 'done', 'count': 2},
+                                    remove=['error'], add={'views': 1},
+                                    delete={'tags': {'old'}})
+        self.assertEqual(
+            kwargs['update_expression'],
+            'SET #n0 = :v0, #n1 = :v1 REMOVE #n2 ADD #n3 :v2 DELETE #n4 :v3')
+        self.assertEqual(kwargs['expression_attribute_names'],
+                         {'#n0': 'count', '#n1': 'status', '#n2': 'error',
+                          '#n3': 'views', '#n4': 'tags'})
+        self.assertEqual(kwargs['expression_attribute_values'],
+                         {':v0': {'N': '2'}, ':v1': {'S': 'done'},
+                          ':v2': {'N': '1'}, ':v3': {'SS': ['old']}})
+        self.assertNotIn('condition_expression', kwargs)
+
+    def test_remove_only_has_no_values(self):
+        kwargs = expressions.update(remove=['a'])
+        self.assertEqual(kwargs, {'update_expression': 'REMOVE #n0',
+                                  'expression_attribute_names': {'#n0': 'a'}})
+
+    def test_condition(self):
+        kwargs = expressions.update(
+            set={'status': 'done'},
+            condition={'status': ('<>', 'done'), 'version': 3,
+                       'deleted': ('attribute_not_exists',)})
+        self.assertEqual(kwargs['condition_expression'],
+                         'attribute_not_exists(#n1) AND #n2 <> :v1 AND '
+                         '#n3 = :v2')
+        self.assertEqual(kwargs['expression_attribute_values'],
+                         {':v0': {'S': 'done'}, ':v1': {'S': 'done'},
+                          ':v2': {'N': '3'}})
+
+    def test_templates_are_cached_by_shape(self):
+        first = expressions.update(set={'a': 1}, add={'b': 2})
+        second = expressions.update(set={'a': 'x'}, add={'b': 3})
+        self.assertEqual(len(expressions._templates), 1)
+        self.assertEqual(first['update_expression'],
+                         second['update_expression'])
+        self.assertEqual(second['expression_attribute_values'],
+                         {':v0': {'S': 'x'}, ':v1': {'N': '3'}})
+        second['expression_attribute_names']['#n0'] = 'changed'
+        third = expressions.update(set={'a': 1}, add={'b': 2})
+        self.assertEqual(third, first)
+
+    def test_empty_update(self):
+        with self.assertRaises(ValueError):
+            expressions.update()
+
+
+class ConditionTests(unittest.TestCase):
+
+    def test_comparisons(self):
+        kwargs = expressions.condition({
+            'a': ('between', 1, 5), 'b': ('begins_with', 'x'),
+            'c': ('in', 'p', 'q'), 'd': ('>=', 2)})
+        self.assertEqual(kwargs['condition_expression'],
+                         '#n0 BETWEEN :v0 AND :v1 AND begins_with(#n1, :v2) '
+                         'AND #n2 IN (:v3, :v4) AND #n3 >= :v5')
+        self.assertEqual(len(kwargs['expression_attribute_values']), 6)
+
+    def test_invalid_conditions(self):
+        for spec in ({'a': ('like', 1)}, {'a': ('between', 1)},
+                     {'a': ('attribute_exists', 1)}, {'a': ()}, {}):
+            with self.assertRaises(ValueError):
+                expressions.condition(spec)
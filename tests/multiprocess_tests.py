@@ -0,0 +1,101 @@
+import json
+import os
+import shutil
+import tempfile
+
+import mock
+
+from tornado import concurrent
+from tornado import testing
+
+from sprockets.clients import dynamodb
+from sprockets.clients.dynamodb import connector
+from sprockets.clients.dynamodb import exceptions
+
+PAGES = {(0, None): ([{'id': 'a'}, {'id': 'b'}], {'id': 'b'}),
+         (0, 'b'): ([{'id': 'c'}], None),
+         (1, None): ([{'id': 'd'}], {'id': 'd'}),
+         (1, 'd'): ([{'id': 'e'}], {'id': 'e'}),
+         (1, 'e'): ([], None)}
+
+
+def scan(self, table_name, exclusive_start_key=None, segment=None,
+         total_segments=None, **kwargs):
+    start = exclusive_start_key['id'] if exclusive_start_key else None
+    future = concurrent.Future()
+    if kwargs.get('filter_expression') == 'fail':
+        future.set_exception(exceptions.InternalFailure('failed'))
+        return future
+    items, last_key = PAGES[(segment, start)]
+    result = {'Items': items, 'Count': len(items)}
+    if last_key:
+        result['LastEvaluatedKey'] = last_key
+    future.set_result(result)
+    return future
+
+
+def identifiers(items):
+    return [item['id'] for item in items]
+
+
+class ProcessScanTests(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(ProcessScanTests, self).setUp()
+        patcher = mock.patch.object(connector.DynamoDB, 'scan', scan)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = dynamodb.DynamoDB()
+
+    @testing.gen_test(timeout=30)
+    def test_items_from_every_segment(self):
+        iterator = yield self.client.process_scan(
+            'table', total_segments=2, processes=2, pages_per_task=1)
+        items = yield iterator.to_list()
+        self.assertEqual(sorted(item['id'] for item in items),
+                         ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(iterator.count, 5)
+        self.assertEqual(iterator.finished, set([0, 1]))
+        self.assertEqual(iterator.positions, {0: None, 1: None})
+
+    @testing.gen_test(timeout=30)
+    def test_reducer_output_is_returned(self):
+        iterator = yield self.client.process_scan(
+            'table', total_segments=2, processes=2, reducer=identifiers)
+        batches = []
+        while True:
+            batch = yield iterator.next_page()
+            if batch is None:
+                break
+            batches.append(batch)
+        self.assertEqual(sorted(batches), [['a', 'b', 'c'], ['d', 'e']])
+
+    @testing.gen_test(timeout=30)
+    def test_resume_from_exclusive_start_keys(self):
+        iterator = yield self.client.process_scan(
+            'table', total_segments=2, processes=1, segments=[1],
+            exclusive_start_keys={1: {'id': 'd'}})
+        items = yield iterator.to_list()
+        self.assertEqual(items, [{'id': 'e'}])
+
+    @testing.gen_test(timeout=30)
+    def test_errors_are_raised(self):
+        iterator = yield self.client.process_scan(
+            'table', total_segments=2, processes=1,
+            filter_expression='fail')
+        with self.assertRaises(exceptions.InternalFailure):
+            yield iterator.to_list()
+        batch = yield iterator.next_page()
+        self.assertIsNone(batch)
+
+    @testing.gen_test(timeout=30)
+    def test_export_in_worker_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'table.jsonl')
+        written = yield self.client.export('table', path, total_segments=2,
+                                           processes=2, interval=0)
+        self.assertEqual(written, 5)
+        with open(path) as handle:
+            self.assertEqual(sorted(json.loads(line)['id'] for line in handle),
+                             ['a', 'b', 'c', 'd', 'e'])
@@ -0,0 +1,192 @@
+from tornado import concurrent
+from tornado import gen
+from tornado import testing
+
+from sprockets.clients.dynamodb import pagination
+
+
+class PageIteratorTests(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(PageIteratorTests, self).setUp()
+        self.requests = []
+        self.pages = {None: ([1, 2], 'a'), 'a': ([], 'b'),
+                      'b': ([3, 4], 'c'), 'c': ([5], None)}
+
+    def fetch(self, start_key, limit):
+        self.requests.append((start_key, limit))
+        items, last_key = self.pages[start_key]
+        if limit is not None:
+            items = items[:limit]
+        result = {'Items': list(items), 'Count': len(items),
+                  'ScannedCount': len(items) + 1}
+        if last_key:
+            result['LastEvaluatedKey'] = last_key
+        future = concurrent.Future()
+        future.set_result(result)
+        return future
+
+    @testing.gen_test
+    def test_items_follow_last_evaluated_key(self):
+        iterator = pagination.PageIterator(self.fetch)
+        items = []
+        while (yield iterator.fetch_next):
+            items.append(iterator.next_object())
+        self.assertEqual(items, [1, 2, 3, 4, 5])
+        self.assertEqual([start for start, _ in self.requests],
+                         [None, 'a', 'b', 'c'])
+        self.assertEqual(iterator.count, 5)
+        self.assertEqual(iterator.scanned_count, 9)
+        self.assertIsNone(iterator.last_evaluated_key)
+        with self.assertRaises(StopIteration):
+            iterator.next_object()
+
+    @testing.gen_test
+    def test_next_page_is_prefetched(self):
+        iterator = pagination.PageIterator(self.fetch, prefetch=1)
+        page = yield iterator.next_page()
+        self.assertEqual(page, [1, 2])
+        yield gen.moment
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(iterator.last_evaluated_key, 'a')
+
+    @testing.gen_test
+    def test_prefetch_depth_is_bounded(self):
+        iterator = pagination.PageIterator(self.fetch, prefetch=2)
+        yield iterator.next_page()
+        yield gen.moment
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(len(iterator._pages), 2)
+
+    @testing.gen_test
+    def test_no_prefetch(self):
+        iterator = pagination.PageIterator(self.fetch, prefetch=0)
+        yield iterator.next_page()
+        yield gen.moment
+        self.assertEqual(len(self.requests), 1)
+
+    @testing.gen_test
+    def test_max_items_limits_requests(self):
+        iterator = pagination.PageIterator(self.fetch, page_size=10,
+                                           max_items=3, prefetch=3)
+        items = yield iterator.to_list()
+        self.assertEqual(items, [1, 2, 3])
+        self.assertEqual(self.requests, [(None, 3), ('a', 1), ('b', 1)])
+        self.assertEqual(iterator.last_evaluated_key, 'c')
+
+    @testing.gen_test
+    def test_resume_from_exclusive_start_key(self):
+        iterator = pagination.PageIterator(self.fetch,
+                                           exclusive_start_key='b')
+        items = yield iterator.to_list()
+        self.assertEqual(items, [3, 4, 5])
+
+    @testing.gen_test
+    def test_errors_are_raised_when_reached(self):
+        def fetch(start_key, limit):
+            if start_key == 'a':
+                raise ValueError('failed')
+            return self.fetch(start_key, limit)
+
+        iterator = pagination.PageIterator(fetch)
+        page = yield iterator.next_page()
+        self.assertEqual(page, [1, 2])
+        with self.assertRaises(ValueError):
+            yield iterator.next_page()
+        page = yield iterator.next_page()
+        self.assertIsNone(page)
+
+
+class MergedIteratorTests(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(MergedIteratorTests, self).setUp()
+        self.responses = []
+
+    @gen.coroutine
+    def settle(self):
+        for _ in range(5):
+            yield gen.moment
+
+    def fetch(self, segment, start_key, limit):
+        future = concurrent.Future()
+        self.responses.append((segment, start_key, future))
+        return future
+
+    def respond(self, index, items, last_key=None):
+        result = {'Items': items, 'Count': len(items)}
+        if last_key:
+            result['LastEvaluatedKey'] = last_key
+        self.responses[index][2].set_result(result)
+
+    def merged(self, segments, **kwargs):
+        return pagination.MergedIterator(
+            [pagination.PageIterator(
+                lambda start, limit, segment=segment:
+                    self.fetch(segment, start, limit), prefetch=0)
+             for segment in range(segments)], **kwargs)
+
+    @testing.gen_test
+    def test_pages_are_merged_in_arrival_order(self):
+        iterator = self.merged(2)
+        future = iterator.to_list()
+        self.assertEqual(len(self.responses), 2)
+        self.respond(1, [3], 'x')
+        yield self.settle()
+        self.respond(0, [1, 2])
+        yield self.settle()
+        self.assertEqual(self.responses[2][:2], (1, 'x'))
+        self.respond(2, [4])
+        items = yield future
+        self.assertEqual(items, [3, 1, 2, 4])
+        self.assertEqual(iterator.count, 4)
+        self.assertEqual([it.last_evaluated_key for it in iterator.iterators],
+                         [None, None])
+
+    @testing.gen_test
+    def test_requests_in_flight_are_bounded(self):
+        iterator = self.merged(4, max_in_flight=2)
+        future = iterator.next_page()
+        self.assertEqual([segment for segment, _, _ in self.responses],
+                         [0, 1])
+        self.respond(0, [1])
+        page = yield future
+        self.assertEqual(page, [1])
+        yield self.settle()
+        self.assertEqual([segment for segment, _, _ in self.responses],
+                         [0, 1, 2])
+
+    @testing.gen_test
+    def test_buffered_pages_are_bounded(self):
+        iterator = self.merged(4, max_in_flight=2, max_buffered=2)
+        future = iterator.next_page()
+        self.respond(0, [1], 'a')
+        self.respond(1, [2], 'b')
+        yield future
+        yield self.settle()
+        self.assertEqual(len(self.responses), 3)
+        self.respond(2, [3], 'c')
+        yield self.settle()
+        self.assertEqual(len(self.responses), 3)
+
+    @testing.gen_test
+    def test_positions_follow_returned_pages(self):
+        iterator = self.merged(2)
+        future = iterator.next_page()
+        self.respond(0, [1], 'a')
+        self.respond(1, [2])
+        yield future
+        self.assertEqual(iterator.positions, ['a', None])
+        self.assertEqual(iterator.finished, set())
+        page = yield iterator.next_page()
+        self.assertEqual(page, [2])
+        self.assertEqual(iterator.positions, ['a', None])
+        self.assertEqual(iterator.finished, set([1]))
+
+    @testing.gen_test
+    def test_errors_are_raised(self):
+        iterator = self.merged(2)
+        future = iterator.to_list()
+        self.responses[0][2].set_exception(ValueError('failed'))
+        with self.assertRaises(ValueError):
+            yield future
@@ -0,0 +1,121 @@
+import json
+
+import mock
+
+from tornado import concurrent
+from tornado import testing
+
+from sprockets.clients import dynamodb
+from sprockets.clients.dynamodb import connector
+from sprockets.clients.dynamodb import utils
+
+
+def resolved_future(result):
+    future = concurrent.Future()
+    future.set_result(result)
+    return future
+
+
+class PreparedOperationTests(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(PreparedOperationTests, self).setUp()
+        patcher = mock.patch('tornado_aws.client.AsyncAWSClient.fetch')
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.item = {'id': 'a', 'name': 'Alice', 'tags': {'x', 'y'}}
+        self.respond({})
+
+    def get_client(self, **kwargs):
+        return dynamodb.DynamoDB(endpoint='http://localhost:8000', **kwargs)
+
+    def respond(self, result):
+        body = json.dumps(result).encode('utf-8')
+        self.fetch.return_value = resolved_future(mock.Mock(body=body))
+
+    def sent(self, index=-1):
+        args, kwargs = self.fetch.call_args_list[index]
+        return kwargs['headers']['x-amz-target'], json.loads(
+            kwargs['body'].decode('utf-8'))
+
+    @testing.gen_test
+    def test_get_item_splices_key(self):
+        client = self.get_client()
+        get_item = client.prepare_get_item(
+            'table', projection_expression='#n',
+            expression_attribute_names={'#n': 'name'})
+        self.respond({'Item': utils.marshall(self.item)})
+        item = yield get_item({'id': 'a'})
+        self.assertEqual(item, self.item)
+        self.assertEqual(self.sent(), (
+            'DynamoDB_20120810.GetItem',
+            {'TableName': 'table', 'ConsistentRead': False,
+             'ProjectionExpression': '#n',
+             'ExpressionAttributeNames': {'#n': 'name'},
+             'Key': {'id': {'S': 'a'}}}))
+
+    @testing.gen_test
+    def test_get_item_matches_unprepared_body(self):
+        client = self.get_client()
+        get_item = client.prepare_get_item('table', consistent_read=True)
+        yield get_item({'id': 'a'})
+        yield client.get_item('table', {'id': 'a'}, consistent_read=True)
+        self.assertEqual(self.sent(0), self.sent(1))
+
+    @testing.gen_test
+    def test_query_marshalls_values(self):
+        client = self.get_client()
+        query = client.prepare_query('table', 'id = :id',
+                                     scan_index_forward=False)
+        self.respond({'Items': [utils.marshall(self.item)], 'Count': 1,
+                      'LastEvaluatedKey': {'id': {'S': 'a'}}})
+        result = yield query({':id': 'a'}, exclusive_start_key={'id': 'z'},
+                             limit=10)
+        self.assertEqual(result['Items'], [self.item])
+        self.assertEqual(result['LastEvaluatedKey'], {'id': 'a'})
+        self.assertEqual(self.sent()[1], {
+            'TableName': 'table', 'KeyConditionExpression': 'id = :id',
+            'ScanIndexForward': False,
+            'ExpressionAttributeValues': {':id': {'S': 'a'}},
+            'ExclusiveStartKey': {'id': {'S': 'z'}}, 'Limit': 10})
+
+    @testing.gen_test
+    def test_query_without_values_sends_constant_body(self):
+        client = self.get_client()
+        query = client.prepare_query('table', 'id = a')
+        yield query()
+        self.assertEqual(self.fetch.call_args[1]['body'], query._encoded)
+
+    @testing.gen_test
+    def test_put_item_invalidates_cached_item(self):
+        client = self.get_client(item_cache=dynamodb.ItemCache())
+        put_item = client.prepare_put_item(
+            'table', condition_expression='attribute_not_exists(id)')
+        self.respond({'Item': utils.marshall({'id': 'a', 'name': 'Bob'})})
+        item = yield client.get_item('table', {'id': 'a'})
+        self.assertEqual(item['name'], 'Bob')
+        self.respond({})
+        yield put_item(self.item)
+        self.assertEqual(self.sent()[1], {
+            'TableName': 'table',
+            'ConditionExpression': 'attribute_not_exists(id)',
+            'Item': utils.marshall(self.item)})
+        calls = self.fetch.call_count
+        item = yield client.get_item('table', {'id': 'a'})
+        self.assertEqual(item, self.item)
+        self.assertEqual(self.fetch.call_count, calls)
+
+    @testing.gen_test
+    def test_rate_limited_body_is_encoded_again(self):
+        limiter = dynamodb.CapacityLimiter()
+        limiter.set_rate('table', 1000, 1000)
+        client = self.get_client(rate_limiter=limiter)
+        get_item = client.prepare_get_item('table')
+        yield get_item({'id': 'a'})
+        self.assertEqual(self.sent()[1], {
+            'TableName': 'table', 'ConsistentRead': False,
+            'Key': {'id': {'S': 'a'}}, 'ReturnConsumedCapacity': 'INDEXES'})
+
+    def test_headers_are_created_once_per_function(self):
+        self.assertIs(connector._headers('GetItem'),
+                      connector._headers('GetItem'))
@@ -0,0 +1,186 @@
+import unittest
+
+import mock
+
+from sprockets.clients.dynamodb import ratelimit
+
+
+class TokenBucketTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch('sprockets.clients.dynamodb.ratelimit._clock',
+                             side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.bucket = ratelimit.TokenBucket(10, burst=2)
+
+    def test_bucket_starts_full(self):
+        self.assertEqual(self.bucket.tokens, 20)
+        self.assertEqual(self.bucket.delay(), 0)
+
+    def test_delay_until_out_of_debt(self):
+        self.bucket.consume(25)
+        self.assertEqual(self.bucket.delay(), 0.5)
+        self.now += 0.5
+        self.assertEqual(self.bucket.delay(), 0)
+
+    def test_refill_is_capped(self):
+        self.bucket.consume(5)
+        self.now += 60
+        self.assertEqual(self.bucket.tokens, 20)
+
+
+class CapacityLimiterTests(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 100.0
+        patcher = mock.patch('sprockets.clients.dynamodb.ratelimit._clock',
+                             side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = ratelimit.CapacityLimiter()
+        self.limiter.set_rate('table', 10, 5)
+        self.limiter.set_rate('table', 4, 2, index_name='index')
+
+    def bucket(self, table_name, index_name, kind):
+        return self.limiter._buckets[(table_name, index_name, kind)]
+
+    def test_configure_from_table_description(self):
+        limiter = ratelimit.CapacityLimiter()
+        description = {
+            'TableName': 'table',
+            'ProvisionedThroughput': {'ReadCapacityUnits': 100,
+                                      'WriteCapacityUnits': 50},
+            'GlobalSecondaryIndexes': [{
+                'IndexName': 'index',
+                'ProvisionedThroughput': {'ReadCapacityUnits': 20,
+                                          'WriteCapacityUnits': 0}}]}
+        limiter.configure(description, fraction=0.5)
+        self.assertEqual(
+            dict((key, bucket.rate)
+                 for key, bucket in limiter._buckets.items()),
+            {('table', None, 'read'): 50, ('table', None, 'write'): 25,
+             ('table', 'index', 'read'): 10})
+
+    def test_local_index_requests_use_table_rate(self):
+        limiter = ratelimit.CapacityLimiter()
+        limiter.configure({
+            'TableName': 'table',
+            'ProvisionedThroughput': {'ReadCapacityUnits': 10,
+                                      'WriteCapacityUnits': 5},
+            'LocalSecondaryIndexes': [{'IndexName': 'local'}]})
+        body = {'TableName': 'table', 'IndexName': 'local'}
+        prepared, requested = limiter.prepare('Query', body)
+        self.assertEqual(prepared['ReturnConsumedCapacity'], 'INDEXES')
+        reservation = limiter.reserve('Query', body)
+        limiter.settle('Query', reservation, {
+            'TableName': 'table', 'CapacityUnits': 12,
+            'Table': {'CapacityUnits': 0},
+            'LocalSecondaryIndexes': {'local': {'CapacityUnits': 12}}})
+        self.assertEqual(limiter._buckets[('table', None, 'read')].tokens, -2)
+        self.assertEqual(limiter.delay('Query', body), 0.2)
+
+    def test_on_demand_tables_are_not_limited(self):
+        limiter = ratelimit.CapacityLimiter()
+        limiter.configure({'TableName': 'table',
+                           'ProvisionedThroughput': {
+                               'ReadCapacityUnits': 0,
+                               'WriteCapacityUnits': 0}})
+        self.assertEqual(limiter._buckets, {})
+
+    def test_prepare_requests_consumed_capacity(self):
+        body = {'TableName': 'table'}
+        prepared, requested = self.limiter.prepare('GetItem', body)
+        self.assertEqual(prepared, {'TableName': 'table',
+                                    'ReturnConsumedCapacity': 'INDEXES'})
+        self.assertEqual(requested, 'NONE')
+        self.assertEqual(body, {'TableName': 'table'})
+
+    def test_prepare_keeps_requested_index_capacity(self):
+        body = {'TableName': 'table', 'ReturnConsumedCapacity': 'INDEXES'}
+        self.assertEqual(self.limiter.prepare('GetItem', body), (body, None))
+
+    def test_prepare_upgrades_total_capacity(self):
+        body = {'TableName': 'table', 'IndexName': 'index',
+                'ReturnConsumedCapacity': 'TOTAL'}
+        prepared, requested = self.limiter.prepare('Query', body)
+        self.assertEqual(prepared['ReturnConsumedCapacity'], 'INDEXES')
+        self.assertEqual(requested, 'TOTAL')
+
+    def test_prepare_upgrades_no_capacity(self):
+        body = {'TableName': 'table', 'ReturnConsumedCapacity': 'NONE'}
+        prepared, requested = self.limiter.prepare('PutItem', body)
+        self.assertEqual(prepared['ReturnConsumedCapacity'], 'INDEXES')
+        self.assertEqual(requested, 'NONE')
+
+    def test_restore_reduces_capacity_to_total(self):
+        result = {'ConsumedCapacity': {
+            'TableName': 'table', 'CapacityUnits': 6,
+            'Table': {'CapacityUnits': 0},
+            'GlobalSecondaryIndexes': {'index': {'CapacityUnits': 6}}}}
+        self.limiter.restore(result, 'TOTAL')
+        self.assertEqual(result, {'ConsumedCapacity': {
+            'TableName': 'table', 'CapacityUnits': 6}})
+
+    def test_restore_reduces_batch_capacity_to_total(self):
+        result = {'ConsumedCapacity': [{
+            'TableName': 'table', 'CapacityUnits': 2,
+            'Table': {'CapacityUnits': 2}}]}
+        self.limiter.restore(result, 'TOTAL')
+        self.assertEqual(result, {'ConsumedCapacity': [
+            {'TableName': 'table', 'CapacityUnits': 2}]})
+
+    def test_restore_removes_capacity(self):
+        result = {'Item': {}, 'ConsumedCapacity': {'TableName': 'table'}}
+        self.limiter.restore(result, 'NONE')
+        self.assertEqual(result, {'Item': {}})
+
+    def test_prepare_ignores_unlimited_requests(self):
+        for function, body in [('GetItem', {'TableName': 'other'}),
+                               ('DescribeTable', {'TableName': 'table'})]:
+            self.assertEqual(self.limiter.prepare(function, body),
+                             (body, None))
+
+    def test_reservation_is_replaced_by_consumed_capacity(self):
+        reservation = self.limiter.reserve('GetItem', {'TableName': 'table'})
+        self.assertEqual(self.bucket('table', None, 'read').tokens, 9)
+        self.limiter.settle('GetItem', reservation,
+                            {'TableName': 'table', 'CapacityUnits': 12.5,
+                             'Table': {'CapacityUnits': 12.5}})
+        self.assertEqual(self.bucket('table', None, 'read').tokens, -2.5)
+        self.assertEqual(self.limiter.delay('GetItem', {'TableName': 'table'}),
+                         0.25)
+
+    def test_failed_requests_return_the_reservation(self):
+        reservation = self.limiter.reserve(
+            'BatchWriteItem', {'RequestItems': {'table': [{}, {}, {}]}})
+        self.assertEqual(self.bucket('table', None, 'write').tokens, 2)
+        self.limiter.settle('BatchWriteItem', reservation)
+        self.assertEqual(self.bucket('table', None, 'write').tokens, 5)
+
+    def test_index_capacity_is_debited_from_index(self):
+        body = {'TableName': 'table', 'IndexName': 'index'}
+        reservation = self.limiter.reserve('Query', body)
+        self.limiter.settle('Query', reservation, {
+            'TableName': 'table', 'CapacityUnits': 6,
+            'Table': {'CapacityUnits': 0},
+            'GlobalSecondaryIndexes': {'index': {'CapacityUnits': 6}}})
+        self.assertEqual(self.bucket('table', None, 'read').tokens, 10)
+        self.assertEqual(self.bucket('table', 'index', 'read').tokens, -2)
+        self.assertEqual(self.limiter.delay('Query', body), 0.5)
+
+    def test_writes_debit_table_and_index_buckets(self):
+        self.limiter.settle('PutItem', [], {
+            'TableName': 'table', 'CapacityUnits': 4,
+            'Table': {'CapacityUnits': 1},
+            'LocalSecondaryIndexes': {'local': {'CapacityUnits': 1}},
+            'GlobalSecondaryIndexes': {'index': {'CapacityUnits': 2}}})
+        self.assertEqual(self.bucket('table', None, 'write').tokens, 3)
+        self.assertEqual(self.bucket('table', 'index', 'write').tokens, 0)
+
+    def test_removing_a_rate(self):
+        self.limiter.set_rate('table')
+        self.assertEqual(self.limiter.delay('GetItem', {'TableName': 'table'}),
+                         0)
+        self.assertNotIn(('table', None, 'read'), self.limiter._buckets)
@@ -0,0 +1,100 @@
+import unittest
+
+import mock
+
+from sprockets.clients.dynamodb import exceptions
+from sprockets.clients.dynamodb import retry
+
+
+class RetryPolicyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = retry.RetryPolicy(base_delay=1, max_delay=10)
+
+    def test_unknown_errors_are_not_retried(self):
+        self.assertIsNone(
+            self.policy.delay(exceptions.ValidationException(), 0, 0))
+        self.assertIsNone(self.policy.delay(ValueError(), 0, 0))
+        self.assertEqual(self.policy.exhausted, 0)
+
+    def test_retryable_errors_are_retried(self):
+        for exception_class in retry.RULES:
+            self.assertIsNotNone(
+                self.policy.delay(exception_class(), 0, 0))
+
+    def test_delay_is_capped_exponential_with_full_jitter(self):
+        with mock.patch('random.uniform',
+                        side_effect=lambda low, high: high) as uniform:
+            delays = [self.policy.delay(exceptions.ThroughputExceeded(),
+                                        retries, 0)
+                      for retries in range(6)]
+        self.assertEqual(delays, [1, 2, 4, 8, 10, 10])
+        self.assertTrue(all(call[0][0] == 0
+                            for call in uniform.call_args_list))
+
+    def test_retries_are_limited_per_error_class(self):
+        self.policy.rules = {exceptions.InternalFailure: 2,
+                             exceptions.DynamoDBException: 5}
+        self.assertIsNotNone(
+            self.policy.delay(exceptions.InternalFailure(), 1, 0))
+        self.assertIsNone(
+            self.policy.delay(exceptions.InternalFailure(), 2, 0))
+        self.assertIsNotNone(
+            self.policy.delay(exceptions.ResourceInUse(), 4, 0))
+        self.assertIsNone(
+            self.policy.delay(exceptions.ResourceInUse(), 5, 0))
+        self.assertEqual(self.policy.exhausted, 2)
+
+    def test_deadline_stops_retries(self):
+        self.policy.deadline = 5
+        with mock.patch('random.uniform', return_value=1):
+            self.assertEqual(
+                self.policy.delay(exceptions.InternalFailure(), 0, 3.5), 1)
+            self.assertIsNone(
+                self.policy.delay(exceptions.InternalFailure(), 0, 4.5))
+
+    def test_budget_stops_retries(self):
+        self.policy.budget = retry.RetryBudget(capacity=10)
+        error = exceptions.ThroughputExceeded()
+        self.assertIsNotNone(self.policy.delay(error, 0, 0))
+        self.assertIsNotNone(self.policy.delay(error, 0, 0))
+        self.assertIsNone(self.policy.delay(error, 0, 0))
+        self.policy.complete('GetItem', 0)
+        self.assertEqual(self.policy.budget.tokens, 1)
+
+    def test_rejected_only_keeps_throttling_rules(self):
+        self.policy.budget = retry.RetryBudget()
+        policy = self.policy.rejected_only()
+        self.assertEqual(policy.rules,
+                         {exceptions.ThroughputExceeded: 10,
+                          exceptions.ThrottlingException: 10})
+        self.assertIs(policy.budget, self.policy.budget)
+        self.assertEqual(policy.max_delay, 10)
+        self.assertIsNone(
+            policy.delay(exceptions.TimeoutException(), 0, 0))
+
+    def test_complete_reports_retries(self):
+        with mock.patch.object(self.policy, 'report') as report:
+            self.policy.complete('GetItem', 2)
+            report.assert_called_once_with('GetItem', 2, None)
+        self.assertEqual(self.policy.calls, 1)
+        self.assertEqual(self.policy.retries, 2)
+
+
+class RetryBudgetTests(unittest.TestCase):
+
+    def test_timeouts_cost_more(self):
+        budget = retry.RetryBudget(capacity=20, retry_cost=5, timeout_cost=10)
+        self.assertTrue(budget.acquire(exceptions.TimeoutException()))
+        self.assertEqual(budget.tokens, 10)
+        self.assertTrue(budget.acquire(exceptions.InternalFailure()))
+        self.assertEqual(budget.tokens, 5)
+        self.assertFalse(budget.acquire(exceptions.TimeoutException()))
+        self.assertEqual(budget.tokens, 5)
+
+    def test_release_is_capped_at_capacity(self):
+        budget = retry.RetryBudget(capacity=10, refund=3)
+        budget.acquire(exceptions.InternalFailure())
+        budget.release()
+        budget.release()
+        self.assertEqual(budget.tokens, 10)
@@ -0,0 +1,74 @@
+import json
+import unittest
+
+from sprockets.clients.dynamodb import codec
+from sprockets.clients.dynamodb import streaming
+from sprockets.clients.dynamodb import utils
+
+
+class ParsePageTests(unittest.TestCase):
+
+    def setUp(self):
+        self.codec = codec.JSONCodec()
+        self.items = [{'id': 'a', 'text': 'brackets ] } { [ and "quotes"'},
+                      {'id': 'b', 'nested': {'values': [1, 2.5, None]}},
+                      {'id': 'c', 'tags': {'x', 'y'}}]
+
+    def encode(self, result, **kwargs):
+        return json.dumps(result, **kwargs).encode('utf-8')
+
+    def page(self, **kwargs):
+        return self.encode(
+            {'Count': 3, 'ScannedCount': 7,
+             'Items': [utils.marshall(item) for item in self.items],
+             'LastEvaluatedKey': {'id': {'S': 'c'}},
+             'ConsumedCapacity': {'TableName': 'table',
+                                  'CapacityUnits': 1.5}}, **kwargs)
+
+    def test_items_are_unmarshalled(self):
+        result = streaming.parse_page(self.page(), self.codec)
+        self.assertEqual(list(result['Items']), self.items)
+
+    def test_other_values_are_decoded(self):
+        result = streaming.parse_page(self.page(), self.codec)
+        self.assertEqual(result['Count'], 3)
+        self.assertEqual(result['ScannedCount'], 7)
+        self.assertEqual(result['LastEvaluatedKey'], {'id': {'S': 'c'}})
+        self.assertEqual(result['ConsumedCapacity'],
+                         {'TableName': 'table', 'CapacityUnits': 1.5})
+
+    def test_whitespace_is_ignored(self):
+        result = streaming.parse_page(self.page(indent=2), self.codec)
+        self.assertEqual(list(result['Items']), self.items)
+        self.assertEqual(result['Count'], 3)
+
+    def test_items_are_read_once(self):
+        stream = streaming.parse_page(self.page(), self.codec)['Items']
+        self.assertEqual(len(stream), 3)
+        self.assertEqual(next(stream), self.items[0])
+        self.assertEqual(len(stream), 2)
+        self.assertEqual(list(stream), self.items[1:])
+        self.assertEqual(len(stream), 0)
+        self.assertIsNone(stream._body)
+        self.assertEqual(list(stream), [])
+
+    def test_lazy_items(self):
+        stream = streaming.parse_page(self.page(), self.codec, True)['Items']
+        item = next(stream)
+        self.assertIsInstance(item, utils.LazyItem)
+        self.assertEqual(item, self.items[0])
+
+    def test_empty_page(self):
+        result = streaming.parse_page(b'{"Count":0,"Items":[]}', self.codec)
+        self.assertEqual(list(result['Items']), [])
+        self.assertEqual(result['Count'], 0)
+
+    def test_missing_items(self):
+        result = streaming.parse_page(b'{"Count":0}', self.codec)
+        self.assertEqual(len(result['Items']), 0)
+
+    def test_invalid_responses(self):
+        for body in (b'', b'[]', b'{"Items":{}}',
+                     b'{"Count" 1}', b'{"Items":[{"id":'):
+            with self.assertRaises(ValueError):
+                streaming.parse_page(body, self.codec)
@@ -1,5 +1,7 @@
 import base64
+import collections
 import datetime
+import decimal
 import unittest
 import uuid
 
@@ -74,6 +76,69 @@ class MarshallTests(unittest.TestCase):
     def test_value_error_raised_on_mixed_set(self):
         self.assertRaises(ValueError, utils.marshall, {'key': {1, 'two', 3}})
 
+    def test_value_error_raised_on_bool_in_set(self):
+        self.assertRaises(ValueError, utils.marshall, {'key': {True, 2}})
+
+    def test_subclasses_are_marshalled_as_their_base_type(self):
+        class Text(type(u'')):
+            pass
+
+        value = {'key1': collections.OrderedDict([('a', 1)]),
+                 'key2': Text(u'value'),
+                 'key3': {Text(u'a'), u'b'}}
+        self.assertEqual(utils.marshall(value),
+                         {'key1': {'M': {'a': {'N': '1'}}},
+                          'key2': {'S': u'value'},
+                          'key3': {'SS': [u'a', u'b']}})
+
+    def test_registered_marshallers(self):
+        types = list(utils._TYPES)
+
+        def restore():
+            utils._TYPES[:] = types
+            utils._build_marshallers()
+
+        self.addCleanup(restore)
+        utils.register_marshaller(decimal.Decimal,
+                                  lambda value: {'N': str(value)})
+        utils.register_marshaller(datetime.date,
+                                  lambda value: {'S': value.isoformat()})
+        value = {'key1': decimal.Decimal('1.50'),
+                 'key2': datetime.date(2016, 1, 2),
+                 'key3': datetime.datetime(2016, 1, 2, 3, 4, 5)}
+        self.assertEqual(utils.marshall(value),
+                         {'key1': {'N': '1.50'},
+                          'key2': {'S': '2016-01-02'},
+                          'key3': {'S': '2016-01-02T03:04:05'}})
+
+    def test_registered_types_in_sets(self):
+        types = list(utils._TYPES)
+
+        def restore():
+            utils._TYPES[:] = types
+            utils._build_marshallers()
+
+        self.addCleanup(restore)
+        utils.register_marshaller(decimal.Decimal,
+                                  lambda value: {'N': str(value)})
+        utils.register_marshaller(datetime.date,
+                                  lambda value: {'S': value.isoformat()})
+        value = {'key1': {decimal.Decimal('1.50'), 2},
+                 'key2': frozenset([datetime.date(2016, 1, 2), u'a']),
+                 'key3': {decimal.Decimal('1'), u'a'},
+                 'key4': {True}}
+        self.assertEqual(utils.marshall({'key1': value['key1'],
+                                         'key2': value['key2']}),
+                         {'key1': {'NS': ['1.50', '2']},
+                          'key2': {'SS': ['2016-01-02', u'a']}})
+        for key in ('key3', 'key4'):
+            with self.assertRaises(ValueError):
+                utils.marshall({key: value[key]})
+
+    def test_unmarshalled_text_round_trips(self):
+        value = {'key': {'S': u'value'}}
+        self.assertEqual(utils.marshall(utils.unmarshall(value)), value)
+
 
 class UnmarshallTests(unittest.TestCase):
     maxDiff = None
@@ -123,3 +188,69 @@ class UnmarshallTests(unittest.TestCase):
 
     def test_value_error_raised_on_unsupported_type(self):
         self.assertRaises(ValueError, utils.unmarshall, {'key': {'T': 1}})
+
+    def test_value_error_raised_on_unsupported_nested_type(self):
+        self.assertRaises(ValueError, utils.unmarshall,
+                          {'key': {'L': [{'S': 'a'}, {'T': 1}]}})
+
+    def test_unmarshall_many(self):
+        items = [{'id': {'S': 'a'}, 'count': {'N': '1'},
+                  'ratio': {'N': '0.5'}, 'enabled': {'BOOL': False},
+                  'tags': {'L': [{'N': '2'}, {'M': {'x': {'NULL': True}}}]}},
+                 {'id': {'S': 'b'}}]
+        self.assertEqual(utils.unmarshall_many(items),
+                         [utils.unmarshall(item) for item in items])
+        self.assertEqual(utils.unmarshall_many(items)[0],
+                         {'id': 'a', 'count': 1, 'ratio': 0.5,
+                          'enabled': False, 'tags': [2, {'x': None}]})
+
+    def test_unmarshall_many_value_error_raised_on_unsupported_type(self):
+        self.assertRaises(ValueError, utils.unmarshall_many,
+                          [{'id': {'S': 'a'}}, {'key': {'T': 1}}])
+
+
+class LazyItemTests(unittest.TestCase):
+
+    def setUp(self):
+        self.value = {'id': 'a', 'count': 2, 'data': b'\x00\x01',
+                      'tags': {'x', 'y'},
+                      'nested': {'list': [1, {'deep': 'value'}]}}
+        self.item = utils.LazyItem(utils.marshall(self.value))
+
+    def test_attributes_are_decoded_on_access(self):
+        self.assertEqual(self.item['count'], 2)
+        self.assertEqual(list(self.item._cache), ['count'])
+        self.assertIn('data', self.item)
+        self.assertEqual(list(self.item._cache), ['count'])
+
+    def test_decoded_attributes_are_cached(self):
+        self.assertIs(self.item['nested'], self.item['nested'])
+
+    def test_nested_values_are_lazy(self):
+        nested = self.item['nested']
+        self.assertIsInstance(nested, utils.LazyItem)
+        self.assertIsInstance(nested['list'], utils.LazyList)
+        self.assertEqual(nested['list'][1]['deep'], 'value')
+        self.assertEqual(nested['list'][:1], [1])
+
+    def test_equals_unmarshalled_item(self):
+        self.assertEqual(self.item, self.value)
+        self.assertEqual(self.value, self.item)
+        self.assertEqual(self.item.to_dict(), self.value)
+        self.assertEqual(len(self.item), 5)
+        self.assertEqual(sorted(self.item), sorted(self.value))
+
+    def test_missing_attribute(self):
+        with self.assertRaises(KeyError):
+            self.item['missing']
+        self.assertIsNone(self.item.get('missing'))
+
+    def test_is_read_only(self):
+        with self.assertRaises(TypeError):
+            self.item['id'] = 'b'
+
+    def test_marshall_returns_marshalled_values(self):
+        marshalled = utils.marshall(self.value)
+        self.assertEqual(utils.marshall(self.item), marshalled)
+        self.assertEqual(utils.marshall({'copy': self.item['nested']}),
+                         {'copy': marshalled['nested']})
@@ -0,0 +1,160 @@
+import mock
+
+from tornado import concurrent
+from tornado import gen
+from tornado import testing
+
+from sprockets.clients import dynamodb
+from sprockets.clients.dynamodb import exceptions
+from sprockets.clients.dynamodb import writer
+
+
+class BufferedWriterTests(testing.AsyncTestCase):
+
+    def setUp(self):
+        super(BufferedWriterTests, self).setUp()
+        self.client = dynamodb.DynamoDB()
+        self.client.execute = mock.Mock(side_effect=self.execute)
+        self.bodies = []
+        self.responses = []
+        self.failures = []
+
+    def execute(self, function, body):
+        if function == 'DescribeTable':
+            future = concurrent.Future()
+            future.set_result({'Table': {'KeySchema': [
+                {'AttributeName': 'id', 'KeyType': 'HASH'},
+                {'AttributeName': 'sort', 'KeyType': 'RANGE'}]}})
+            return future
+        self.bodies.append(body)
+        future = concurrent.Future()
+        response = self.responses.pop(0) if self.responses else {}
+        if isinstance(response, Exception):
+            future.set_exception(response)
+        else:
+            self.io_loop.add_callback(future.set_result, response)
+        return future
+
+    def get_writer(self, **kwargs):
+        kwargs.setdefault('failure_callback',
+                          lambda items, error: self.failures.append(
+                              (items, error)))
+        return self.client.buffered_writer(**kwargs)
+
+    def sent(self):
+        return [[request for requests in body['RequestItems'].values()
+                 for request in requests] for body in self.bodies]
+
+    @testing.gen_test
+    def test_full_requests_are_sent_immediately(self):
+        buffered = self.get_writer(flush_interval=60)
+        for value in range(30):
+            buffered.put('table', {'id': str(value)})
+        self.assertEqual([len(requests) for requests in self.sent()], [25])
+        self.assertEqual(len(buffered), 5)
+        yield buffered.close()
+        self.assertEqual([len(requests) for requests in self.sent()],
+                         [25, 5])
+        self.assertEqual(self.sent()[0][1],
+                         {'PutRequest': {'Item': {'id': {'S': '1'}}}})
+
+    @testing.gen_test
+    def test_byte_budget_limits_requests(self):
+        buffered = self.get_writer(flush_bytes=100, flush_interval=60)
+        for value in range(4):
+            buffered.put('table', {'id': str(value), 'data': 'x' * 40})
+        yield buffered.flush()
+        self.assertEqual([len(requests) for requests in self.sent()],
+                         [1, 1, 1, 1])
+
+    @testing.gen_test
+    def test_writes_are_sent_after_interval(self):
+        buffered = self.get_writer(flush_interval=0.05)
+        buffered.delete('table', {'id': 'a'})
+        buffered.delete('other', {'id': 'b'})
+        self.assertEqual(self.bodies, [])
+        yield gen.sleep(0.1)
+        self.assertEqual(self.bodies, [{'RequestItems': {
+            'table': [{'DeleteRequest': {'Key': {'id': {'S': 'a'}}}}],
+            'other': [{'DeleteRequest': {'Key': {'id': {'S': 'b'}}}}]}}])
+        self.assertEqual(len(buffered), 0)
+
+    @testing.gen_test
+    def test_full_buffer_applies_backpressure(self):
+        buffered = self.get_writer(flush_items=1, max_in_flight=1,
+                                   max_buffered_bytes=60)
+        first = buffered.put('table', {'id': 'a', 'data': 'x' * 20})
+        second = buffered.put('table', {'id': 'b', 'data': 'x' * 20})
+        self.assertTrue(first.done())
+        self.assertFalse(second.done())
+        self.assertEqual(buffered.stats['waiting'], 1)
+        yield second
+        self.assertEqual(len(self.bodies), 2)
+        yield buffered.close()
+
+    @testing.gen_test
+    def test_failures_are_reported(self):
+        self.responses = [exceptions.InternalFailure('failed'),
+                          {'UnprocessedItems': {'table': [
+                              {'PutRequest': {'Item': {'id': {'S': 'b'}}}}]}}]
+        buffered = self.get_writer(flush_items=1, timeout=0)
+        buffered.put('table', {'id': 'a'})
+        buffered.put('table', {'id': 'b'})
+        yield buffered.close()
+        self.assertEqual(len(self.failures), 2)
+        items, error = self.failures[0]
+        self.assertEqual(items,
+                         {'table': [{'PutRequest': {'Item': {'id': 'a'}}}]})
+        self.assertIsInstance(error, exceptions.InternalFailure)
+        self.assertEqual(self.failures[1],
+                         ({'table': [{'PutRequest': {'Item': {'id': 'b'}}}]},
+                          None))
+
+    @testing.gen_test
+    def test_closed_writer_rejects_writes(self):
+        buffered = self.get_writer()
+        buffered.put('table', {'id': 'a'})
+        yield buffered.close()
+        self.assertEqual(len(self.bodies), 1)
+        with self.assertRaises(RuntimeError):
+            yield buffered.put('table', {'id': 'b'})
+
+    def test_flush_items_is_capped(self):
+        buffered = writer.BufferedWriter(self.client, flush_items=100)
+        self.assertEqual(buffered._flush_items, 25)
+
+    @testing.gen_test
+    def test_deduplicate_keeps_last_write(self):
+        buffered = self.get_writer(deduplicate=True, flush_interval=60)
+        yield buffered.put('table', {'id': 'a', 'sort': 1, 'value': 1})
+        yield buffered.put('table', {'id': 'a', 'sort': 2, 'value': 1})
+        yield buffered.put('table', {'id': 'a', 'sort': 1, 'value': 2})
+        yield buffered.delete('table', {'id': 'a', 'sort': 2})
+        self.assertEqual(len(buffered), 2)
+        self.assertEqual(buffered.replaced, 2)
+        yield buffered.close()
+        self.assertEqual(self.sent(), [[
+            {'PutRequest': {'Item': {'id': {'S': 'a'}, 'sort': {'N': '1'},
+                                     'value': {'N': '2'}}}},
+            {'DeleteRequest': {'Key': {'id': {'S': 'a'},
+                                       'sort': {'N': '2'}}}}]])
+        self.assertEqual(self.client.execute.call_count, 2)
+
+    @testing.gen_test
+    def test_deduplicate_waits_for_write_in_flight(self):
+        buffered = self.get_writer(deduplicate=True, flush_items=1)
+        yield buffered.put('table', {'id': 'a', 'sort': 1, 'value': 1})
+        buffered.put('table', {'id': 'a', 'sort': 1, 'value': 2})
+        buffered.put('table', {'id': 'b', 'sort': 1})
+        self.assertEqual(len(self.bodies), 2)
+        self.assertEqual(len(buffered), 1)
+        yield buffered.close()
+        self.assertEqual(
+            [requests[0]['PutRequest']['Item']['id']['S']
+             for requests in self.sent()], ['a', 'b', 'a'])
+
+    @testing.gen_test
+    def test_deduplicate_requires_key_attributes(self):
+        buffered = self.get_writer(deduplicate=True)
+        with self.assertRaises(ValueError):
+            yield buffered.put('table', {'id': 'a'})